@@ -10,6 +10,7 @@ Laser Cutting Layout Generator
 """
 
 import os
+import re
 import argparse
 import xml.etree.ElementTree as ET
 from pathlib import Path
@@ -17,6 +18,15 @@ import json
 from typing import List, Dict, Tuple
 import math
 
+import numpy as np
+
+from cut_export import CUT_SPEED, TRAVEL_SPEED, PIERCE_TIME, LASER_POWER, export_cut_jobs
+from hole_geometry import load_geometry
+from rect_packing import pack_maxrects, pack_strip, sheet_utilization
+from remnant_inventory import INVENTORY_FILENAME, RemnantInventory, pack_into_remnants
+from shape_nesting import NEST_RESOLUTION, NEST_TIME_BUDGET, nest_pieces, polygon_area
+from svg_writer import compact_path, decode_path, write_svg_tree
+
 # A4 크기 (mm) - 여백 고려
 A4_WIDTH = 210 - 20  # 양쪽 10mm 여백
 A4_HEIGHT = 297 - 20  # 위아래 10mm 여백
@@ -28,14 +38,84 @@ A3_HEIGHT = 420 - 20
 # 조각 간 간격 (mm) - 비싼 종이 절약
 PIECE_SPACING = 1.5
 
+# 용지 여백 (mm)
+PAGE_MARGIN = 10
+
+
+def get_page_size(paper_size: str) -> Tuple[float, float]:
+    """용지 이름 (A4, A3 또는 '가로x세로' mm) → 배치 가능 영역 (width, height) mm (여백 제외)"""
+    if paper_size.upper() == 'A4':
+        return A4_WIDTH, A4_HEIGHT
+    elif paper_size.upper() == 'A3':
+        return A3_WIDTH, A3_HEIGHT
+
+    # 사용자 지정 크기 (예: 600x900), 여백은 A4/A3와 동일하게 제외
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*[xX]\s*(\d+(?:\.\d+)?)\s*', paper_size)
+    if match:
+        width, height = (float(v) - 2 * PAGE_MARGIN for v in match.groups())
+        if width > 0 and height > 0:
+            return width, height
+    raise ValueError(f"Unsupported paper size: {paper_size} (use A4, A3 or WIDTHxHEIGHT in mm)")
+
 
 class SVGPiece:
-    """SVG 조각 정보"""
+    """SVG 조각 정보
+
+    geometry(hole_geometry.HoleGeometry)와 index가 주어지면 SVG 파싱 없이
+    sidecar 레코드에서 같은 값을 채움.
+    """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, geometry=None, index: int = 0, compact: bool = False):
         self.file_path = file_path
         self.filename = os.path.basename(file_path)
 
+        if geometry is not None:
+            self._load_geometry(geometry, index, compact)
+        else:
+            self._load_svg(file_path)
+            if compact and self.path_d:
+                self.path_d = compact_path(self.path_d)
+
+        # 배치 위치 (나중에 계산됨)
+        self.placed_x = 0
+        self.placed_y = 0
+        self.page_number = 0
+        self.rotation = 0  # 배치 회전 (시계 방향 0/90/180/270°)
+
+        # 여러 문서를 함께 배치할 때의 출처 (단일 문서면 None)
+        self.document = None
+        self.doc_index = 0
+
+        # 스케일 팩터 (기본값 1.0 = 원본 크기)
+        self.scale = 1.0
+
+        # 원본 크기 저장 (스케일 적용 전)
+        self.original_width = self.width
+        self.original_height = self.height
+
+    def _load_geometry(self, geometry, index: int, compact: bool = False):
+        """sidecar 레코드 → 개별 SVG와 동일한 크기/메타데이터/path"""
+        r = geometry.records[index]
+        x, y, w, h = geometry.bbox(index)
+        img_w, img_h = geometry.image_size
+
+        self.width = float(r['width_mm'])
+        self.height = float(r['height_mm'])
+        self.metadata = {
+            'hole_id': str(int(r['id'])),
+            'original_position': f"x={x}, y={y}",
+            'original_image_size': f"{img_w}x{img_h}",
+            'bbox': f"x={x}, y={y}, w={w}, h={h}",
+            'area_pixels': f"{r['area_px']:.0f}",
+            'area_mm2': f"{r['area_mm2']:.2f}",
+        }
+        self.hole_id = int(r['id'])
+        self.original_position = self.metadata['original_position']
+        self.bbox = self.metadata['bbox']
+        self.path_d = geometry.path_data(index, compact)
+        self.viewBox = f"{r['vb_x']} {r['vb_y']} {r['vb_w']} {r['vb_h']}"
+
+    def _load_svg(self, file_path: str):
         # SVG 파일 파싱
         tree = ET.parse(file_path)
         root = tree.getroot()
@@ -67,24 +147,72 @@ class SVGPiece:
         self.original_position = self.metadata.get('original_position', '')
         self.bbox = self.metadata.get('bbox', '')
 
-        # 배치 위치 (나중에 계산됨)
-        self.placed_x = 0
-        self.placed_y = 0
-        self.page_number = 0
-
-        # 스케일 팩터 (기본값 1.0 = 원본 크기)
-        self.scale = 1.0
-
-        # 원본 크기 저장 (스케일 적용 전)
-        self.original_width = self.width
-        self.original_height = self.height
-
         # SVG 경로 데이터 저장 - 네임스페이스 고려
-        self.path_element = (root.find('.//svg:path', ns) or
-                            root.find('.//path') or
-                            root.find('.//{http://www.w3.org/2000/svg}path'))
+        path_element = (root.find('.//svg:path', ns) or
+                        root.find('.//path') or
+                        root.find('.//{http://www.w3.org/2000/svg}path'))
+        self.path_d = path_element.get('d', '') if path_element is not None else None
         self.viewBox = root.get('viewBox', '')
 
+    def page_transform(self, margin: float = PAGE_MARGIN) -> Tuple[float, float, float, float, float, float]:
+        """path 좌표 → 페이지 좌표 변환 (x_offset, y_offset, scale_x, scale_y, vb_x, vb_y)
+
+        page = offset + scale * (path - vb)
+        """
+        x_offset = margin + self.placed_x
+        y_offset = margin + self.placed_y
+
+        # ViewBox에서 원본 좌표 범위 추출
+        vb_x, vb_y, vb_w, vb_h = 0, 0, self.width, self.height
+
+        if self.viewBox:
+            vb_parts = self.viewBox.split()
+            if len(vb_parts) == 4:
+                vb_x = float(vb_parts[0])
+                vb_y = float(vb_parts[1])
+                vb_w = float(vb_parts[2])
+                vb_h = float(vb_parts[3])
+
+        # 스케일 계산 (viewBox 크기 -> 물리적 크기)
+        # width/height에 piece.scale이 이미 적용되어 있으므로 다시 곱하지 않음
+        scale_x = (self.width / vb_w) if vb_w > 0 else self.scale
+        scale_y = (self.height / vb_h) if vb_h > 0 else self.scale
+        return x_offset, y_offset, scale_x, scale_y, vb_x, vb_y
+
+    def placed_size(self) -> Tuple[float, float]:
+        """페이지 위에서 차지하는 크기 (90°/270° 회전 배치면 width/height 교환)"""
+        return (self.height, self.width) if self.rotation in (90, 270) else (self.width, self.height)
+
+    def svg_transform(self, margin: float = PAGE_MARGIN) -> str:
+        """SVG transform 속성 (rotation: 시계 방향, 회전 후에도 왼쪽 위가 배치 위치)"""
+        x_offset, y_offset, scale_x, scale_y, vb_x, vb_y = self.page_transform(margin)
+        local = f'scale({scale_x}, {scale_y}) translate({-vb_x}, {-vb_y})'
+        if self.rotation == 0:
+            return f'translate({x_offset}, {y_offset}) {local}'
+        shift_x = {90: self.height, 180: self.width, 270: 0}[self.rotation]
+        shift_y = {90: 0, 180: self.height, 270: self.width}[self.rotation]
+        return f'translate({x_offset + shift_x}, {y_offset + shift_y}) rotate({self.rotation}) {local}'
+
+    def local_polygon(self, rotation: int = None) -> np.ndarray:
+        """조각 상자 기준 윤곽 좌표 (k, 2) mm - rotation 적용 후 (기본: 배치된 회전)"""
+        if not self.path_d:
+            return np.zeros((0, 2))
+        rotation = self.rotation if rotation is None else rotation
+        _, _, scale_x, scale_y, vb_x, vb_y = self.page_transform(0)
+        points = np.array(decode_path(self.path_d), dtype=np.float64).reshape(-1, 2)
+        u, v = ((points - (vb_x, vb_y)) * (scale_x, scale_y)).T
+        if rotation == 90:
+            u, v = self.height - v, u
+        elif rotation == 180:
+            u, v = self.width - u, self.height - v
+        elif rotation == 270:
+            u, v = v, self.width - u
+        return np.column_stack([u, v])
+
+    def page_polygon(self, margin: float = PAGE_MARGIN) -> np.ndarray:
+        """배치된 윤곽의 페이지 좌표 (k, 2) mm (곡선은 선분으로 펼침)"""
+        return self.local_polygon() + (margin + self.placed_x, margin + self.placed_y)
+
     def apply_scale(self, scale_factor: float):
         """스케일 팩터 적용 (크기 조정)"""
         self.scale = scale_factor
@@ -95,8 +223,22 @@ class SVGPiece:
         """스케일이 적용된 크기 반환"""
         return (self.width, self.height)
 
+    @property
+    def piece_id(self) -> str:
+        """문서별로 구분되는 조각 ID ('문서:hole_id', 단일 문서면 hole_id)"""
+        return f"{self.document}:{self.hole_id}" if self.document else str(self.hole_id)
+
+    @property
+    def label(self) -> str:
+        """용지에 표시하는 짧은 번호 ('문서 번호-hole_id', 단일 문서면 hole_id)"""
+        return f"{self.doc_index}-{self.hole_id}" if self.document else str(self.hole_id)
+
+    @property
+    def sort_key(self) -> Tuple[int, int]:
+        return (self.doc_index, self.hole_id)
+
     def __repr__(self):
-        return f"SVGPiece(id={self.hole_id}, {self.width:.1f}x{self.height:.1f}mm)"
+        return f"SVGPiece(id={self.piece_id}, {self.width:.1f}x{self.height:.1f}mm)"
 
 
 class BinPacker2D:
@@ -167,22 +309,33 @@ class BinPacker2D:
         return False
 
 
-def load_svg_pieces(svg_dir: str) -> List[SVGPiece]:
-    """SVG 디렉토리에서 모든 조각 로드"""
+def load_svg_pieces(svg_dir: str, compact: bool = False) -> List[SVGPiece]:
+    """SVG 디렉토리에서 모든 조각 로드 (compact: path를 상대 좌표 m/l/h/v로 재인코딩)"""
     pieces = []
 
-    svg_files = sorted(Path(svg_dir).glob('*.svg'))
+    # 형상 sidecar가 SVG 파일 목록과 일치하면 XML 파싱 생략
+    geometry = load_geometry(svg_dir)
+    indices = geometry.indices_for_svg_dir(svg_dir) if geometry is not None else None
+    if geometry is not None and indices is None:
+        print("Warning: Geometry sidecar does not match SVG files, parsing SVGs instead")
 
-    print(f"Loading {len(svg_files)} SVG pieces from {svg_dir}...")
+    if indices is not None:
+        print(f"Loading {len(indices)} SVG pieces from {svg_dir}...")
+        pieces = [SVGPiece(os.path.join(svg_dir, geometry.svg_filename(i)), geometry, i, compact)
+                  for i in indices]
+    else:
+        svg_files = sorted(Path(svg_dir).glob('*.svg'))
 
-    for svg_file in svg_files:
-        try:
-            piece = SVGPiece(str(svg_file))
-            pieces.append(piece)
-            if piece.path_element is None:
-                print(f"Warning: No path element found in {svg_file.name}")
-        except Exception as e:
-            print(f"Warning: Failed to load {svg_file}: {e}")
+        print(f"Loading {len(svg_files)} SVG pieces from {svg_dir}...")
+
+        for svg_file in svg_files:
+            try:
+                piece = SVGPiece(str(svg_file), compact=compact)
+                pieces.append(piece)
+                if piece.path_d is None:
+                    print(f"Warning: No path element found in {svg_file.name}")
+            except Exception as e:
+                print(f"Warning: Failed to load {svg_file}: {e}")
 
     print(f"Successfully loaded {len(pieces)} pieces")
 
@@ -192,21 +345,63 @@ def load_svg_pieces(svg_dir: str) -> List[SVGPiece]:
     return pieces
 
 
-def pack_pieces_to_pages(pieces: List[SVGPiece], paper_size: str = 'A4') -> List[BinPacker2D]:
-    """조각들을 여러 페이지에 배치"""
+def document_name(svg_dir: str) -> str:
+    """SVG 디렉토리 → 문서 이름 (results/w_0001/detection/svg_vectors → w_0001)"""
+    for part in reversed(Path(svg_dir).resolve().parts):
+        if part not in ('svg_vectors', 'detection', ''):
+            return part
+    return 'document'
 
-    # 용지 크기 설정
-    if paper_size.upper() == 'A4':
-        page_width = A4_WIDTH
-        page_height = A4_HEIGHT
-    elif paper_size.upper() == 'A3':
-        page_width = A3_WIDTH
-        page_height = A3_HEIGHT
-    else:
-        raise ValueError(f"Unsupported paper size: {paper_size}")
 
-    print(f"\nPacking {len(pieces)} pieces onto {paper_size} pages ({page_width}x{page_height}mm)...")
+def load_document_pieces(svg_dirs: List[str], compact: bool = False) -> List[SVGPiece]:
+    """여러 문서의 조각 로드 (문서 이름으로 ID 구분)
+
+    svg_dirs 항목은 'SVG 디렉토리' 또는 '문서이름=SVG 디렉토리'.
+    디렉토리가 하나면 기존과 같음 (문서 구분 없음).
+    """
+    if len(svg_dirs) == 1 and '=' not in svg_dirs[0]:
+        return load_svg_pieces(svg_dirs[0], compact=compact)
 
+    pieces = []
+    names = set()
+    for doc_index, entry in enumerate(svg_dirs, 1):
+        name, _, svg_dir = entry.rpartition('=')
+        name = name or document_name(svg_dir)
+        if name in names:
+            name = f'{name}_{doc_index}'
+        names.add(name)
+
+        print(f"\n[{doc_index}] Document '{name}'")
+        for piece in load_svg_pieces(svg_dir, compact=compact):
+            piece.document = name
+            piece.doc_index = doc_index
+            pieces.append(piece)
+
+    print(f"\nLoaded {len(pieces)} pieces from {len(svg_dirs)} documents")
+    return pieces
+
+
+def group_by_paper_type(pieces: List[SVGPiece], paper_types: Dict[str, str]) -> Dict[str, List[SVGPiece]]:
+    """종이 종류별 조각 묶음 (같은 용지에는 같은 종이만)
+
+    paper_types 키: '문서:hole_id' (조각별), 문서 이름, 'hole_id' (단일 문서).
+    지정이 없는 조각은 'default'.
+    """
+    groups = {}
+    for piece in pieces:
+        paper_type = (paper_types.get(piece.piece_id) or
+                      (paper_types.get(piece.document) if piece.document else None) or
+                      'default')
+        groups.setdefault(paper_type, []).append(piece)
+    return groups
+
+
+def pack_pieces_shelf(pieces: List[SVGPiece], page_width: float, page_height: float,
+                      verbose: bool = True) -> List[BinPacker2D]:
+    """shelf packer, next-fit (hole_id 순서, 못 들어가면 새 페이지)
+
+    verbose=False면 진행 상황 / 경고 출력 없음 (packer 비교용)
+    """
     pages = []
     current_page = BinPacker2D(page_width, page_height)
     pages.append(current_page)
@@ -219,33 +414,147 @@ def pack_pieces_to_pages(pieces: List[SVGPiece], paper_size: str = 'A4') -> List
             pages.append(current_page)
 
             if not current_page.add_piece(piece):
-                print(f"Warning: Piece {piece.hole_id} is too large for a single page!")
+                if verbose:
+                    print(f"Warning: Piece {piece.piece_id} is too large for a single page!")
                 continue
 
         # 페이지 번호 기록
         piece.page_number = len(pages)
 
-        if (i + 1) % 50 == 0:
+        if verbose and (i + 1) % 50 == 0:
             print(f"  Packed {i + 1}/{len(pieces)} pieces...")
 
+    return pages
+
+
+class _PieceSize:
+    """packer 비교용 크기만 가진 조각 (원본 조각의 배치 위치를 건드리지 않음)"""
+
+    def __init__(self, piece: SVGPiece):
+        self.hole_id = piece.hole_id
+        self.piece_id = piece.piece_id
+        self.document = piece.document
+        self.sort_key = piece.sort_key
+        self.width = piece.width
+        self.height = piece.height
+
+
+def pack_pieces_to_pages(pieces: List[SVGPiece], paper_size: str = 'A4', packer: str = 'maxrects',
+                         allow_rotation: bool = False, nest_resolution: float = NEST_RESOLUTION,
+                         nest_time: float = NEST_TIME_BUDGET):
+    """조각들을 여러 페이지에 배치
+
+    packer:
+        'maxrects' - MaxRects + first-fit decreasing (열린 모든 페이지에 시도, --rotate 시 90° 회전)
+        'nest'     - 실제 윤곽 기준 raster nesting (shape_nesting, 0°/180°, --rotate 시 90°/270° 추가)
+        'shelf'    - 기존 shelf packer (next-fit, hole_id 순서)
+    """
+
+    # 용지 크기 설정
+    page_width, page_height = get_page_size(paper_size)
+
+    print(f"\nPacking {len(pieces)} pieces onto {paper_size} pages ({page_width}x{page_height}mm)...")
+
+    if packer == 'shelf':
+        pages = pack_pieces_shelf(pieces, page_width, page_height)
+        print(f"Total pages required: {len(pages)}")
+        return pages
+
+    if packer == 'maxrects':
+        pages, skipped = pack_maxrects(pieces, page_width, page_height, PIECE_SPACING, allow_rotation)
+    elif packer == 'nest':
+        print(f"  True-shape nesting: {nest_resolution:g} mm grid, time budget {nest_time:g}s")
+        pages, skipped, stats = nest_pieces(pieces, page_width, page_height, PIECE_SPACING,
+                                            nest_resolution, allow_rotation, nest_time)
+        print(f"  Nested {stats['exact']} pieces by shape"
+              + (f", {stats['fallback']} by bounding box" if stats['fallback'] else "")
+              + f" in {stats['seconds']:.1f}s")
+    else:
+        raise ValueError(f"Unsupported packer: {packer}")
+
+    for piece in skipped:
+        print(f"Warning: Piece {piece.piece_id} is too large for a single page!")
+    # 페이지 안의 조각은 번호 순으로 (SVG / JSON 가독성)
+    for page in pages:
+        page.placed_pieces.sort(key=lambda p: p.sort_key)
     print(f"Total pages required: {len(pages)}")
 
+    # 용지 사용량 비교 (같은 조각 집합을 다른 packer로 배치한 페이지 수)
+    placed = [p for p in pieces if p not in skipped]
+    sheet_area = page_width * page_height
+    shape_area = sum(polygon_area(p.local_polygon(0)) for p in placed)
+    counts = {'shelf, next-fit': len(pack_pieces_shelf([_PieceSize(p) for p in placed], page_width, page_height,
+                                                        verbose=False))}
+    if packer == 'nest':
+        counts['maxrects, first-fit'] = len(pack_maxrects([_PieceSize(p) for p in placed], page_width, page_height,
+                                                           PIECE_SPACING, allow_rotation, progress_every=0)[0])
+    label = 'maxrects, first-fit' if packer == 'maxrects' else 'true-shape nesting'
+    counts[label] = len(pages)
+    rotated = sum(1 for p in placed if p.rotation)
+
+    print(f"  Sheet utilization (bounding boxes / hole shapes):")
+    for name, count in counts.items():
+        print(f"    {name + ':':<24}{count} pages, "
+              f"{sheet_utilization(placed, count, page_width, page_height) * 100:.1f}% / "
+              f"{shape_area / (count * sheet_area) * 100 if count else 0:.1f}%"
+              + (f" ({rotated} rotated)" if name == label and rotated else ""))
+
     return pages
 
 
-def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_size: str = 'A4'):
-    """레이저 커팅용 SVG 레이아웃 생성"""
+def pack_pieces_to_roll(pieces: List[SVGPiece], roll_width: float, packer: str = 'maxrects',
+                        allow_rotation: bool = False) -> list:
+    """롤(strip) 용지 배치: 폭 고정, 길이 최소화 → 긴 페이지 1장
 
-    if paper_size.upper() == 'A4':
-        page_width = A4_WIDTH + 20  # 여백 포함 전체 크기
-        page_height = A4_HEIGHT + 20
-        margin = 10
-    elif paper_size.upper() == 'A3':
-        page_width = A3_WIDTH + 20
-        page_height = A3_HEIGHT + 20
-        margin = 10
+    roll_width는 여백 포함 전체 폭 (mm). 사용 길이는 0.1mm 단위로 올림.
+    packer='shelf'는 기존 shelf packer를 길이 제한 없이 사용 (비교용).
+    """
+    width = roll_width - 2 * PAGE_MARGIN
+    if width <= 0:
+        raise ValueError(f"Roll width must be larger than {2 * PAGE_MARGIN}mm")
+
+    print(f"\nPacking {len(pieces)} pieces onto a {roll_width:g}mm roll (usable width {width:g}mm)...")
+
+    def shelf_strip(items):
+        strip = BinPacker2D(width, float('inf'))
+        skipped = [p for p in items if not strip.add_piece(p)]
+        strip.height = sum(shelf['height'] for shelf in strip.shelves)
+        return strip, skipped
+
+    if packer == 'shelf':
+        strip, skipped = shelf_strip(pieces)
+    elif packer == 'maxrects':
+        strip, skipped = pack_strip(pieces, width, PIECE_SPACING, allow_rotation)
     else:
-        raise ValueError(f"Unsupported paper size: {paper_size}")
+        raise ValueError(f"Roll mode supports the maxrects and shelf packers, not {packer}")
+
+    for piece in skipped:
+        print(f"Warning: Piece {piece.piece_id} is wider than the roll!")
+    for piece in strip.placed_pieces:
+        piece.page_number = 1
+    strip.placed_pieces.sort(key=lambda p: p.sort_key)
+    strip.height = math.ceil(strip.height * 10) / 10
+
+    # 사용 길이 비교
+    placed = [p for p in pieces if p not in skipped]
+    lengths = {'shelf, next-fit': shelf_strip([_PieceSize(p) for p in placed])[0].height}
+    if packer == 'maxrects':
+        lengths['maxrects, bottom-left'] = strip.height
+    area = sum(p.width * p.height for p in placed)
+    print(f"Roll length required: {strip.height + 2 * PAGE_MARGIN:.1f}mm (including {PAGE_MARGIN}mm margins)")
+    print(f"  Roll usage (length / bounding-box utilization):")
+    for name, length in lengths.items():
+        print(f"    {name + ':':<24}{length:.1f}mm, {area / (width * length) * 100 if length else 0:.1f}%")
+
+    return [strip]
+
+
+def create_cutting_layout_svg(pages: list, output_dir: str, paper_size: str = 'A4',
+                              svgz: bool = False, indent: bool = True):
+    """레이저 커팅용 SVG 레이아웃 생성 (svgz: gzip 압축 .svgz, indent: 들여쓰기)"""
+    ext = 'svgz' if svgz else 'svg'
+
+    margin = PAGE_MARGIN
 
     os.makedirs(output_dir, exist_ok=True)
 
@@ -254,6 +563,14 @@ def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_s
     layout_info = []
 
     for page_num, page in enumerate(pages, 1):
+        # 여백 포함 전체 크기 (롤 모드는 페이지마다 사용 길이가 다름)
+        page_width = page.width + 2 * margin
+        page_height = page.height + 2 * margin
+        # 종이 종류별로 나눠 배치한 경우 (--paper-types)
+        paper_type = getattr(page, 'paper_type', None)
+        # remnant 재고를 사용한 경우 용지 이름 (--remnants)
+        sheet_label = getattr(page, 'sheet_label', None)
+
         # SVG 파일 생성
         svg = ET.Element('svg', {
             'xmlns': 'http://www.w3.org/2000/svg',
@@ -267,6 +584,11 @@ def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_s
         ET.SubElement(metadata, 'page_number').text = str(page_num)
         ET.SubElement(metadata, 'total_pages').text = str(len(pages))
         ET.SubElement(metadata, 'paper_size').text = paper_size
+        if paper_type:
+            ET.SubElement(metadata, 'paper_type').text = paper_type
+        if sheet_label:
+            ET.SubElement(metadata, 'sheet').text = sheet_label
+            ET.SubElement(metadata, 'remnant').text = str(page.remnant).lower()
         ET.SubElement(metadata, 'piece_count').text = str(len(page.placed_pieces))
 
         # 용지 경계 표시 (레이저 커터에서는 무시됨, 시각화용)
@@ -290,47 +612,45 @@ def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_s
             'fill': '#999999'
         })
         page_info.text = f'Page {page_num}/{len(pages)} - {paper_size} - {len(page.placed_pieces)} pieces'
+        if paper_type:
+            page_info.text += f' - {paper_type}'
+        if sheet_label:
+            page_info.text += f' - {"remnant " if page.remnant else ""}sheet {sheet_label}'
 
         # 각 조각 배치
         page_layout_info = {
             'page': page_num,
             'pieces': []
         }
+        if paper_type:
+            page_layout_info['paper_type'] = paper_type
+        if sheet_label:
+            page_layout_info['sheet'] = sheet_label
+            page_layout_info['remnant'] = page.remnant
 
         for piece in page.placed_pieces:
             # 조각 그룹 생성
-            piece_group = ET.SubElement(svg, 'g', {
+            group_attrs = {
                 'id': f'piece_{piece.hole_id}',
                 'data-hole-id': str(piece.hole_id),
                 'data-original-pos': piece.original_position
-            })
+            }
+            if piece.document:
+                group_attrs['id'] = f'piece_{piece.doc_index}_{piece.hole_id}'
+                group_attrs['data-document'] = piece.document
+            piece_group = ET.SubElement(svg, 'g', group_attrs)
 
             # 조각 위치 (여백 고려)
             x_offset = margin + piece.placed_x
             y_offset = margin + piece.placed_y
+            placed_w, placed_h = piece.placed_size()
 
             # 원본 SVG의 path를 복사하되, 위치 조정
-            if piece.path_element is not None:
-                path_d = piece.path_element.get('d', '')
-
-                # ViewBox에서 원본 좌표 범위 추출
-                vb_x, vb_y, vb_w, vb_h = 0, 0, piece.width, piece.height
-
-                if piece.viewBox:
-                    vb_parts = piece.viewBox.split()
-                    if len(vb_parts) == 4:
-                        vb_x = float(vb_parts[0])
-                        vb_y = float(vb_parts[1])
-                        vb_w = float(vb_parts[2])
-                        vb_h = float(vb_parts[3])
-
-                # 스케일 계산 (viewBox 크기 -> 물리적 크기)
-                # piece.scale 팩터 적용하여 확대/축소
-                scale_x = (piece.width / vb_w * piece.scale) if vb_w > 0 else piece.scale
-                scale_y = (piece.height / vb_h * piece.scale) if vb_h > 0 else piece.scale
+            if piece.path_d is not None:
+                path_d = piece.path_d
 
                 # Transform 설정: 원본 좌표를 페이지 좌표로 변환 + 스케일 적용
-                transform = f'translate({x_offset}, {y_offset}) scale({scale_x}, {scale_y}) translate({-vb_x}, {-vb_y})'
+                transform = piece.svg_transform(margin)
 
                 piece_path = ET.SubElement(piece_group, 'path', {
                     'd': path_d,
@@ -342,8 +662,8 @@ def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_s
                 })
 
             # 번호 표시 (조각 중앙) - 작은 조각도 보이도록 크기 줄임
-            text_x = x_offset + piece.width / 2
-            text_y = y_offset + piece.height / 2
+            text_x = x_offset + placed_w / 2
+            text_y = y_offset + placed_h / 2
 
             # 번호 크기를 조각 크기에 맞춰 조정 (최소 0.8mm, 최대 2.0mm)
             number_font_size = min(2.0, max(0.8, min(piece.width, piece.height) / 3))
@@ -370,26 +690,37 @@ def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_s
                 'fill': 'red',
                 'class': 'number-text'  # 레이저 커터용에서 제거 가능
             })
-            number_text.text = str(piece.hole_id)
+            number_text.text = piece.label
 
             # 레이아웃 정보 저장
-            page_layout_info['pieces'].append({
+            piece_info = {
                 'hole_id': piece.hole_id,
                 'position_on_page': f'{x_offset:.2f}, {y_offset:.2f}',
                 'size': f'{piece.width:.2f}x{piece.height:.2f}mm',
                 'original_position': piece.original_position,
                 'bbox': piece.bbox
-            })
+            }
+            if piece.rotation:
+                piece_info['rotation'] = piece.rotation
+            if piece.document:
+                piece_info['piece_id'] = piece.piece_id
+                piece_info['label'] = piece.label
+                piece_info['document'] = piece.document
+                piece_info['source'] = piece.file_path
+            if sheet_label:
+                piece_info['sheet'] = sheet_label
+            page_layout_info['pieces'].append(piece_info)
 
         layout_info.append(page_layout_info)
 
         # 1. 가이드용 SVG 저장 (번호 포함)
-        svg_guide_filename = f'cutting_layout_page_{page_num:02d}_with_numbers.svg'
+        svg_guide_filename = f'cutting_layout_page_{page_num:02d}_with_numbers.{ext}'
         svg_guide_path = os.path.join(output_dir, svg_guide_filename)
 
         tree = ET.ElementTree(svg)
-        ET.indent(tree, space='  ')
-        tree.write(svg_guide_path, encoding='utf-8', xml_declaration=True)
+        if indent:
+            ET.indent(tree, space='  ')
+        write_svg_tree(tree, svg_guide_path)
 
         print(f"  Created: {svg_guide_filename} ({len(page.placed_pieces)} pieces, with numbers)")
 
@@ -406,6 +737,10 @@ def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_s
         ET.SubElement(metadata_laser, 'page_number').text = str(page_num)
         ET.SubElement(metadata_laser, 'total_pages').text = str(len(pages))
         ET.SubElement(metadata_laser, 'paper_size').text = paper_size
+        if paper_type:
+            ET.SubElement(metadata_laser, 'paper_type').text = paper_type
+        if sheet_label:
+            ET.SubElement(metadata_laser, 'sheet').text = sheet_label
         ET.SubElement(metadata_laser, 'piece_count').text = str(len(page.placed_pieces))
 
         # path 요소만 복사 (번호 없이)
@@ -417,12 +752,13 @@ def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_s
                 ET.SubElement(piece_group_laser, 'path', path.attrib)
 
         # 레이저용 SVG 저장
-        svg_laser_filename = f'cutting_layout_page_{page_num:02d}_for_laser.svg'
+        svg_laser_filename = f'cutting_layout_page_{page_num:02d}_for_laser.{ext}'
         svg_laser_path = os.path.join(output_dir, svg_laser_filename)
 
         tree_laser = ET.ElementTree(svg_laser)
-        ET.indent(tree_laser, space='  ')
-        tree_laser.write(svg_laser_path, encoding='utf-8', xml_declaration=True)
+        if indent:
+            ET.indent(tree_laser, space='  ')
+        write_svg_tree(tree_laser, svg_laser_path)
 
         print(f"  Created: {svg_laser_filename} (for laser cutter, no numbers)")
 
@@ -436,11 +772,49 @@ def create_cutting_layout_svg(pages: List[BinPacker2D], output_dir: str, paper_s
     return layout_info
 
 
+def export_cut_files(pages: list, output_dir: str, **options):
+    """페이지별 DXF/G-code 저장 (cut_export.export_cut_jobs, 좌표는 여백 포함 용지 기준)"""
+    sheets = []
+    for page in pages:
+        sheet_size = (page.width + 2 * PAGE_MARGIN, page.height + 2 * PAGE_MARGIN)
+        pieces = [piece for piece in page.placed_pieces if piece.path_d]
+        sheets.append((sheet_size, [piece.page_polygon() for piece in pieces],
+                       [piece.piece_id for piece in pieces]))
+    return export_cut_jobs(sheets, output_dir, **options)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Generate laser cutting layout from individual SVG pieces')
-    parser.add_argument('--svg-dir', required=True, help='Directory containing individual SVG files')
+    parser.add_argument('--svg-dir', required=True, nargs='+',
+                        help='Directory containing individual SVG files; several (optionally NAME=DIR) to nest documents together')
+    parser.add_argument('--paper-types', type=str,
+                        help='JSON mapping document name or "document:hole_id" to paper type; each type gets its own sheets')
+    parser.add_argument('--remnants', nargs='?', const=INVENTORY_FILENAME,
+                        help=f'Remnant inventory (SQLite): fill leftover areas of earlier sheets first, then save this job\'s leftovers '
+                             f'(default file: {INVENTORY_FILENAME})')
+    parser.add_argument('--no-remnant-update', action='store_true', help='Use the remnant inventory without saving changes')
     parser.add_argument('--output-dir', default='cutting_layout', help='Output directory for layout files')
-    parser.add_argument('--paper-size', default='A4', choices=['A4', 'A3'], help='Paper size (default: A4)')
+    parser.add_argument('--paper-size', default='A4', help='Paper size: A4, A3 or WIDTHxHEIGHT in mm, e.g. 600x900 (default: A4)')
+    parser.add_argument('--roll-width', type=float, help='Pack onto a roll of this width in mm (one long page of minimal length)')
+    parser.add_argument('--svg-compact', action='store_true', help='Compact path encoding (relative m/l/h/v) and no indentation')
+    parser.add_argument('--svgz', action='store_true', help='Write layout pages gzip-compressed (.svgz)')
+    parser.add_argument('--packer', default='maxrects', choices=['maxrects', 'nest', 'shelf'],
+                        help='Packing algorithm: maxrects (first-fit decreasing over all pages), nest (true hole shapes) '
+                             'or shelf (previous next-fit) (default: maxrects)')
+    parser.add_argument('--rotate', action='store_true', help='Allow 90° rotation of pieces (mind the paper grain)')
+    parser.add_argument('--nest-resolution', type=float, default=NEST_RESOLUTION,
+                        help=f'Grid size in mm for --packer nest (default: {NEST_RESOLUTION})')
+    parser.add_argument('--nest-time', type=float, default=NEST_TIME_BUDGET,
+                        help=f'Time budget in seconds for --packer nest; remaining pieces use bounding boxes (default: {NEST_TIME_BUDGET:g})')
+
+    # 커터 출력 옵션
+    parser.add_argument('--dxf', action='store_true', help='Also write one DXF (R12, mm) per page in cut order')
+    parser.add_argument('--gcode', action='store_true', help='Also write one G-code file per page in cut order')
+    parser.add_argument('--no-cut-order', action='store_true', help='Cut in placement order (skip nearest-neighbour + 2-opt)')
+    parser.add_argument('--cut-speed', type=float, default=CUT_SPEED, help=f'Cutting speed in mm/s for G-code and time estimate (default: {CUT_SPEED})')
+    parser.add_argument('--travel-speed', type=float, default=TRAVEL_SPEED, help=f'Head travel speed in mm/s (default: {TRAVEL_SPEED})')
+    parser.add_argument('--pierce-time', type=float, default=PIERCE_TIME, help=f'Seconds per contour start for time estimate (default: {PIERCE_TIME})')
+    parser.add_argument('--laser-power', type=int, default=LASER_POWER, help=f'G-code spindle/laser S value (default: {LASER_POWER})')
 
     # 스케일 옵션
     parser.add_argument('--scale', type=float, default=1.0, help='Global scale factor for all pieces (default: 1.0)')
@@ -448,13 +822,23 @@ def main():
 
     args = parser.parse_args()
 
+    if args.roll_width and args.packer == 'nest':
+        parser.error('--roll-width supports --packer maxrects or shelf')
+    if args.remnants and (args.roll_width or args.packer != 'maxrects'):
+        parser.error('--remnants works with sheets and --packer maxrects')
+    if not args.roll_width:
+        try:
+            get_page_size(args.paper_size)
+        except ValueError as e:
+            parser.error(str(e))
+
     print("=" * 60)
     print("Laser Cutting Layout Generator")
     print("문화재 복원용 레이저 커팅 레이아웃 자동 생성")
     print("=" * 60)
 
-    # 1. SVG 조각 로드
-    pieces = load_svg_pieces(args.svg_dir)
+    # 1. SVG 조각 로드 (여러 문서면 ID를 문서별로 구분)
+    pieces = load_document_pieces(args.svg_dir, compact=args.svg_compact)
 
     if len(pieces) == 0:
         print("Error: No SVG pieces found!")
@@ -479,8 +863,8 @@ def main():
 
         individual_count = 0
         for piece in pieces:
-            # 개별 스케일이 정의되어 있으면 우선 사용
-            piece_id_str = str(piece.hole_id)
+            # 개별 스케일이 정의되어 있으면 우선 사용 (여러 문서면 '문서:hole_id' 키)
+            piece_id_str = piece.piece_id
             if piece_id_str in individual_scales:
                 scale_factor = float(individual_scales[piece_id_str])
                 piece.apply_scale(scale_factor)
@@ -503,11 +887,101 @@ def main():
     print(f"  Largest piece: {max(pieces, key=lambda p: p.width * p.height)}")
     print(f"  Smallest piece: {min(pieces, key=lambda p: p.width * p.height)}")
 
-    # 2. 페이지에 배치
-    pages = pack_pieces_to_pages(pieces, args.paper_size)
+    # 종이 종류 지정
+    paper_types = {}
+    if args.paper_types:
+        with open(args.paper_types, 'r', encoding='utf-8') as f:
+            paper_types = {str(k): str(v) for k, v in json.load(f).items()}
+    groups = group_by_paper_type(pieces, paper_types)
+    if paper_types:
+        print(f"\nPaper types: " + ", ".join(f"{name} ({len(group)} pieces)" for name, group in groups.items()))
+
+    # remnant 재고
+    inventory = None
+    if args.remnants:
+        inventory = RemnantInventory(args.remnants)
+        sheets, rects = inventory.summary()
+        print(f"\nRemnant inventory: {args.remnants} ({sheets} sheets, {rects} free areas)")
+
+    # 2. 페이지에 배치 (종이 종류마다 따로, remnant가 있으면 먼저)
+    paper_label = f'roll {args.roll_width:g}mm' if args.roll_width else args.paper_size
+    pages = []
+    for paper_type, group in groups.items():
+        if paper_types:
+            print(f"\n--- Paper type: {paper_type} ---")
+
+        remnant_pages = []
+        if inventory is not None:
+            remnant_pages, group = pack_into_remnants(group, inventory, paper_type, PIECE_SPACING, args.rotate)
+            for page in remnant_pages:
+                page.placed_pieces.sort(key=lambda p: p.sort_key)
+                page.remnant = True
+                page.sheet_label = inventory.label(page.sheet_id)
+            placed = sum(len(page.placed_pieces) for page in remnant_pages)
+            print(f"\nPlaced {placed} pieces on {len(remnant_pages)} remnant sheet(s), {len(group)} pieces left")
+
+        if args.roll_width:
+            group_pages = pack_pieces_to_roll(group, args.roll_width, packer=args.packer, allow_rotation=args.rotate)
+        elif group or inventory is None:
+            group_pages = pack_pieces_to_pages(group, args.paper_size, packer=args.packer, allow_rotation=args.rotate,
+                                               nest_resolution=args.nest_resolution, nest_time=args.nest_time)
+        else:
+            group_pages = []
+
+        # 새 용지의 남은 영역을 재고에 등록 (--no-remnant-update면 번호 없이 'new')
+        if inventory is not None:
+            for page in group_pages:
+                sheet_id = None
+                if not args.no_remnant_update:
+                    sheet_id = inventory.add_sheet(page.width, page.height, paper_type, page.free,
+                                                   source=os.path.abspath(args.output_dir))
+                page.remnant = False
+                page.sheet_label = inventory.label(sheet_id) if sheet_id else 'new'
+
+        for page in remnant_pages + group_pages:
+            page.paper_type = paper_type if paper_types else None
+        pages.extend(remnant_pages + group_pages)
+
+    # 페이지 번호는 전체 기준
+    for page_number, page in enumerate(pages, 1):
+        for piece in page.placed_pieces:
+            piece.page_number = page_number
+
+    if len(args.svg_dir) > 1:
+        print(f"\nBatch layout: {len(pieces)} pieces from {len(args.svg_dir)} documents on {len(pages)} shared page(s)")
+
+    if inventory is not None:
+        print("\nSheet assignment:")
+        for page_number, page in enumerate(pages, 1):
+            if page.remnant:
+                where = f"remnant sheet {page.sheet_label}"
+            elif page.sheet_label != 'new':
+                where = f"new sheet, leftover saved as {page.sheet_label}"
+            elif args.no_remnant_update:
+                where = "new sheet (leftover not saved)"
+            else:
+                where = "new sheet (no usable leftover)"
+            print(f"  Page {page_number}: {where} - {len(page.placed_pieces)} pieces")
+
+        if args.no_remnant_update:
+            inventory.rollback()
+            print("  Remnant inventory not updated (--no-remnant-update)")
+        else:
+            inventory.commit()
+            sheets, rects = inventory.summary()
+            print(f"  Remnant inventory updated: {sheets} sheets, {rects} free areas")
+        inventory.close()
 
     # 3. SVG 레이아웃 생성
-    layout_info = create_cutting_layout_svg(pages, args.output_dir, args.paper_size)
+    layout_info = create_cutting_layout_svg(pages, args.output_dir, paper_label,
+                                            svgz=args.svgz, indent=not args.svg_compact)
+
+    # 4. DXF / G-code
+    if args.dxf or args.gcode:
+        export_cut_files(pages, args.output_dir,
+                         dxf=args.dxf, gcode=args.gcode, optimize=not args.no_cut_order,
+                         cut_speed=args.cut_speed, travel_speed=args.travel_speed,
+                         pierce_time=args.pierce_time, power=args.laser_power)
 
     print("\n" + "=" * 60)
     print("Layout generation completed!")
@@ -19,7 +19,9 @@ import csv
 import numpy as np
 import cv2
 from typing import List, Dict, Tuple
-import re
+
+from hole_geometry import load_geometry, svg_hole_id
+from svg_writer import decode_path, parse_svg
 
 
 def load_image(image_path: str) -> np.ndarray:
@@ -38,9 +40,14 @@ def load_image(image_path: str) -> np.ndarray:
 
 def parse_combined_svg(svg_path: str) -> List[Dict]:
     """통합 SVG 파일에서 구멍 정보 추출"""
+    # 개별 SVG가 아닌 통합 SVG일 때만 sidecar 사용 (sidecar = 전체 구멍)
+    geometry = load_geometry(svg_path) if svg_hole_id(svg_path) is None else None
+    if geometry is not None:
+        return combined_holes_from_geometry(geometry)
+
     print(f"Parsing SVG: {svg_path}")
 
-    tree = ET.parse(svg_path)
+    tree = parse_svg(svg_path)
     root = tree.getroot()
 
     # 네임스페이스 처리
@@ -67,21 +74,8 @@ def parse_combined_svg(svg_path: str) -> List[Dict]:
         if not d:
             continue
 
-        # path 좌표 파싱
-        coords = []
-        parts = d.replace(',', ' ').split()
-        i = 0
-        while i < len(parts):
-            if parts[i] in ['M', 'L', 'Z']:
-                i += 1
-            else:
-                try:
-                    x = float(parts[i])
-                    y = float(parts[i + 1])
-                    coords.append((x, y))
-                    i += 2
-                except (ValueError, IndexError):
-                    i += 1
+        # path 좌표 파싱 (절대/상대 명령 모두)
+        coords = decode_path(d)
 
         if not coords:
             continue
@@ -109,8 +103,43 @@ def parse_combined_svg(svg_path: str) -> List[Dict]:
     return holes
 
 
+def combined_holes_from_geometry(geometry) -> List[Dict]:
+    """sidecar에서 parse_combined_svg와 같은 구멍 정보 (path 좌표 범위 기준 bbox)"""
+    holes = []
+    for i, (x_min, y_min, x_max, y_max) in enumerate(geometry.path_extents().tolist()):
+        holes.append({
+            'hole_id': int(geometry.records[i]['id']),
+            'bbox': (int(x_min), int(y_min), int(x_max - x_min), int(y_max - y_min)),
+            'center': (int((x_min + x_max) / 2), int((y_min + y_max) / 2)),
+            'area': float((x_max - x_min) * (y_max - y_min))
+        })
+
+    print(f"  Found {len(holes)} holes")
+
+    return holes
+
+
 def parse_individual_svgs(svg_dir: str) -> List[Dict]:
     """개별 SVG 파일들에서 구멍 정보 추출 (path 데이터 포함)"""
+    geometry = load_geometry(svg_dir)
+    indices = geometry.indices_for_svg_dir(svg_dir) if geometry is not None else None
+    if indices is not None:
+        holes = []
+        for i in indices:
+            x, y, w, h = geometry.bbox(i)
+            holes.append({
+                'hole_id': int(geometry.records[i]['id']),
+                'bbox': (x, y, w, h),
+                'center': (x + w // 2, y + h // 2),
+                'area': w * h,
+                'points': geometry.path_points(i),  # path 다각형 (곡선이 없으면 memmap view)
+                'svg_file': os.path.join(svg_dir, geometry.svg_filename(i))
+            })
+        print(f"  Loaded {len(holes)} holes")
+        return holes
+    if geometry is not None:
+        print("Warning: Geometry sidecar does not match SVG files, parsing SVGs instead")
+
     print(f"Loading individual SVG files from: {svg_dir}")
 
     holes = []
@@ -181,23 +210,8 @@ def parse_individual_svgs(svg_dir: str) -> List[Dict]:
 
 
 def parse_svg_path(path_data: str) -> List[Tuple[float, float]]:
-    """SVG path 데이터를 좌표 리스트로 변환"""
-    coords = []
-
-    # 간단한 path 파싱 (M, L 명령어만)
-    commands = re.findall(r'([MLZ])\s*([\d\.,\s-]+)', path_data)
-
-    for cmd, params in commands:
-        if cmd in ['M', 'L']:
-            # 좌표 추출
-            nums = re.findall(r'[-\d.]+', params)
-            for i in range(0, len(nums), 2):
-                if i + 1 < len(nums):
-                    x = float(nums[i])
-                    y = float(nums[i + 1])
-                    coords.append((x, y))
-
-    return coords
+    """SVG path 데이터를 좌표 리스트로 변환 (M/L/H/V/Z, 상대 명령 포함)"""
+    return decode_path(path_data)
 
 
 def render_svg_piece(image: np.ndarray, hole: Dict, color: Tuple[int, int, int],
@@ -205,16 +219,19 @@ def render_svg_piece(image: np.ndarray, hole: Dict, color: Tuple[int, int, int],
     """SVG 조각을 이미지에 렌더링"""
     result = image.copy()
 
-    if 'path_data' not in hole or not hole['path_data']:
+    if 'points' in hole:
+        # sidecar 좌표 (파싱 불필요)
+        coords = hole['points']
+    elif 'path_data' not in hole or not hole['path_data']:
         # path 데이터가 없으면 bbox만 그리기
         x, y, w, h = hole['bbox']
         cv2.rectangle(result, (x, y), (x + w, y + h), color, thickness)
         return result
+    else:
+        # SVG path 파싱
+        coords = parse_svg_path(hole['path_data'])
 
-    # SVG path 파싱
-    coords = parse_svg_path(hole['path_data'])
-
-    if not coords:
+    if len(coords) == 0:
         return result
 
     # 스케일 적용
@@ -0,0 +1,243 @@
+"""
+Cut Job Export
+배치된 조각 윤곽을 레이저 커터용 DXF / G-code로 바로 저장
+
+- 커팅 순서 최적화: 조각 진입점에 대한 nearest-neighbour 경로 + 2-opt 개선,
+  이후 조각마다 직전 위치에 가장 가까운 꼭짓점을 진입점으로 선택
+- 최적화 전(배치 순서) / 후의 절단 길이, 이동 길이, 예상 작업 시간 보고
+
+좌표: 입력은 페이지 좌표 (mm, 왼쪽 위 원점, y 아래 방향).
+DXF / G-code는 기계 좌표 (왼쪽 아래 원점, y 위 방향)로 뒤집어서 저장.
+"""
+
+import csv
+import os
+
+import numpy as np
+
+# 작업 시간 추정 기본값
+CUT_SPEED = 20.0       # mm/s (절단)
+TRAVEL_SPEED = 200.0   # mm/s (헤드 이동, 레이저 off)
+PIERCE_TIME = 0.05     # s (윤곽마다 점화 시간)
+LASER_POWER = 1000     # G-code S 값
+
+# 2-opt 반복 상한 (개선이 없으면 먼저 종료)
+TWO_OPT_PASSES = 50
+
+
+def polygon_length(polygon):
+    """닫힌 윤곽 둘레 (mm)"""
+    if len(polygon) < 2:
+        return 0.0
+    return float(np.hypot(*(np.roll(polygon, -1, axis=0) - polygon).T).sum())
+
+
+def nearest_neighbour_order(points, start=(0.0, 0.0)):
+    """start에서 시작해 가장 가까운 점을 차례로 방문하는 순서"""
+    n = len(points)
+    order = []
+    visited = np.zeros(n, dtype=bool)
+    current = np.asarray(start, dtype=np.float64)
+    for _ in range(n):
+        dist = np.hypot(*(points - current).T)
+        dist[visited] = np.inf
+        k = int(np.argmin(dist))
+        order.append(k)
+        visited[k] = True
+        current = points[k]
+    return order
+
+
+def two_opt(points, order, start=(0.0, 0.0), passes=TWO_OPT_PASSES):
+    """열린 경로 (start → order...) 2-opt 개선
+
+    각 i에 대해 모든 j의 구간 뒤집기 이득을 numpy로 한 번에 계산하고 가장 큰 것을 적용.
+    """
+    if len(order) < 3:
+        return list(order)
+    route = np.vstack([np.asarray(start, dtype=np.float64)[None], points[order]])
+    order = np.asarray(order)
+    n = len(route)
+
+    for _ in range(passes):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            c = route[i + 1:]
+            d = np.vstack([route[i + 2:], np.full((1, 2), np.nan)])
+            old = np.hypot(*(b - a)) + np.nan_to_num(np.hypot(*(d - c).T))
+            new = np.hypot(*(c - a).T) + np.nan_to_num(np.hypot(*(d - b).T))
+            gain = old - new
+            j = int(np.argmax(gain))
+            if gain[j] > 1e-9:
+                j += i + 1
+                route[i:j + 1] = route[i:j + 1][::-1].copy()
+                order[i - 1:j] = order[i - 1:j][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return order.tolist()
+
+
+def rotate_to_nearest(polygon, position):
+    """닫힌 윤곽을 position에 가장 가까운 꼭짓점부터 시작하도록 회전"""
+    k = int(np.argmin(np.hypot(*(polygon - position).T)))
+    return np.roll(polygon, -k, axis=0)
+
+
+def plan_cuts(polygons, optimize=True, start=(0.0, 0.0)):
+    """커팅 순서 결정
+
+    Args:
+        polygons: 페이지 좌표 윤곽 리스트 [(k, 2) mm, ...] (배치 순서)
+        optimize: False면 배치 순서 + 첫 꼭짓점 진입 (기존 동작)
+
+    Returns:
+        [(polygon index, 진입점부터 시작하는 윤곽), ...]
+    """
+    if not optimize:
+        return [(i, polygon) for i, polygon in enumerate(polygons)]
+    if not polygons:
+        return []
+
+    entries = np.array([polygon[0] for polygon in polygons], dtype=np.float64)
+    order = two_opt(entries, nearest_neighbour_order(entries, start), start)
+
+    plan = []
+    position = np.asarray(start, dtype=np.float64)
+    for i in order:
+        polygon = rotate_to_nearest(polygons[i], position)
+        plan.append((i, polygon))
+        position = polygon[0]
+    return plan
+
+
+def job_stats(plan, start=(0.0, 0.0), cut_speed=CUT_SPEED, travel_speed=TRAVEL_SPEED,
+              pierce_time=PIERCE_TIME):
+    """(cut_mm, travel_mm, time_s) - 원점 출발, 마지막 윤곽 후 원점 복귀 포함"""
+    cut = travel = 0.0
+    position = np.asarray(start, dtype=np.float64)
+    for _, polygon in plan:
+        travel += float(np.hypot(*(polygon[0] - position)))
+        cut += polygon_length(polygon)
+        position = polygon[0]
+    travel += float(np.hypot(*(position - np.asarray(start, dtype=np.float64))))
+    job_time = cut / cut_speed + travel / travel_speed + pierce_time * len(plan)
+    return cut, travel, job_time
+
+
+def _machine_coords(polygon, sheet_height):
+    """페이지 좌표 → 기계 좌표 (y 뒤집기)"""
+    return np.column_stack([polygon[:, 0], sheet_height - polygon[:, 1]])
+
+
+def write_dxf(path, plan, sheet_size, labels=None):
+    """DXF R12 (POLYLINE/VERTEX, 닫힌 윤곽, 단위 mm) - 커팅 순서대로 entity 기록
+
+    labels: 윤곽마다 layer 이름 대신 쓸 handle 주석 (조각 id 추적용)
+    """
+    sheet_w, sheet_h = sheet_size
+    lines = ['0', 'SECTION', '2', 'HEADER',
+             '9', '$ACADVER', '1', 'AC1009',
+             '9', '$INSUNITS', '70', '4',
+             '9', '$EXTMIN', '10', '0.0', '20', '0.0',
+             '9', '$EXTMAX', '10', f'{sheet_w:.3f}', '20', f'{sheet_h:.3f}',
+             '0', 'ENDSEC',
+             '0', 'SECTION', '2', 'ENTITIES']
+    for k, (i, polygon) in enumerate(plan):
+        coords = _machine_coords(polygon, sheet_h)
+        lines += ['999', f'cut {k + 1}' + (f' piece {labels[i]}' if labels else ''),
+                  '0', 'POLYLINE', '8', 'CUT', '66', '1', '70', '1',
+                  '10', '0.0', '20', '0.0', '30', '0.0']
+        for x, y in coords:
+            lines += ['0', 'VERTEX', '8', 'CUT', '10', f'{x:.3f}', '20', f'{y:.3f}', '30', '0.0']
+        lines += ['0', 'SEQEND', '8', 'CUT']
+    lines += ['0', 'ENDSEC', '0', 'EOF']
+
+    with open(path, 'w', encoding='ascii', newline='\r\n') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def write_gcode(path, plan, sheet_size, labels=None, cut_speed=CUT_SPEED,
+                travel_speed=TRAVEL_SPEED, power=LASER_POWER):
+    """레이저용 G-code (G21 mm, G90 절대 좌표, M3/M5 레이저 on/off, F는 mm/min)"""
+    sheet_h = sheet_size[1]
+    cut_feed = cut_speed * 60
+    travel_feed = travel_speed * 60
+    lines = ['; laser cutting job', f'; sheet {sheet_size[0]:.1f}x{sheet_h:.1f}mm, {len(plan)} contours',
+             'G21', 'G90', 'M5']
+    for k, (i, polygon) in enumerate(plan):
+        coords = _machine_coords(polygon, sheet_h)
+        lines.append(f'; cut {k + 1}' + (f' piece {labels[i]}' if labels else ''))
+        lines.append(f'G0 X{coords[0, 0]:.3f} Y{coords[0, 1]:.3f} F{travel_feed:.0f}')
+        lines.append(f'M3 S{power}')
+        lines.append(f'G1 F{cut_feed:.0f}')
+        lines.extend(f'G1 X{x:.3f} Y{y:.3f}' for x, y in coords[1:])
+        lines.append(f'G1 X{coords[0, 0]:.3f} Y{coords[0, 1]:.3f}')
+        lines.append('M5')
+    lines += ['G0 X0 Y0', 'M2']
+
+    with open(path, 'w', encoding='ascii') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def export_cut_jobs(sheets, output_dir, dxf=True, gcode=False, optimize=True,
+                    cut_speed=CUT_SPEED, travel_speed=TRAVEL_SPEED, pierce_time=PIERCE_TIME,
+                    power=LASER_POWER, prefix='cutting_layout_page'):
+    """시트마다 DXF/G-code 저장 + cut_job_report.csv
+
+    Args:
+        sheets: [(sheet_size (w, h) mm, polygons, labels), ...]
+
+    Returns:
+        시트별 보고 dict 리스트
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    report = []
+
+    print(f"\nExporting cut jobs ({'DXF' if dxf else ''}{' + ' if dxf and gcode else ''}{'G-code' if gcode else ''}, "
+          f"cut order {'optimized' if optimize else 'as placed'})...")
+
+    for sheet_num, (sheet_size, polygons, labels) in enumerate(sheets, 1):
+        speeds = dict(cut_speed=cut_speed, travel_speed=travel_speed, pierce_time=pierce_time)
+        before = job_stats(plan_cuts(polygons, optimize=False), **speeds)
+        plan = plan_cuts(polygons, optimize=optimize)
+        after = job_stats(plan, **speeds)
+
+        base = os.path.join(output_dir, f'{prefix}_{sheet_num:02d}')
+        if dxf:
+            write_dxf(base + '.dxf', plan, sheet_size, labels)
+        if gcode:
+            write_gcode(base + '.gcode', plan, sheet_size, labels, cut_speed, travel_speed, power)
+
+        report.append({
+            'sheet': sheet_num,
+            'contours': len(plan),
+            'cut_mm': round(after[0], 1),
+            'travel_before_mm': round(before[1], 1),
+            'travel_after_mm': round(after[1], 1),
+            'time_before_s': round(before[2], 1),
+            'time_after_s': round(after[2], 1),
+        })
+
+    report_path = os.path.join(output_dir, 'cut_job_report.csv')
+    fields = ['sheet', 'contours', 'cut_mm', 'travel_before_mm', 'travel_after_mm', 'time_before_s', 'time_after_s']
+    with open(report_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(report)
+
+    cut = sum(r['cut_mm'] for r in report)
+    travel_before = sum(r['travel_before_mm'] for r in report)
+    travel_after = sum(r['travel_after_mm'] for r in report)
+    time_before = sum(r['time_before_s'] for r in report)
+    time_after = sum(r['time_after_s'] for r in report)
+    saved = (1 - travel_after / travel_before) * 100 if travel_before > 0 else 0
+
+    print(f"  Cut length: {cut:,.0f} mm")
+    print(f"  Travel: {travel_before:,.0f} → {travel_after:,.0f} mm ({saved:.1f}% less)")
+    print(f"  Estimated job time: {time_before / 60:.1f} → {time_after / 60:.1f} min "
+          f"(cut {cut_speed:g} mm/s, travel {travel_speed:g} mm/s, pierce {pierce_time:g} s)")
+    print(f"  Report: {report_path}")
+
+    return report
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""
+Mosaic Hole Extraction
+여러 장으로 나눠 스캔한 대형 문서(w_0001, w_0002, ...)를 하나의 모자이크 좌표계로 구멍 검출
+
+기능:
+- 인접 타일의 겹침 영역을 template matching으로 정합 (타일 strip만 사용)
+- 타일별로 구멍 검출 (전체 모자이크 이미지를 메모리에 만들지 않음, 프로세스 풀)
+- 겹침 영역 중앙의 seam으로 소유 영역을 나누고, seam을 가로지르는 구멍 조각을 하나의 polygon으로 병합
+- 모자이크 좌표 SVG 출력 → create_cutting_layout.py / create_restoration_guide.py가 온전한 조각으로 처리
+
+사용법:
+  python extract_mosaic_holes.py --inputs datasets/1첩/w_0001.tif datasets/1첩/w_0002.tif \\
+      --cols 2 --method lab_b --s-threshold 138 --crop-document --export-svg --svg-individual \\
+      --output-dir results/1첩_mosaic --write-mosaic
+
+  # 복원 가이드는 모자이크 이미지 기준
+  python create_restoration_guide.py --image results/1첩_mosaic/mosaic.png \\
+      --svg-dir results/1첩_mosaic/svg_vectors --output-dir results/1첩_mosaic/restoration_guide
+"""
+
+import os
+import io
+import sys
+import json
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from hole_crops import CROP_FORMATS
+from extract_whiteness_based import (
+    DEFAULT_LUT_CACHE_DIR,
+    HoleTable,
+    create_comparison,
+    detect_document_boundary,
+    detect_holes_with_params,
+    prepare_whiteness_lut,
+    save_holes,
+    scale_area_limits,
+    save_holes_svg,
+)
+
+
+# 정합 기본값
+MAX_OVERLAP_RATIO = 0.3     # 겹침 탐색 범위 (타일 폭/높이 대비)
+TEMPLATE_RATIO = 0.02       # template 폭 (최소 겹침 가정)
+ALIGN_MARGIN_RATIO = 0.1    # 세로(가로) 어긋남 허용 범위
+MIN_MATCH_SCORE = 0.5       # 이 점수 미만이면 겹침 없이 맞붙인 것으로 간주
+PREVIEW_MAX_SIDE = 4000     # 미리보기 모자이크 최대 크기
+
+
+def load_image(image_path, flags=cv2.IMREAD_COLOR):
+    """이미지 로드 (한글 경로 지원)"""
+    with open(image_path, 'rb') as f:
+        image_data = np.frombuffer(f.read(), np.uint8)
+    image = cv2.imdecode(image_data, flags)
+    if image is None:
+        raise ValueError(f"Cannot decode image: {image_path}")
+    return image
+
+
+class TileStrips:
+    """정합에 필요한 타일 가장자리 strip (grayscale, 전체 해상도)
+
+    right/bottom: 다음 타일의 template를 찾을 탐색 영역
+    left/top: 이전 타일에서 찾을 template (가로 방향 기준으로 전치해 저장)
+    """
+
+    def __init__(self, path, max_overlap=MAX_OVERLAP_RATIO, template_ratio=TEMPLATE_RATIO):
+        gray = load_image(path, cv2.IMREAD_GRAYSCALE)
+        self.path = path
+        self.height, self.width = gray.shape
+        h, w = gray.shape
+
+        sw = max(1, int(w * max_overlap))
+        sh = max(1, int(h * max_overlap))
+        tw = max(8, int(w * template_ratio))
+        th = max(8, int(h * template_ratio))
+
+        # 아래 방향은 전치해서 오른쪽 방향과 같은 코드로 처리
+        self.right = gray[:, w - sw:].copy()
+        self.bottom = gray[h - sh:, :].T.copy()
+        self.left = gray[:, :tw].copy()
+        self.top = gray[:th, :].T.copy()
+
+    @property
+    def shape(self):
+        return (self.height, self.width)
+
+
+def match_strip(search, template, search_offset, margin_ratio=ALIGN_MARGIN_RATIO, scale=4):
+    """탐색 strip에서 다음 타일의 가장자리 template 위치 찾기 (가로 방향 기준)
+
+    1/scale로 축소해 전체 탐색 → 전체 해상도에서 ±2*scale 범위 재탐색
+
+    Args:
+        search: 이전 타일의 오른쪽 strip (H_a x S)
+        template: 다음 타일의 왼쪽 strip (H_b x T)
+        search_offset: search strip의 이전 타일 내 x 시작 위치
+
+    Returns:
+        ((dx, dy), score): 다음 타일 원점의 이전 타일 기준 위치, 정규화 상관계수
+    """
+    hb = template.shape[0]
+    m = int(hb * margin_ratio)
+    templ = template[m:hb - m]
+    if templ.shape[0] > search.shape[0] or templ.shape[1] > search.shape[1]:
+        return None, 0.0
+
+    # coarse
+    small_search = cv2.resize(search, (max(1, search.shape[1] // scale), max(1, search.shape[0] // scale)),
+                              interpolation=cv2.INTER_AREA)
+    small_templ = cv2.resize(templ, (max(1, templ.shape[1] // scale), max(1, templ.shape[0] // scale)),
+                             interpolation=cv2.INTER_AREA)
+    result = cv2.matchTemplate(small_search, small_templ, cv2.TM_CCOEFF_NORMED)
+    _, score, _, (cx, cy) = cv2.minMaxLoc(result)
+    x, y = cx * scale, cy * scale
+
+    # refine (전체 해상도)
+    r = 2 * scale
+    x0, y0 = max(0, x - r), max(0, y - r)
+    x1 = min(search.shape[1], x + templ.shape[1] + r)
+    y1 = min(search.shape[0], y + templ.shape[0] + r)
+    window = search[y0:y1, x0:x1]
+    if window.shape[0] >= templ.shape[0] and window.shape[1] >= templ.shape[1]:
+        result = cv2.matchTemplate(window, templ, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (fx, fy) = cv2.minMaxLoc(result)
+        x, y = x0 + fx, y0 + fy
+
+    return (search_offset + x, y - m), float(score)
+
+
+def register_tiles(strips, cols, min_score=MIN_MATCH_SCORE):
+    """행 우선 격자 배치에서 인접 타일을 정합해 모자이크 좌표 계산
+
+    (r, c)는 c > 0이면 왼쪽 타일, c == 0이면 위쪽 타일 기준으로 위치 결정.
+    모든 가로/세로 인접 쌍을 정합해 seam 계산에 사용.
+
+    Returns:
+        (positions, pairs): 타일별 (x, y), 정합 결과 리스트
+    """
+    n = len(strips)
+    rows = (n + cols - 1) // cols
+
+    def grid(i):
+        return divmod(i, cols)
+
+    pairs = []
+    offsets = {}
+    for i in range(n):
+        r, c = grid(i)
+        for direction, j in (('right', i + 1 if c + 1 < cols else None),
+                             ('down', i + cols if r + 1 < rows else None)):
+            if j is None or j >= n:
+                continue
+            a, b = strips[i], strips[j]
+            if direction == 'right':
+                offset, score = match_strip(a.right, b.left, a.width - a.right.shape[1])
+                fallback = (a.width, 0)
+            else:
+                offset, score = match_strip(a.bottom, b.top, a.height - a.bottom.shape[1])
+                if offset is not None:
+                    offset = (offset[1], offset[0])  # 전치 복원
+                fallback = (0, a.height)
+
+            if offset is None or score < min_score:
+                print(f"  [WARNING] {os.path.basename(a.path)} → {os.path.basename(b.path)} ({direction}): "
+                      f"match score {score:.2f} < {min_score}, assuming no overlap")
+                offset = fallback
+
+            overlap = a.width - offset[0] if direction == 'right' else a.height - offset[1]
+            print(f"  {os.path.basename(a.path)} → {os.path.basename(b.path)} ({direction}): "
+                  f"offset=({offset[0]}, {offset[1]}), overlap={overlap}px, score={score:.3f}")
+
+            offsets[(i, j)] = offset
+            pairs.append({'from': i, 'to': j, 'direction': direction,
+                          'offset': [int(offset[0]), int(offset[1])],
+                          'overlap_px': int(overlap), 'score': round(score, 4)})
+
+    positions = [None] * n
+    positions[0] = (0, 0)
+    for i in range(1, n):
+        r, c = grid(i)
+        parent = i - 1 if c > 0 else i - cols
+        px, py = positions[parent]
+        dx, dy = offsets[(parent, i)]
+        positions[i] = (px + dx, py + dy)
+
+    # 음수 좌표가 없도록 이동
+    min_x = min(p[0] for p in positions)
+    min_y = min(p[1] for p in positions)
+    positions = [(int(x - min_x), int(y - min_y)) for x, y in positions]
+
+    return positions, pairs
+
+
+def owned_regions(positions, shapes, cols):
+    """겹침 영역 중앙(seam)으로 각 타일이 담당할 모자이크 영역 계산
+
+    Returns:
+        List[(x0, y0, x1, y1)]: 모자이크 좌표, 오른쪽/아래 끝 미포함
+    """
+    n = len(positions)
+    rows = (n + cols - 1) // cols
+    regions = []
+    for i, ((x, y), (h, w)) in enumerate(zip(positions, shapes)):
+        r, c = divmod(i, cols)
+        x0, y0, x1, y1 = x, y, x + w, y + h
+
+        if c > 0:
+            lx, _ = positions[i - 1]
+            x0 = (x + lx + shapes[i - 1][1]) // 2
+        if c + 1 < cols and i + 1 < n:
+            rx, _ = positions[i + 1]
+            x1 = (rx + x + w) // 2
+        if r > 0:
+            _, ty = positions[i - cols]
+            y0 = (y + ty + shapes[i - cols][0]) // 2
+        if r + 1 < rows and i + cols < n:
+            _, by = positions[i + cols]
+            y1 = (by + y + h) // 2
+
+        regions.append((int(x0), int(y0), int(x1), int(y1)))
+    return regions
+
+
+def detect_mosaic_tile(task):
+    """모자이크 타일 하나의 구멍 검출 (프로세스 풀 작업 단위)
+
+    Args:
+        task: (index, path, (x, y) 모자이크 위치, (x0, y0, x1, y1) 소유 영역, params)
+
+    Returns:
+        (index, holes, tile_edges, log): holes는 모자이크 좌표
+    """
+    index, path, (px, py), (x0, y0, x1, y1), params = task
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        print(f"\n{'='*60}")
+        print(f"Tile {index + 1}: {os.path.basename(path)} at ({px}, {py})")
+        print(f"{'='*60}")
+
+        image = load_image(path)
+
+        boundary = None
+        tile_edges = None
+        if params['crop_document']:
+            result = detect_document_boundary(image, corner_method=params['corner_method'],
+                                              return_tile_edges=True)
+            if isinstance(result, tuple) and len(result) == 2:
+                boundary, tile_edges = result
+            elif result is not None:
+                boundary = result
+
+        # 소유 영역 (타일 좌표), morphology 후 seam에서 절단
+        keep_region = (x0 - px, y0 - py, x1 - x0, y1 - y0)
+        holes, _ = detect_holes_with_params(image, params, boundary=boundary, keep_region=keep_region)
+
+    return index, holes.offset(px, py), tile_edges, log.getvalue()
+
+
+def find_seam_holes(holes, regions, seams):
+    """seam에 닿은 구멍 index (잘린 조각 후보)
+
+    seams: 타일별 (left, top, right, bottom) 중 이웃 타일과 맞닿은 변 여부
+    """
+    seam_holes = []
+    for i, hole in enumerate(holes):
+        tile = hole['tiles'][0]
+        x0, y0, x1, y1 = regions[tile]
+        has_left, has_top, has_right, has_bottom = seams[tile]
+        x, y, w, h = hole['bbox']
+        if ((has_left and x <= x0) or (has_top and y <= y0) or
+                (has_right and x + w >= x1) or (has_bottom and y + h >= y1)):
+            seam_holes.append(i)
+    return seam_holes
+
+
+def _group_touching(holes, indices):
+    """bbox가 맞닿거나 겹치는 구멍끼리 union-find로 묶기"""
+    parent = {i: i for i in indices}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for k, i in enumerate(indices):
+        xi, yi, wi, hi = holes[i]['bbox']
+        for j in indices[k + 1:]:
+            if holes[i]['tiles'] == holes[j]['tiles']:
+                continue  # 같은 타일 안의 구멍은 이미 분리된 성분
+            xj, yj, wj, hj = holes[j]['bbox']
+            if xi <= xj + wj and xj <= xi + wi and yi <= yj + hj and yj <= yi + hi:
+                parent[find(i)] = find(j)
+
+    groups = {}
+    for i in indices:
+        groups.setdefault(find(i), []).append(i)
+    return [sorted(g) for g in groups.values()]
+
+
+def merge_seam_holes(holes, regions, seams):
+    """seam을 가로지르는 구멍 조각들을 하나의 polygon으로 병합
+
+    각 조각은 seam에서 정확히 잘려 있으므로(양쪽이 인접 픽셀) 조각들을 함께 그린 뒤
+    외곽 contour를 다시 추출하면 하나의 구멍이 됨.
+
+    Returns:
+        (holes, merged_count): 병합된 구멍 목록, 병합으로 줄어든 조각 수
+    """
+    seam_indices = find_seam_holes(holes, regions, seams)
+    groups = [g for g in _group_touching(holes, seam_indices) if len(g) > 1]
+
+    merged_away = set()
+    new_holes = []
+    for group in groups:
+        parts = [holes[i] for i in group]
+        gx0 = min(p['bbox'][0] for p in parts)
+        gy0 = min(p['bbox'][1] for p in parts)
+        gx1 = max(p['bbox'][0] + p['bbox'][2] for p in parts)
+        gy1 = max(p['bbox'][1] + p['bbox'][3] for p in parts)
+
+        canvas = np.zeros((gy1 - gy0, gx1 - gx0), dtype=np.uint8)
+        for part in parts:
+            cv2.drawContours(canvas, [part['contour'] - np.int32([gx0, gy0])], -1, 255, -1)
+
+        contours, _ = cv2.findContours(canvas, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if len(contours) >= len(parts):
+            continue  # 실제로 맞닿지 않음 (bbox만 겹침)
+
+        tiles = tuple(sorted({t for p in parts for t in p['tiles']}))
+        for cnt in contours:
+            x, y, w, h = cv2.boundingRect(cnt)
+            new_holes.append({
+                'id': -1,
+                'bbox': (gx0 + x, gy0 + y, w, h),
+                'area': cv2.contourArea(cnt),
+                'contour': cnt + np.int32([gx0, gy0]),
+                'tiles': tiles,
+            })
+        merged_away.update(group)
+
+    kept = [hole for i, hole in enumerate(holes) if i not in merged_away]
+    merged_count = len(merged_away) - len(new_holes)
+    print(f"\n=== Seam Merge ===")
+    print(f"  Seam-touching pieces: {len(seam_indices)}")
+    print(f"  Merged groups: {len(new_holes)} holes from {len(merged_away)} pieces")
+
+    return kept + new_holes, merged_count
+
+
+def mosaic_hole_images(holes, paths, positions, regions):
+    """모자이크 좌표 구멍들의 crop 이미지 생성 (타일을 하나씩 읽어 소유 영역 픽셀로 합성)
+
+    hole['image']에 저장 → save_holes가 그대로 사용.
+    """
+    masks = {}
+    for i, (path, (px, py), (x0, y0, x1, y1)) in enumerate(zip(paths, positions, regions)):
+        members = [hole for hole in holes if i in hole['tiles']]
+        if not members:
+            continue
+        tile = load_image(path)
+
+        for hole in members:
+            x, y, w, h = hole['bbox']
+            if id(hole) not in masks:
+                mask = np.zeros((h, w), dtype=np.uint8)
+                cv2.drawContours(mask, [hole['contour'] - np.int32([x, y])], -1, 255, -1)
+                masks[id(hole)] = mask
+                hole['image'] = np.full((h, w, 3), 255, dtype=np.uint8)
+
+            # 구멍 bbox ∩ 타일 소유 영역
+            ix0, iy0 = max(x, x0), max(y, y0)
+            ix1, iy1 = min(x + w, x1), min(y + h, y1)
+            if ix1 <= ix0 or iy1 <= iy0:
+                continue
+            inside = masks[id(hole)][iy0 - y:iy1 - y, ix0 - x:ix1 - x] > 0
+            view = hole['image'][iy0 - y:iy1 - y, ix0 - x:ix1 - x]
+            view[inside] = tile[iy0 - py:iy1 - py, ix0 - px:ix1 - px][inside]
+
+
+def build_mosaic(paths, positions, regions, mosaic_shape, scale=1.0):
+    """소유 영역 기준으로 모자이크 이미지 생성 (scale < 1이면 미리보기)
+
+    검출에는 사용하지 않음 (미리보기 / 복원 가이드용).
+    """
+    mh, mw = mosaic_shape
+    out_w, out_h = max(1, int(round(mw * scale))), max(1, int(round(mh * scale)))
+    mosaic = np.full((out_h, out_w, 3), 255, dtype=np.uint8)
+
+    for path, (px, py), (x0, y0, x1, y1) in zip(paths, positions, regions):
+        tile = load_image(path)[y0 - py:y1 - py, x0 - px:x1 - px]
+        ox0, oy0 = int(round(x0 * scale)), int(round(y0 * scale))
+        ox1, oy1 = int(round(x1 * scale)), int(round(y1 * scale))
+        if ox1 <= ox0 or oy1 <= oy0:
+            continue
+        if scale != 1.0:
+            tile = cv2.resize(tile, (ox1 - ox0, oy1 - oy0), interpolation=cv2.INTER_AREA)
+        mosaic[oy0:oy1, ox0:ox1] = tile
+    return mosaic
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mosaic hole detection across overlapping scan tiles')
+    parser.add_argument('--inputs', nargs='+', required=True,
+                        help='Tile images in row-major order (e.g. w_0001.tif w_0002.tif ...)')
+    parser.add_argument('--cols', type=int, default=None,
+                        help='Tiles per row (default: all tiles in one row)')
+    parser.add_argument('--output-dir', type=str, default='results/mosaic')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes for per-tile detection, threads for SVG export (default: min(tiles, CPU count))')
+    parser.add_argument('--min-score', type=float, default=MIN_MATCH_SCORE,
+                        help=f'Minimum overlap match score, lower = abut tiles without overlap (default: {MIN_MATCH_SCORE})')
+    parser.add_argument('--max-overlap', type=float, default=MAX_OVERLAP_RATIO,
+                        help=f'Maximum overlap ratio to search (default: {MAX_OVERLAP_RATIO})')
+    parser.add_argument('--skip-crops', action='store_true',
+                        help='Do not write individual_holes/*.png crops')
+    parser.add_argument('--crop-format', type=str, default='png', choices=CROP_FORMATS,
+                        help='Hole crops: png, atlas (one image + JSON index) or zip (default: png)')
+    parser.add_argument('--write-mosaic', action='store_true',
+                        help='Also write full-resolution mosaic.png (for create_restoration_guide.py)')
+
+    # extract_whiteness_based.py와 같은 검출 옵션
+    parser.add_argument('--method', type=str, default='hsv',
+                        choices=['lab_b', 'hsv', 'lab_hsv', 'rgb_balance', 'lab_achromatic', 'combined'])
+    parser.add_argument('--s-percentile', type=int, default=25)
+    parser.add_argument('--v-percentile', type=int, default=75)
+    parser.add_argument('--s-threshold', type=int, default=None)
+    parser.add_argument('--v-threshold', type=int, default=None)
+    parser.add_argument('--min-area', type=int, default=50)
+    parser.add_argument('--max-area', type=int, default=500000)
+    parser.add_argument('--enhance-holes', action='store_true')
+    parser.add_argument('--dilation-size', type=int, default=5)
+    parser.add_argument('--border-margin', type=int, default=0)
+    parser.add_argument('--lut', action='store_true')
+    parser.add_argument('--lut-cache-dir', type=str, default=DEFAULT_LUT_CACHE_DIR)
+    parser.add_argument('--crop-document', action='store_true',
+                        help='Detect document boundary per tile (sides continuing to the next tile are kept)')
+    parser.add_argument('--corner-method', type=str, default='edges',
+                        choices=['edges', 'convex', 'bbox', 'minarea', 'percentile'])
+    parser.add_argument('--boundary-margin', type=int, default=0)
+
+    # SVG
+    parser.add_argument('--export-svg', action='store_true')
+    parser.add_argument('--svg-dpi', type=int, default=300)
+    parser.add_argument('--svg-simplify', type=float, default=1.0)
+    parser.add_argument('--svg-individual', action='store_true')
+    parser.add_argument('--svg-no-indent', action='store_true')
+    parser.add_argument('--svg-compact', action='store_true')
+    parser.add_argument('--svgz', action='store_true')
+    parser.add_argument('--svg-tolerance-mm', type=float, default=None)
+    parser.add_argument('--svg-curves', action='store_true')
+
+    args = parser.parse_args()
+
+    paths = args.inputs
+    cols = args.cols or len(paths)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print("=" * 60)
+    print("Mosaic Hole Extraction")
+    print("=" * 60)
+    print(f"Tiles: {len(paths)} ({cols} per row)")
+
+    # 1. 정합 (가장자리 strip만 메모리에 유지)
+    print(f"\n=== Tile Registration ===")
+    strips = [TileStrips(p, max_overlap=args.max_overlap) for p in paths]
+    shapes = [s.shape for s in strips]
+    positions, pairs = register_tiles(strips, cols, min_score=args.min_score)
+    strips = None
+
+    mosaic_w = max(x + w for (x, _), (_, w) in zip(positions, shapes))
+    mosaic_h = max(y + h for (_, y), (h, _) in zip(positions, shapes))
+    regions = owned_regions(positions, shapes, cols)
+
+    print(f"\n  Mosaic size: {mosaic_w}x{mosaic_h}")
+    for path, pos, region in zip(paths, positions, regions):
+        print(f"  {os.path.basename(path)}: position={pos}, owns x={region[0]}-{region[2]}, y={region[1]}-{region[3]}")
+
+    # 2. 타일별 검출 (프로세스 풀)
+    params = {
+        'method': args.method,
+        's_percentile': args.s_percentile,
+        'v_percentile': args.v_percentile,
+        's_threshold': args.s_threshold,
+        'v_threshold': args.v_threshold,
+        'lut': args.lut,
+        'lut_cache_dir': args.lut_cache_dir,
+        'band_rows': None,
+        'boundary_margin': args.boundary_margin,
+        # 면적 필터는 seam 병합 후 적용 (seam에서 잘린 작은 조각도 병합에 참여)
+        'min_area': 0,
+        'max_area': sys.maxsize,
+        'enhance_holes': args.enhance_holes,
+        'dilation_size': args.dilation_size,
+        'border_margin': args.border_margin,
+        'crop_document': args.crop_document,
+        'corner_method': args.corner_method,
+    }
+    prepare_whiteness_lut(params)
+    tasks = [(i, path, positions[i], regions[i], params) for i, path in enumerate(paths)]
+    workers = args.workers or min(len(tasks), os.cpu_count() or 1)
+
+    print(f"\n=== Per-tile Detection ({workers} processes) ===")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(detect_mosaic_tile, tasks))
+    else:
+        results = [detect_mosaic_tile(task) for task in tasks]
+
+    # 병합은 구멍 단위 dict로 처리 (tiles: 구멍이 걸친 타일 index)
+    holes = []
+    for index, tile_holes, tile_edges, log in results:
+        print(log, end='')
+        for hole in tile_holes:
+            hole['tiles'] = (index,)
+            holes.append(hole)
+
+    # 이웃 타일과 맞닿은 변 (seam)
+    n = len(paths)
+    rows = (n + cols - 1) // cols
+    seams = []
+    for i, (index, _, tile_edges, _) in enumerate(results):
+        r, c = divmod(i, cols)
+        has = (c > 0, r > 0, c + 1 < cols and i + 1 < n, r + 1 < rows and i + cols < n)
+        if tile_edges is not None:
+            # detect_tiled_edges: True = 실제 가장자리 (이웃 타일과 이어지지 않음)
+            for side, neighbour, real_edge in zip(('left', 'top', 'right', 'bottom'), has, tile_edges):
+                if neighbour and real_edge:
+                    print(f"  [WARNING] {os.path.basename(paths[i])}: {side} has a neighbour tile "
+                          f"but looks like a real document edge")
+        seams.append(has)
+
+    print(f"\n  Pieces before merge: {len(holes)}")
+    holes, merged_count = merge_seam_holes(holes, regions, seams)
+
+    # 면적 필터 (타일 스캔 해상도 기준 스케일링, 병합된 구멍은 첫 타일 기준)
+    limits = [scale_area_limits(shape, args.min_area, args.max_area) for shape in shapes]
+    before = len(holes)
+    holes = [hole for hole in holes
+             if limits[hole['tiles'][0]][0] <= hole['area'] <= limits[hole['tiles'][0]][1]]
+    print(f"  Area filter: {before} → {len(holes)} holes")
+
+    if len(holes) == 0:
+        print("No holes found!")
+        return 1
+
+    # 3. 번호 재할당 (y 역순, 같은 y는 x 순 → 결정적)
+    holes = sorted(holes, key=lambda h: (-h['bbox'][1], h['bbox'][0]))
+    for i, hole in enumerate(holes):
+        hole['id'] = i
+    HoleTable.from_holes(holes).save(os.path.join(args.output_dir, 'holes.npz'))
+
+    if not args.skip_crops:
+        mosaic_hole_images(holes, paths, positions, regions)
+        save_holes(holes, args.output_dir, crop_format=args.crop_format, workers=workers)
+        for hole in holes:
+            hole.pop('image', None)
+
+    if args.export_svg:
+        save_holes_svg(holes, mosaic_w, mosaic_h, args.output_dir,
+                       simplify_epsilon=args.svg_simplify,
+                       dpi=args.svg_dpi,
+                       unified=True,
+                       individual=args.svg_individual,
+                       pretty=not (args.svg_no_indent or args.svg_compact),
+                       compact=args.svg_compact,
+                       svgz=args.svgz,
+                       workers=workers,
+                       tolerance_mm=args.svg_tolerance_mm,
+                       curves=args.svg_curves)
+
+    # 4. 미리보기 (축소 모자이크) + 선택적으로 전체 해상도 모자이크
+    preview_scale = min(1.0, PREVIEW_MAX_SIDE / max(mosaic_w, mosaic_h))
+    preview = build_mosaic(paths, positions, regions, (mosaic_h, mosaic_w), scale=preview_scale)
+    for x0, y0, x1, y1 in regions:
+        cv2.rectangle(preview, (int(x0 * preview_scale), int(y0 * preview_scale)),
+                      (int(x1 * preview_scale) - 1, int(y1 * preview_scale) - 1), (255, 0, 0), 1)
+    for hole in holes:
+        x, y, w, h = hole['bbox']
+        color = (0, 0, 255) if len(hole['tiles']) > 1 else (0, 255, 0)
+        cv2.rectangle(preview, (int(x * preview_scale), int(y * preview_scale)),
+                      (int((x + w) * preview_scale), int((y + h) * preview_scale)), color, 1)
+    cv2.imwrite(os.path.join(args.output_dir, 'mosaic_preview.png'), preview)
+    preview = None
+
+    if args.write_mosaic:
+        mosaic = build_mosaic(paths, positions, regions, (mosaic_h, mosaic_w))
+        cv2.imwrite(os.path.join(args.output_dir, 'mosaic.png'), mosaic)
+        create_comparison(mosaic, holes, os.path.join(args.output_dir, 'comparison.png'),
+                          boundary=[(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in regions])
+        mosaic = None
+
+    # 5. 배치 정보
+    layout = {
+        'mosaic_size': [int(mosaic_w), int(mosaic_h)],
+        'cols': cols,
+        'tiles': [{'path': path, 'position': list(pos), 'size': [int(w), int(h)], 'owned_region': list(region)}
+                  for path, pos, (h, w), region in zip(paths, positions, shapes, regions)],
+        'pairs': pairs,
+        'holes': [{'id': hole['id'], 'bbox': [int(v) for v in hole['bbox']], 'tiles': list(hole['tiles'])}
+                  for hole in holes],
+    }
+    with open(os.path.join(args.output_dir, 'mosaic_layout.json'), 'w', encoding='utf-8') as f:
+        json.dump(layout, f, indent=2, ensure_ascii=False)
+
+    seam_holes = sum(1 for hole in holes if len(hole['tiles']) > 1)
+    areas = [h['area'] for h in holes]
+    print("\n" + "=" * 60)
+    print("STATISTICS")
+    print("=" * 60)
+    print(f"Mosaic: {mosaic_w}x{mosaic_h} from {len(paths)} tiles")
+    print(f"Total holes: {len(holes)} ({seam_holes} merged across seams, {merged_count} pieces removed)")
+    print(f"Area range: {min(areas):.0f} - {max(areas):.0f}")
+    print(f"Total: {sum(areas):.0f} pixels ({sum(areas)/(mosaic_w*mosaic_h)*100:.2f}%)")
+    print("=" * 60)
+    print(f"\nResults: {args.output_dir}/")
+    print(f"  mosaic_layout.json - tile positions, overlaps, hole → tile mapping")
+    print(f"  mosaic_preview.png - downscaled mosaic (blue: tile regions, red: merged holes)")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,12 +7,207 @@
 import cv2
 import numpy as np
 import os
+import io
 import argparse
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+import contextlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
+from hole_geometry import GEOMETRY_FILENAME, RECORD_DTYPE, write_geometry
+from svg_writer import SVGWriter, bezier_points, encode_paths, open_svg
+from hole_crops import (ATLAS_IMAGE, ATLAS_INDEX, CROP_FORMATS, CROPS_DIRNAME, CROPS_ZIP, crop_filename,
+                        save_crops_atlas, save_crops_png, save_crops_zip)
 
-def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None, s_threshold=None, v_threshold=None):
+
+# cv2.calcHist는 float32로 카운트를 반환하므로 2^24 픽셀 이하 블록으로 나눠 누적 (정확한 정수 카운트 보장)
+HIST_BLOCK_PIXELS = 1 << 24
+
+
+class HistogramPercentile:
+    """히스토그램 기반 percentile 계산 (np.percentile 대체)
+
+    np.percentile은 39M 픽셀 채널 전체를 partition하므로 threshold마다 비용이 큼.
+    정수 채널은 히스토그램을 한 번 만들면 누적 히스토그램에서 O(bins)로
+    percentile/평균/표준편차를 구할 수 있음.
+
+    Args:
+        channel: 정수 채널 (uint8 또는 0 이상의 정수 key)
+        n_bins: bin 개수 (uint8 = 256)
+        bin_values: bin index → 실제 값 매핑 (None이면 index 그대로)
+                    예: chroma는 key=거리², 값=sqrt(key)
+    """
+
+    def __init__(self, channel, n_bins=256, bin_values=None):
+        self.counts = self._histogram(channel, n_bins)
+        self.cumsum = np.cumsum(self.counts)
+        self.total = int(self.cumsum[-1])
+
+        if bin_values is None:
+            bin_values = np.arange(len(self.counts), dtype=np.float64)
+        self.values = bin_values
+
+    @classmethod
+    def from_counts(cls, counts, bin_values=None):
+        """이미 계산된 히스토그램(블록별 누적 등)에서 생성"""
+        obj = cls.__new__(cls)
+        obj.counts = np.asarray(counts, dtype=np.int64)
+        obj.cumsum = np.cumsum(obj.counts)
+        obj.total = int(obj.cumsum[-1])
+        if bin_values is None:
+            bin_values = np.arange(len(obj.counts), dtype=np.float64)
+        obj.values = bin_values
+        return obj
+
+    @staticmethod
+    def _histogram(channel, n_bins):
+        h, w = channel.shape[:2]
+        rows_per_block = max(1, HIST_BLOCK_PIXELS // max(1, w))
+        counts = np.zeros(n_bins, dtype=np.int64)
+
+        for y in range(0, h, rows_per_block):
+            block = channel[y:y + rows_per_block]
+            if block.dtype == np.uint8 and n_bins == 256:
+                hist = cv2.calcHist([np.ascontiguousarray(block)], [0], None, [256], [0, 256])
+                counts += hist.ravel().astype(np.int64)
+            else:
+                counts += np.bincount(block.ravel(), minlength=n_bins)[:n_bins]
+
+        return counts
+
+    def _order_statistic(self, k):
+        """정렬된 배열의 k번째 값 (0-based)"""
+        return self.values[np.searchsorted(self.cumsum, k, side='right')]
+
+    def percentile(self, q):
+        """np.percentile(channel, q) (method='linear')과 같은 값"""
+        virtual_index = (q / 100) * (self.total - 1)
+        lo = int(np.floor(virtual_index))
+        hi = min(lo + 1, self.total - 1)
+        gamma = virtual_index - lo
+
+        v_lo = self._order_statistic(lo)
+        v_hi = self._order_statistic(hi)
+
+        # numpy의 _lerp와 같은 방식 (gamma >= 0.5이면 위쪽 값 기준)
+        diff = v_hi - v_lo
+        if gamma >= 0.5:
+            return float(v_hi - diff * (1 - gamma))
+        return float(v_lo + diff * gamma)
+
+    def mean_std(self):
+        """히스토그램에서 평균/표준편차 계산 (채널 전체 재순회 없음)"""
+        weights = self.counts / self.total
+        mean = float((weights * self.values).sum())
+        var = float((weights * (self.values - mean) ** 2).sum())
+        return mean, np.sqrt(var)
+
+    def otsu(self):
+        """Otsu threshold (256-bin uint8 히스토그램, cv2.THRESH_OTSU와 같은 값)"""
+        p = self.counts / self.total
+        q1 = np.cumsum(p)
+        m1 = np.cumsum(np.arange(len(p)) * p)
+        q2 = 1 - q1
+        eps = np.finfo(np.float32).eps
+        valid = (np.minimum(q1, q2) >= eps) & (np.maximum(q1, q2) <= 1 - eps)
+        if not valid.any():
+            return 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma = q1 * q2 * (m1 / q1 - (m1[-1] - m1) / q2) ** 2
+        sigma[~valid] = -1
+        return float(np.argmax(sigma))
+
+
+def chroma_histogram(a, b):
+    """LAB chroma 히스토그램 (key = 중립점으로부터의 거리², 정수)
+
+    chroma = sqrt(key)는 단조 증가이므로 key 히스토그램의 percentile = chroma percentile.
+    """
+    da = a.astype(np.int32) - 128
+    db = b.astype(np.int32) - 128
+    dist_sq = da * da + db * db
+    max_key = 2 * 128 * 128
+    return HistogramPercentile(dist_sq, n_bins=max_key + 1,
+                               bin_values=np.sqrt(np.arange(max_key + 1, dtype=np.float64)))
+
+
+def rgb_std_histogram(B, G, R):
+    """RGB 표준편차 히스토그램 (key = 9·분산 = 3Σx² - (Σx)², 정수)
+
+    std = sqrt(key) / 3은 단조 증가이므로 key 히스토그램의 percentile = std percentile.
+    """
+    b = B.astype(np.int32)
+    g = G.astype(np.int32)
+    r = R.astype(np.int32)
+    key = 3 * (b * b + g * g + r * r) - (b + g + r) ** 2
+    max_key = 2 * 255 * 255
+    return HistogramPercentile(key, n_bins=max_key + 1,
+                               bin_values=np.sqrt(np.arange(max_key + 1, dtype=np.float64)) / 3)
+
+
+class ImageContext:
+    """이미지 색공간 변환 공유 (lazy, 변환마다 최대 1회)
+
+    문서 경계 감지, 타일 경계/격자선 감지, 흰색 감지가 같은 LAB/HSV/gray 변환을
+    각자 다시 계산하지 않도록 한 곳에 캐시. 7216x5412 TIFF에서 전체 해상도 변환
+    1회 = 수백 ms, ~120MB.
+
+    np.ndarray 대신 넘겨도 되도록 shape 속성 제공.
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self.shape = image.shape
+        self._cache = {}
+
+    @classmethod
+    def of(cls, image):
+        """ndarray 또는 ImageContext → ImageContext"""
+        return image if isinstance(image, cls) else cls(image)
+
+    def _get(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def lab(self):
+        return self._get('lab', lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2LAB))
+
+    @property
+    def hsv(self):
+        return self._get('hsv', lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV))
+
+    @property
+    def gray(self):
+        return self._get('gray', lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY))
+
+    def _split(self, key, code):
+        """변환 후 채널 분리 - 분리된 채널만 캐시 (interleaved 변환과 같은 데이터를 두 번 보관하지 않음)"""
+        full = self._cache.pop(key, None)
+        return cv2.split(full if full is not None else cv2.cvtColor(self.image, code))
+
+    @property
+    def lab_channels(self):
+        """(L, a, b)"""
+        return self._get('lab_channels', lambda: self._split('lab', cv2.COLOR_BGR2LAB))
+
+    @property
+    def hsv_channels(self):
+        """(H, S, V)"""
+        return self._get('hsv_channels', lambda: self._split('hsv', cv2.COLOR_BGR2HSV))
+
+    @property
+    def bgr_channels(self):
+        """(B, G, R)"""
+        return self._get('bgr_channels', lambda: cv2.split(self.image))
+
+    def clear(self):
+        """캐시된 변환 해제 (구멍 추출 전 메모리 반환)"""
+        self._cache.clear()
+
+
+def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None, s_threshold=None, v_threshold=None,
+                     workers=1):
     """
     흰색 정도 감지
 
@@ -22,22 +217,31 @@ def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None,
         v_percentile: Value percentile (None이면 v_threshold 사용)
         s_threshold: 절대 Saturation threshold (우선순위)
         v_threshold: 절대 Value threshold (우선순위)
+        image: BGR 이미지 또는 ImageContext (변환 공유)
+        workers: 'combined' fused kernel 블록 스레드 수
+
+    Note:
+        percentile threshold는 채널별 히스토그램(HistogramPercentile)에서 계산
+        (np.percentile과 같은 값, 채널당 히스토그램 1회)
     """
     print(f"\n=== Whiteness Detection: {method} ===")
 
+    ctx = ImageContext.of(image)
+
     if method == 'lab_b':
         # LAB에서 b-channel이 낮음 = 흰색 (베이지는 b가 높음)
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-        L, a, b = cv2.split(lab)
+        L, a, b = ctx.lab_channels
 
-        print(f"  b (yellowness): {b.mean():.1f} ± {b.std():.1f}")
+        b_hist = HistogramPercentile(b)
+        b_mean, b_std = b_hist.mean_std()
+        print(f"  b (yellowness): {b_mean:.1f} ± {b_std:.1f}")
 
         # b-channel threshold (낮을수록 흰색, 높을수록 베이지)
         if s_threshold is not None:  # s_threshold를 b_threshold로 재사용
             b_thresh = s_threshold
             print(f"  b threshold: < {b_thresh} (absolute)")
         else:
-            b_thresh = int(np.percentile(b, s_percentile if s_percentile else 25))
+            b_thresh = int(b_hist.percentile(s_percentile if s_percentile else 25))
             print(f"  b threshold: < {b_thresh} (p{s_percentile if s_percentile else 25})")
 
         white_mask = (b < b_thresh).astype(np.uint8) * 255
@@ -46,25 +250,26 @@ def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None,
 
     elif method == 'hsv':
         # HSV에서 Saturation이 낮고 Value가 높음 = 흰색
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        H, S, V = cv2.split(hsv)
+        H, S, V = ctx.hsv_channels
 
-        print(f"  S (saturation): {S.mean():.1f} ± {S.std():.1f}")
-        print(f"  V (value): {V.mean():.1f} ± {V.std():.1f}")
+        s_hist = HistogramPercentile(S)
+        v_hist = HistogramPercentile(V)
+        print("  S (saturation): {:.1f} ± {:.1f}".format(*s_hist.mean_std()))
+        print("  V (value): {:.1f} ± {:.1f}".format(*v_hist.mean_std()))
 
         # Threshold 결정 (절대값 우선, 없으면 percentile)
         if s_threshold is not None:
             s_thresh = s_threshold
             print(f"  S threshold: < {s_thresh} (absolute)")
         else:
-            s_thresh = int(np.percentile(S, s_percentile if s_percentile else 25))
+            s_thresh = int(s_hist.percentile(s_percentile if s_percentile else 25))
             print(f"  S threshold: < {s_thresh} (p{s_percentile if s_percentile else 25})")
 
         if v_threshold is not None:
             v_thresh = v_threshold
             print(f"  V threshold: > {v_thresh} (absolute)")
         else:
-            v_thresh = int(np.percentile(V, v_percentile if v_percentile else 75))
+            v_thresh = int(v_hist.percentile(v_percentile if v_percentile else 75))
             print(f"  V threshold: > {v_thresh} (p{v_percentile if v_percentile else 75})")
 
         white_mask = (S < s_thresh) & (V > v_thresh)
@@ -74,20 +279,21 @@ def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None,
 
     elif method == 'rgb_balance':
         # RGB 채널 간 차이가 작음 = 무채색 = 흰색/회색
-        B, G, R = cv2.split(image)
+        B, G, R = ctx.bgr_channels
 
         # RGB 표준편차 (각 픽셀별)
         rgb_stack = np.stack([R, G, B], axis=-1)
         rgb_std = np.std(rgb_stack, axis=2)
+        std_hist = rgb_std_histogram(B, G, R)
 
-        print(f"  RGB std: {rgb_std.mean():.1f} ± {rgb_std.std():.1f}")
+        print("  RGB std: {:.1f} ± {:.1f}".format(*std_hist.mean_std()))
 
         # 밝기
         brightness = np.max(rgb_stack, axis=2)
 
         # 흰색: RGB 차이 작고, 밝음
-        std_threshold = int(np.percentile(rgb_std, 25))
-        brightness_threshold = int(np.percentile(brightness, 75))
+        std_threshold = int(std_hist.percentile(25))
+        brightness_threshold = int(HistogramPercentile(brightness).percentile(75))
 
         print(f"  RGB std threshold: < {std_threshold}")
         print(f"  Brightness threshold: > {brightness_threshold}")
@@ -99,18 +305,19 @@ def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None,
 
     elif method == 'lab_achromatic':
         # LAB에서 a,b가 중립(128)에 가까움 = 무채색
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-        L, a, b = cv2.split(lab)
+        L, a, b = ctx.lab_channels
 
         # a,b의 중립값(128)으로부터의 거리
         chroma = np.sqrt((a.astype(float) - 128)**2 + (b.astype(float) - 128)**2)
 
-        print(f"  L: {L.mean():.1f} ± {L.std():.1f}")
-        print(f"  Chroma: {chroma.mean():.1f} ± {chroma.std():.1f}")
+        L_hist = HistogramPercentile(L)
+        chroma_hist = chroma_histogram(a, b)
+        print("  L: {:.1f} ± {:.1f}".format(*L_hist.mean_std()))
+        print("  Chroma: {:.1f} ± {:.1f}".format(*chroma_hist.mean_std()))
 
         # 흰색: 채도 낮고 밝음
-        chroma_threshold = int(np.percentile(chroma, 25))
-        L_threshold = int(np.percentile(L, 75))
+        chroma_threshold = int(chroma_hist.percentile(25))
+        L_threshold = int(L_hist.percentile(75))
 
         print(f"  Chroma threshold: < {chroma_threshold}")
         print(f"  L threshold: > {L_threshold}")
@@ -123,23 +330,23 @@ def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None,
     elif method == 'lab_hsv':
         # LAB b-channel AND HSV saturation 교집합
         # LAB: 베이지 vs 흰색 구분
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-        L, a, b = cv2.split(lab)
+        L, a, b = ctx.lab_channels
 
         # HSV: 채도 기반 흰색 구분
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        H, S, V = cv2.split(hsv)
+        H, S, V = ctx.hsv_channels
 
-        print(f"  b (yellowness): {b.mean():.1f} ± {b.std():.1f}")
-        print(f"  S (saturation): {S.mean():.1f} ± {S.std():.1f}")
-        print(f"  V (value): {V.mean():.1f} ± {V.std():.1f}")
+        b_hist = HistogramPercentile(b)
+        s_hist = HistogramPercentile(S)
+        print("  b (yellowness): {:.1f} ± {:.1f}".format(*b_hist.mean_std()))
+        print("  S (saturation): {:.1f} ± {:.1f}".format(*s_hist.mean_std()))
+        print("  V (value): {:.1f} ± {:.1f}".format(*HistogramPercentile(V).mean_std()))
 
         # LAB b threshold
         if s_threshold is not None:
             b_thresh = s_threshold
             print(f"  b threshold: < {b_thresh} (absolute)")
         else:
-            b_thresh = int(np.percentile(b, s_percentile if s_percentile else 25))
+            b_thresh = int(b_hist.percentile(s_percentile if s_percentile else 25))
             print(f"  b threshold: < {b_thresh} (p{s_percentile if s_percentile else 25})")
 
         # HSV S threshold (v_threshold를 s용으로 재사용)
@@ -147,7 +354,7 @@ def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None,
             s_thresh_hsv = v_threshold
             print(f"  S threshold: < {s_thresh_hsv} (absolute)")
         else:
-            s_thresh_hsv = int(np.percentile(S, 50))  # 중간값 사용
+            s_thresh_hsv = int(s_hist.percentile(50))  # 중간값 사용
             print(f"  S threshold: < {s_thresh_hsv} (p50)")
 
         # 교집합: LAB AND HSV 모두 만족
@@ -166,67 +373,687 @@ def detect_whiteness(image, method='hsv', s_percentile=None, v_percentile=None,
         return white_mask, {'b': b, 'S': S, 'V': V}
 
     elif method == 'combined':
-        # 세 가지 방법 모두 사용 (교집합)
+        # 세 가지 방법 모두 사용 (교집합) - 블록 단위 fused kernel
+        return detect_whiteness_combined_fused(ctx.image, workers)
 
-        # 1. HSV
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        H, S, V = cv2.split(hsv)
-        s_thresh = int(np.percentile(S, 25))
-        v_thresh = int(np.percentile(V, 75))
-        mask1 = (S < s_thresh) & (V > v_thresh)
 
-        # 2. RGB balance
-        B, G, R = cv2.split(image)
-        rgb_stack = np.stack([R, G, B], axis=-1)
-        rgb_std = np.std(rgb_stack, axis=2)
-        brightness = np.max(rgb_stack, axis=2)
-        std_thresh = int(np.percentile(rgb_std, 25))
-        bright_thresh = int(np.percentile(brightness, 75))
-        mask2 = (rgb_std < std_thresh) & (brightness > bright_thresh)
-
-        # 3. LAB achromatic
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-        L, a, b_lab = cv2.split(lab)
-        chroma = np.sqrt((a.astype(float) - 128)**2 + (b_lab.astype(float) - 128)**2)
-        chroma_thresh = int(np.percentile(chroma, 25))
-        L_thresh = int(np.percentile(L, 75))
-        mask3 = (chroma < chroma_thresh) & (L > L_thresh)
-
-        # 교집합 (모든 방법이 동의)
-        white_mask = mask1 & mask2 & mask3
-        white_mask = white_mask.astype(np.uint8) * 255
+# fused kernel 블록 크기 (블록당 int32 임시 배열 몇 개 = 수십 MB 이하)
+FUSED_BLOCK_PIXELS = 1 << 20
+
+# chroma key = 거리² (최대 2·128²), RGB std key = 9·분산 (최대 2·255²)
+CHROMA_KEY_BINS = 2 * 128 * 128 + 1
+RGB_STD_KEY_BINS = 2 * 255 * 255 + 1
+
+
+def _row_blocks(h, w, block_pixels):
+    """(y0, y1) 행 블록 목록"""
+    rows_per_block = max(1, block_pixels // max(1, w))
+    return [(y, min(h, y + rows_per_block)) for y in range(0, h, rows_per_block)]
+
+
+def _map_bands(fn, bands, workers=1):
+    """band마다 fn 실행 (workers > 1이면 스레드 풀)
+
+    cv2/numpy 연산은 GIL을 해제하므로 스레드로 병렬화됨.
+    각 band는 출력의 서로 다른 행에만 기록하고 결과는 band 순서대로 반환되므로
+    workers 수와 관계없이 결과가 동일함.
+    """
+    if workers and workers > 1 and len(bands) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, bands))
+    return [fn(band) for band in bands]
+
+
+def _rgb_std_key(block):
+    """9·RGB 분산 = 3Σx² - (Σx)² (int32, rgb_std = sqrt(key)/3)"""
+    b = block[..., 0].astype(np.int32)
+    g = block[..., 1].astype(np.int32)
+    r = block[..., 2].astype(np.int32)
+    total = b + g + r
+    std_key = b * b
+    std_key += g * g
+    std_key += r * r
+    std_key *= 3
+    std_key -= total * total
+    return std_key
+
+
+def _brightness(block):
+    """max(R, G, B) (uint8)"""
+    return cv2.max(cv2.max(block[..., 0], block[..., 1]), block[..., 2])
+
+
+def _chroma_key(lab):
+    """(a-128)² + (b-128)² (int32, chroma = sqrt(key))"""
+    da = lab[..., 1].astype(np.int32) - 128
+    db = lab[..., 2].astype(np.int32) - 128
+    chroma_key = da * da
+    chroma_key += db * db
+    return chroma_key
+
+
+def _combined_block_features(block):
+    """'combined' 기준값을 한 블록에 대해 정수 연산으로 계산
+
+    Returns:
+        hsv, lab: 블록 색공간 변환 (uint8)
+        std_key: 9·RGB 분산 (int32)
+        brightness: max(R, G, B) (uint8)
+        chroma_key: (a-128)² + (b-128)² (int32)
+    """
+    hsv = cv2.cvtColor(block, cv2.COLOR_BGR2HSV)
+    lab = cv2.cvtColor(block, cv2.COLOR_BGR2LAB)
+
+    return hsv, lab, _rgb_std_key(block), _brightness(block), _chroma_key(lab)
+
+
+def _combined_block_histograms(block):
+    """1차 패스: 블록의 기준값 히스토그램"""
+    hsv, lab, std_key, brightness, chroma_key = _combined_block_features(block)
+
+    def hist8(img, channel):
+        return cv2.calcHist([img], [channel], None, [256], [0, 256]).ravel().astype(np.int64)
+
+    return {
+        'S': hist8(hsv, 1),
+        'V': hist8(hsv, 2),
+        'std': np.bincount(std_key.ravel(), minlength=RGB_STD_KEY_BINS),
+        'brightness': hist8(brightness, 0),
+        'chroma': np.bincount(chroma_key.ravel(), minlength=CHROMA_KEY_BINS),
+        'L': hist8(lab, 0),
+    }
+
+
+def _combined_block_mask(block, out, th):
+    """2차 패스: 블록 마스크를 출력 배열에 직접 기록
+
+    rgb_std < t ⇔ std_key < 9t², chroma < t ⇔ chroma_key < t² (정수 비교로 동일)
+    """
+    hsv, lab, std_key, brightness, chroma_key = _combined_block_features(block)
+
+    mask1 = (hsv[..., 1] < th['S']) & (hsv[..., 2] > th['V'])
+    mask2 = (std_key < 9 * th['std'] ** 2) & (brightness > th['brightness'])
+    mask3 = (chroma_key < th['chroma'] ** 2) & (lab[..., 0] > th['L'])
+
+    np.multiply(mask1 & mask2 & mask3, np.uint8(255), out=out)
+
+    return (int(np.count_nonzero(mask1)), int(np.count_nonzero(mask2)),
+            int(np.count_nonzero(mask3)), int(np.count_nonzero(out)))
+
+
+def detect_whiteness_combined_fused(image, workers=1):
+    """'combined' 방법의 fused, 블록 단위 구현
+
+    HSV/LAB 변환, float64 rgb_std/chroma, 전체 해상도 boolean 마스크 3개를 만들지 않고
+    행 블록마다 정수 연산으로 세 기준을 계산해 출력 마스크에 바로 기록.
+    threshold(percentile)가 전체 이미지에 의존하므로 2-pass:
+      1. 블록별 히스토그램 누적 → percentile threshold
+      2. 블록별 마스크 기록
+    블록은 스레드 풀에서 병렬 처리 (cv2/numpy는 GIL 해제).
+
+    Args:
+        workers: 스레드 수 (--workers, 프로세스 풀 작업자 안에서는 1)
+    """
+    h, w = image.shape[:2]
+    blocks = _row_blocks(h, w, FUSED_BLOCK_PIXELS)
+    workers = max(1, workers or 1)
+
+    # 1차 패스: 히스토그램
+    totals = None
+    for hists in _map_bands(lambda yy: _combined_block_histograms(image[yy[0]:yy[1]]), blocks, workers):
+        if totals is None:
+            totals = hists
+        else:
+            for key in totals:
+                totals[key] += hists[key]
+
+    chroma_values = np.sqrt(np.arange(CHROMA_KEY_BINS, dtype=np.float64))
+    std_values = np.sqrt(np.arange(RGB_STD_KEY_BINS, dtype=np.float64)) / 3
+
+    th = {
+        'S': int(HistogramPercentile.from_counts(totals['S']).percentile(25)),
+        'V': int(HistogramPercentile.from_counts(totals['V']).percentile(75)),
+        'std': int(HistogramPercentile.from_counts(totals['std'], std_values).percentile(25)),
+        'brightness': int(HistogramPercentile.from_counts(totals['brightness']).percentile(75)),
+        'chroma': int(HistogramPercentile.from_counts(totals['chroma'], chroma_values).percentile(25)),
+        'L': int(HistogramPercentile.from_counts(totals['L']).percentile(75)),
+    }
+
+    # 2차 패스: 출력 마스크에 직접 기록
+    white_mask = np.empty((h, w), dtype=np.uint8)
+    counts = np.zeros(4, dtype=np.int64)
+    for block_counts in _map_bands(
+            lambda yy: _combined_block_mask(image[yy[0]:yy[1]], white_mask[yy[0]:yy[1]], th), blocks, workers):
+        counts += block_counts
+
+    size = h * w
+    print(f"  Thresholds: S<{th['S']}, V>{th['V']}, RGB std<{th['std']}, "
+          f"brightness>{th['brightness']}, chroma<{th['chroma']}, L>{th['L']}")
+    print(f"  Blocks: {len(blocks)} (workers: {workers})")
+    print(f"  HSV mask: {counts[0] / size * 100:.2f}%")
+    print(f"  RGB mask: {counts[1] / size * 100:.2f}%")
+    print(f"  LAB mask: {counts[2] / size * 100:.2f}%")
+    print(f"  Combined: {counts[3] / size * 100:.2f}%")
+
+    return white_mask, {'thresholds': th}
+
+
+# band 처리 기본 행 수 (--band-rows)
+DEFAULT_BAND_ROWS = 1024
+
+# 채널 이름 → (비교 방향, bin 개수, bin 값, threshold → key threshold 변환)
+# std/chroma는 정수 key로 비교: rgb_std < t ⇔ key < 9t², chroma < t ⇔ key < t²
+WHITENESS_CHANNELS = {
+    'b': ('<', 256, None, None),
+    'S': ('<', 256, None, None),
+    'V': ('>', 256, None, None),
+    'L': ('>', 256, None, None),
+    'brightness': ('>', 256, None, None),
+    'std': ('<', RGB_STD_KEY_BINS, lambda: np.sqrt(np.arange(RGB_STD_KEY_BINS, dtype=np.float64)) / 3,
+            lambda t: 9 * t * t),
+    'chroma': ('<', CHROMA_KEY_BINS, lambda: np.sqrt(np.arange(CHROMA_KEY_BINS, dtype=np.float64)),
+               lambda t: t * t),
+}
+
+
+def whiteness_threshold_spec(method, s_percentile=None, v_percentile=None, s_threshold=None, v_threshold=None):
+    """방법별 채널 threshold 규칙 (detect_whiteness와 동일)
+
+    Returns:
+        {채널 이름: (절대 threshold 또는 None, percentile)}
+    """
+    sp = s_percentile if s_percentile else 25
+    vp = v_percentile if v_percentile else 75
+
+    if method == 'lab_b':
+        return {'b': (s_threshold, sp)}
+    elif method == 'hsv':
+        return {'S': (s_threshold, sp), 'V': (v_threshold, vp)}
+    elif method == 'lab_hsv':
+        return {'b': (s_threshold, sp), 'S': (v_threshold, 50)}
+    elif method == 'rgb_balance':
+        return {'std': (None, 25), 'brightness': (None, 75)}
+    elif method == 'lab_achromatic':
+        return {'chroma': (None, 25), 'L': (None, 75)}
+    elif method == 'combined':
+        return {'S': (None, 25), 'V': (None, 75), 'std': (None, 25),
+                'brightness': (None, 75), 'chroma': (None, 25), 'L': (None, 75)}
+    raise ValueError(f"Unknown method: {method}")
+
+
+def _whiteness_band_channels(block, names):
+    """블록에서 필요한 채널만 계산 (이름 → 정수 채널)"""
+    channels = {}
+    if names & {'b', 'L', 'chroma'}:
+        lab = cv2.cvtColor(block, cv2.COLOR_BGR2LAB)
+        channels['b'] = lab[..., 2]
+        channels['L'] = lab[..., 0]
+        if 'chroma' in names:
+            channels['chroma'] = _chroma_key(lab)
+    if names & {'S', 'V'}:
+        hsv = cv2.cvtColor(block, cv2.COLOR_BGR2HSV)
+        channels['S'] = hsv[..., 1]
+        channels['V'] = hsv[..., 2]
+    if 'std' in names:
+        channels['std'] = _rgb_std_key(block)
+    if 'brightness' in names:
+        channels['brightness'] = _brightness(block)
+    return {name: channels[name] for name in names}
+
+
+def _band_histograms(block, names):
+    """블록의 채널 히스토그램 (percentile threshold용)"""
+    hists = {}
+    for name, channel in _whiteness_band_channels(block, names).items():
+        n_bins = WHITENESS_CHANNELS[name][1]
+        if n_bins == 256:
+            hists[name] = cv2.calcHist([np.ascontiguousarray(channel)], [0], None, [256], [0, 256]).ravel().astype(np.int64)
+        else:
+            hists[name] = np.bincount(channel.ravel(), minlength=n_bins)
+    return hists
+
+
+def _band_mask(block, out, thresholds):
+    """블록 마스크를 출력 배열에 직접 기록 (모든 채널 조건의 AND)"""
+    mask = None
+    for name, channel in _whiteness_band_channels(block, set(thresholds)).items():
+        op, _, _, to_key = WHITENESS_CHANNELS[name]
+        t = thresholds[name]
+        if to_key is not None:
+            t = to_key(t)
+        cond = channel < t if op == '<' else channel > t
+        mask = cond if mask is None else (mask & cond)
+    np.multiply(mask, np.uint8(255), out=out)
+
+
+def resolve_whiteness_thresholds(image, method, s_percentile=None, v_percentile=None,
+                                 s_threshold=None, v_threshold=None, band_rows=DEFAULT_BAND_ROWS,
+                                 workers=1):
+    """band 단위 히스토그램 누적으로 전체 이미지 threshold 계산
+
+    절대 threshold는 그대로, percentile threshold만 히스토그램 1-pass로 계산.
+    """
+    spec = whiteness_threshold_spec(method, s_percentile, v_percentile, s_threshold, v_threshold)
+    thresholds = {name: t for name, (t, _) in spec.items() if t is not None}
+    pending = {name for name, (t, _) in spec.items() if t is None}
+
+    if pending:
+        h, w = image.shape[:2]
+        totals = None
+        bands = _row_blocks(h, w, band_rows * w)
+        for hists in _map_bands(lambda yy: _band_histograms(image[yy[0]:yy[1]], pending), bands, workers):
+            if totals is None:
+                totals = hists
+            else:
+                for name in totals:
+                    totals[name] += hists[name]
+
+        for name in pending:
+            values_fn = WHITENESS_CHANNELS[name][2]
+            hist = HistogramPercentile.from_counts(totals[name], values_fn() if values_fn else None)
+            thresholds[name] = int(hist.percentile(spec[name][1]))
+
+    return thresholds
+
+
+def detect_whiteness_banded(image, method='hsv', s_percentile=None, v_percentile=None,
+                            s_threshold=None, v_threshold=None, band_rows=DEFAULT_BAND_ROWS, workers=1):
+    """band 단위 흰색 감지 (detect_whiteness와 같은 마스크, 메모리 제한)
+
+    LAB/HSV 변환, float 채널, boolean 마스크는 band 크기로만 존재.
+    전체 해상도로 남는 것은 입력 이미지와 출력 마스크(1 byte/pixel)뿐.
+    workers > 1이면 band를 스레드 풀에서 병렬 처리 (결과 동일).
+    """
+    print(f"\n=== Whiteness Detection: {method} (banded, {band_rows} rows, workers: {workers}) ===")
+
+    h, w = image.shape[:2]
+    thresholds = resolve_whiteness_thresholds(image, method, s_percentile, v_percentile,
+                                              s_threshold, v_threshold, band_rows, workers)
+    for name, t in thresholds.items():
+        print(f"  {name} threshold: {WHITENESS_CHANNELS[name][0]} {t}")
+
+    white_mask = np.empty((h, w), dtype=np.uint8)
+    _map_bands(lambda yy: _band_mask(image[yy[0]:yy[1]], white_mask[yy[0]:yy[1]], thresholds),
+               _row_blocks(h, w, band_rows * w), workers)
+
+    return white_mask, {'thresholds': thresholds}
+
+
+def morphology_halo(kernel_size, enhance_holes=False, dilation_size=3):
+    """band morphology에 필요한 halo 행 수 (연산이 영향을 주는 최대 거리)"""
+    halo = 4 * (kernel_size // 2)  # CLOSE(dilate+erode) + OPEN(erode+dilate)
+    if enhance_holes:
+        halo += dilation_size // 2 + 2 * (5 // 2)  # dilate + CLOSE(5x5)
+    return halo + 1
+
+
+def clean_hole_mask(mask, kernel_size, enhance_holes=False, dilation_size=3):
+    """구멍 마스크 morphology 정리 (CLOSE → OPEN, 선택적으로 hole enhancement)"""
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+    mask_clean = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    mask_clean = cv2.morphologyEx(mask_clean, cv2.MORPH_OPEN, kernel)
+
+    if enhance_holes:
+        # Dilation: 흰색 영역을 확장하여 주변 흰색 강조
+        dilate_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (dilation_size, dilation_size))
+        mask_clean = cv2.dilate(mask_clean, dilate_kernel, iterations=1)
+
+        # Closing: 구멍 내부의 작은 검은 점들 제거
+        close_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        mask_clean = cv2.morphologyEx(mask_clean, cv2.MORPH_CLOSE, close_kernel)
+
+    return mask_clean
+
+
+def _clean_band(mask, out, y0, y1, halo, kernel_size, enhance_holes, dilation_size):
+    """halo를 포함한 band에 morphology 적용 후 중앙 행만 기록"""
+    h = mask.shape[0]
+    top = max(0, y0 - halo)
+    bottom = min(h, y1 + halo)
+    cleaned = clean_hole_mask(mask[top:bottom], kernel_size, enhance_holes, dilation_size)
+    out[y0:y1] = cleaned[y0 - top:y1 - top]
+
+
+def clean_hole_mask_banded(mask, kernel_size, enhance_holes=False, dilation_size=3,
+                           band_rows=DEFAULT_BAND_ROWS, workers=1):
+    """band 단위 morphology (halo로 경계 효과 제거 → clean_hole_mask와 동일 결과)
+
+    band는 입력 마스크의 halo 영역을 읽기만 하고 출력은 서로 겹치지 않으므로 병렬 처리 가능.
+    """
+    h, w = mask.shape[:2]
+    halo = morphology_halo(kernel_size, enhance_holes, dilation_size)
+    mask_clean = np.empty_like(mask)
+
+    _map_bands(lambda yy: _clean_band(mask, mask_clean, yy[0], yy[1], halo,
+                                      kernel_size, enhance_holes, dilation_size),
+               _row_blocks(h, w, band_rows * w), workers)
+
+    return mask_clean
+
+
+# LUT 적용 시 블록 크기 (int32 index 임시 배열을 ~4MB로 제한)
+LUT_BLOCK_PIXELS = 1 << 20
+
+# 절대 threshold만으로 결정되는 방법 (percentile 방법은 이미지마다 threshold가 달라 LUT 불가)
+LUT_METHODS = ('lab_b', 'hsv', 'lab_hsv')
+
+DEFAULT_LUT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'whiteness_lut')
+
+
+def lut_supported(method, s_threshold=None, v_threshold=None):
+    """LUT 모드 사용 가능 여부 (모든 threshold가 절대값이어야 함)"""
+    if method == 'lab_b':
+        return s_threshold is not None
+    if method in ('hsv', 'lab_hsv'):
+        return s_threshold is not None and v_threshold is not None
+    return False
+
+
+def build_whiteness_lut(method, s_threshold=None, v_threshold=None):
+    """BGR 256³ 전체에 대한 흰색 판정 테이블 생성
+
+    모든 BGR 조합(16.7M)을 하나의 이미지로 만들어 detect_whiteness와 같은
+    cv2.cvtColor + threshold를 적용하므로 결과가 픽셀 단위로 동일함.
+
+    Returns:
+        lut: (2^24,) uint8 (0 또는 255), index = B<<16 | G<<8 | R
+    """
+    if not lut_supported(method, s_threshold, v_threshold):
+        raise ValueError(f"LUT requires absolute thresholds for method '{method}'")
+
+    # 행 = B, 열 = G*256 + R
+    low = np.arange(1 << 16, dtype=np.uint32)
+    cube = np.empty((256, 1 << 16, 3), dtype=np.uint8)
+    cube[..., 0] = np.arange(256, dtype=np.uint8)[:, None]
+    cube[..., 1] = (low >> 8).astype(np.uint8)[None, :]
+    cube[..., 2] = (low & 0xFF).astype(np.uint8)[None, :]
+
+    if method == 'lab_b':
+        b = cv2.cvtColor(cube, cv2.COLOR_BGR2LAB)[..., 2]
+        table = b < s_threshold
+    elif method == 'hsv':
+        hsv = cv2.cvtColor(cube, cv2.COLOR_BGR2HSV)
+        table = (hsv[..., 1] < s_threshold) & (hsv[..., 2] > v_threshold)
+    else:  # lab_hsv: s_threshold = b, v_threshold = S
+        b = cv2.cvtColor(cube, cv2.COLOR_BGR2LAB)[..., 2]
+        S = cv2.cvtColor(cube, cv2.COLOR_BGR2HSV)[..., 1]
+        table = (b < s_threshold) & (S < v_threshold)
+
+    return table.reshape(-1).astype(np.uint8) * 255
+
+
+def load_whiteness_lut(method, s_threshold=None, v_threshold=None, cache_dir=DEFAULT_LUT_CACHE_DIR):
+    """디스크 캐시에서 LUT 로드 (없으면 생성 후 저장)
+
+    캐시 파일은 bit 단위로 압축 (16.7M entries → 2MB).
+    OpenCV 버전이 바뀌면 색공간 변환 결과가 달라질 수 있으므로 파일명에 버전 포함.
+    """
+    cache_name = f"{method}_s{s_threshold}_v{v_threshold}_cv{cv2.__version__}.npy"
+    cache_path = os.path.join(cache_dir, cache_name) if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        packed = np.load(cache_path)
+        print(f"  LUT loaded: {cache_path}")
+        return np.unpackbits(packed) * np.uint8(255)
+
+    print(f"  Building LUT ({method}, s={s_threshold}, v={v_threshold})...")
+    lut = build_whiteness_lut(method, s_threshold, v_threshold)
+
+    if cache_path:
+        # 임시 파일에 쓴 뒤 교체 - 다른 프로세스가 쓰는 중인 파일을 읽지 않도록
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.npy.tmp', dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.packbits(lut > 0))
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        print(f"  LUT cached: {cache_path}")
+
+    return lut
+
+
+def _apply_lut_block(block, lut, out):
+    index = block[..., 0].astype(np.int32) << 16
+    index |= block[..., 1].astype(np.int32) << 8
+    index |= block[..., 2]
+    np.take(lut, index, out=out)
+
+
+def apply_whiteness_lut(image, lut, workers=1):
+    """BGR 이미지에 LUT 적용 (픽셀당 1회 gather, 색공간 변환 없음)"""
+    h, w = image.shape[:2]
+    white_mask = np.empty((h, w), dtype=np.uint8)
+
+    _map_bands(lambda yy: _apply_lut_block(image[yy[0]:yy[1]], lut, white_mask[yy[0]:yy[1]]),
+               _row_blocks(h, w, LUT_BLOCK_PIXELS), workers)
+
+    return white_mask
+
+
+def detect_whiteness_lut(image, method, s_threshold=None, v_threshold=None, cache_dir=DEFAULT_LUT_CACHE_DIR,
+                         workers=1, lut=None):
+    """LUT 기반 흰색 감지 (detect_whiteness의 절대 threshold 모드와 동일한 마스크)
+
+    lut: 이미 준비한 테이블 (없으면 캐시에서 로드)
+    """
+    print(f"\n=== Whiteness Detection: {method} (LUT) ===")
+
+    if lut is None:
+        lut = load_whiteness_lut(method, s_threshold, v_threshold, cache_dir)
+    white_mask = apply_whiteness_lut(image, lut, workers)
+
+    print(f"  Thresholds: s={s_threshold}, v={v_threshold} (absolute)")
+
+    return white_mask, {}
+
+
+def prepare_whiteness_lut(params):
+    """프로세스 풀 시작 전에 부모에서 LUT를 한 번 준비 (작업자마다 생성하지 않도록)
+
+    캐시 디렉토리가 있으면 캐시 파일만 만들어 두고, 없으면 테이블을 params['lut_table']로 전달.
+    """
+    if not (params['lut'] and lut_supported(params['method'], params['s_threshold'], params['v_threshold'])):
+        return
+    lut = load_whiteness_lut(params['method'], params['s_threshold'], params['v_threshold'],
+                             params['lut_cache_dir'])
+    if not params['lut_cache_dir']:
+        params['lut_table'] = lut
+
+
+# 기준 해상도: 7216x5412 = 39,061,392 픽셀 (고해상도 .tif 기준)
+REFERENCE_PIXELS = 7216 * 5412
+
+
+HOLE_DTYPE = np.dtype([
+    ('id', np.int32),
+    ('x', np.int32), ('y', np.int32), ('w', np.int32), ('h', np.int32),
+    ('area', np.float64),          # contourArea (외곽 polygon 면적)
+    ('cx', np.float64), ('cy', np.float64),  # 중심 (성분 픽셀 중심)
+])
 
-        print(f"  HSV mask: {mask1.sum() / mask1.size * 100:.2f}%")
-        print(f"  RGB mask: {mask2.sum() / mask2.size * 100:.2f}%")
-        print(f"  LAB mask: {mask3.sum() / mask3.size * 100:.2f}%")
-        print(f"  Combined: {white_mask.sum() / white_mask.size * 100:.2f}%")
 
-        return white_mask, {'S': S, 'V': V, 'chroma': chroma}
+class HoleTable:
+    """구멍 목록 (struct-of-arrays)
 
+    구멍마다 dict + numpy contour 객체를 두는 대신
+    records: id/bbox/area/centroid 구조화 배열 (N,)
+    points: 모든 contour 점을 이어 붙인 int32 버퍼 (P, 2)
+    offsets: i번째 contour = points[offsets[i]:offsets[i+1]] (N+1,)
 
-def extract_individual_holes(image, mask, min_area=50, max_area=100000, enhance_holes=False, dilation_size=3, border_margin=0):
+    정렬/필터/번호 재할당은 배열 연산, contour는 버퍼의 view (복사 없음).
+    반복하면 기존 hole dict ({'id', 'bbox', 'area', 'contour', 'centroid'})를 돌려주므로
+    SVG/비교 이미지/crop 저장 코드는 그대로 사용.
+    """
+
+    def __init__(self, records, points, offsets):
+        self.records = records
+        self.points = points
+        self.offsets = offsets
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(0, dtype=HOLE_DTYPE), np.zeros((0, 2), dtype=np.int32),
+                   np.zeros(1, dtype=np.int64))
+
+    @classmethod
+    def from_arrays(cls, bboxes, areas, centroids, contours):
+        """bbox (N,4), area (N,), centroid (N,2), contour 리스트로 생성 (id = 0..N-1)"""
+        n = len(contours)
+        if n == 0:
+            return cls.empty()
+        records = np.zeros(n, dtype=HOLE_DTYPE)
+        records['id'] = np.arange(n)
+        bboxes = np.asarray(bboxes).reshape(n, 4)
+        for i, name in enumerate(('x', 'y', 'w', 'h')):
+            records[name] = bboxes[:, i]
+        records['area'] = areas
+        centroids = np.asarray(centroids, dtype=np.float64).reshape(n, 2)
+        records['cx'], records['cy'] = centroids[:, 0], centroids[:, 1]
+
+        lengths = np.array([len(c) for c in contours], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        points = np.concatenate([c.reshape(-1, 2) for c in contours]).astype(np.int32, copy=False)
+        return cls(records, points, offsets)
+
+    @classmethod
+    def from_holes(cls, holes):
+        """hole dict 리스트 → HoleTable (centroid가 없으면 contour 모멘트 중심)"""
+        holes = list(holes)
+        centroids = []
+        for hole in holes:
+            if 'centroid' in hole:
+                centroids.append(hole['centroid'])
+                continue
+            m = cv2.moments(hole['contour'])
+            x, y, w, h = hole['bbox']
+            centroids.append((m['m10'] / m['m00'], m['m01'] / m['m00']) if m['m00'] else (x + w / 2, y + h / 2))
+        table = cls.from_arrays([hole['bbox'] for hole in holes], [hole['area'] for hole in holes],
+                                centroids, [hole['contour'] for hole in holes])
+        if holes:
+            table.records['id'] = [hole.get('id', i) for i, hole in enumerate(holes)]
+        return table
+
+    @classmethod
+    def concatenate(cls, tables):
+        """여러 HoleTable 이어 붙이기 (타일 결과 병합, id는 유지)"""
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.empty()
+        records = np.concatenate([t.records for t in tables])
+        points = np.concatenate([t.points for t in tables])
+        starts = np.cumsum([0] + [len(t.points) for t in tables[:-1]])
+        offsets = np.concatenate([[0]] + [t.offsets[1:] + s for t, s in zip(tables, starts)])
+        return cls(records, points, offsets)
+
+    def __len__(self):
+        return len(self.records)
+
+    def contour(self, i):
+        """i번째 contour (N, 1, 2) int32 - points 버퍼의 view"""
+        return self.points[self.offsets[i]:self.offsets[i + 1]].reshape(-1, 1, 2)
+
+    def __getitem__(self, i):
+        r = self.records[i]
+        return {
+            'id': int(r['id']),
+            'bbox': (int(r['x']), int(r['y']), int(r['w']), int(r['h'])),
+            'area': float(r['area']),
+            'centroid': (float(r['cx']), float(r['cy'])),
+            'contour': self.contour(i),
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def bboxes(self):
+        """(N, 4) x, y, w, h"""
+        return np.stack([self.records[k] for k in ('x', 'y', 'w', 'h')], axis=1)
+
+    @property
+    def areas(self):
+        return self.records['area']
+
+    def take(self, indices):
+        """indices 순서로 구멍 선택 (contour 버퍼도 같은 순서로 재배치)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        starts, ends = self.offsets[indices], self.offsets[indices + 1]
+        lengths = ends - starts
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        # 각 contour 구간 index를 한 번에 생성
+        point_index = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return HoleTable(self.records[indices], self.points[point_index], offsets)
+
+    def filter(self, keep):
+        """boolean mask로 구멍 선택"""
+        return self.take(np.flatnonzero(keep))
+
+    def offset(self, dx, dy):
+        """좌표 이동 (타일 → 전체 좌표), 새 테이블"""
+        records = self.records.copy()
+        records['x'] += dx
+        records['y'] += dy
+        records['cx'] += dx
+        records['cy'] += dy
+        return HoleTable(records, self.points + np.int32([dx, dy]), self.offsets)
+
+    def sorted_by_y(self, reverse=True):
+        """bbox y 기준 안정 정렬 (reverse=True: 아래→위, 같은 y는 기존 순서 유지)"""
+        key = -self.records['y'].astype(np.int64) if reverse else self.records['y']
+        return self.take(np.argsort(key, kind='stable'))
+
+    def renumber(self):
+        """현재 순서대로 id = 0..N-1"""
+        self.records['id'] = np.arange(len(self))
+        return self
+
+    def save(self, path):
+        """.npz 저장 (records / points / offsets)"""
+        np.savez(path, records=self.records, points=self.points, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path):
+        """.npz 로드 - contour는 로드된 points 버퍼의 view"""
+        with np.load(path) as data:
+            return cls(data['records'], data['points'], data['offsets'])
+
+
+def scale_area_limits(image_shape, min_area, max_area):
+    """기준 해상도 min/max area를 실제 스캔 크기에 맞게 스케일링"""
+    scale_factor = image_shape[0] * image_shape[1] / REFERENCE_PIXELS
+    return int(min_area * scale_factor), int(max_area * scale_factor)
+
+
+def extract_individual_holes(image, mask, min_area=50, max_area=100000, enhance_holes=False, dilation_size=3, border_margin=0,
+                             band_rows=None, workers=1, reference_shape=None, keep_region=None):
     """개별 구멍 추출 (자동 해상도 스케일링 적용)
 
     Args:
         min_area, max_area: 고해상도 기준값 (7216x5412)에서 자동 스케일링
         border_margin: 이미지 가장자리에서 제외할 픽셀 수 (0이면 제외 안함)
+        band_rows: morphology를 band 단위로 실행 (None이면 전체 이미지 한 번에).
+                   지정 시 성분 추출도 findContours로 (연결 성분 label int32 배열 = 마스크 4배 메모리 생략)
+        workers: band morphology 스레드 수 (band_rows 지정 시)
+        reference_shape: 스케일링 기준 크기 (타일 처리 시 전체 스캔 크기, None이면 image 크기)
+        keep_region: (x, y, w, h) morphology 후 이 영역 밖 제거 (모자이크 타일 소유 영역, seam에서 절단)
 
     Note:
         입력된 min_area, max_area는 고해상도(7216x5412, 39M pixels) 기준값입니다.
         실제 이미지 해상도에 따라 자동으로 스케일링됩니다.
     """
     h, w = image.shape[:2]
-    current_pixels = h * w
-
-    # 기준 해상도: 7216x5412 = 39,061,392 픽셀 (고해상도 .tif 기준)
-    REFERENCE_PIXELS = 7216 * 5412
+    scan_h, scan_w = (reference_shape or image.shape)[:2]
+    current_pixels = scan_h * scan_w
 
     # 스케일 팩터 계산 (면적 기준)
     scale_factor = current_pixels / REFERENCE_PIXELS
 
     # 파라미터 스케일링
-    min_area_scaled = int(min_area * scale_factor)
-    max_area_scaled = int(max_area * scale_factor)
+    min_area_scaled, max_area_scaled = scale_area_limits((scan_h, scan_w), min_area, max_area)
 
     # 커널 크기 스케일링 (선형 스케일 팩터 사용, 최소 3x3)
     linear_scale = np.sqrt(scale_factor)
@@ -239,7 +1066,7 @@ def extract_individual_holes(image, mask, min_area=50, max_area=100000, enhance_
     border_margin_scaled = int(border_margin * linear_scale) if border_margin > 0 else 0
 
     print(f"\n=== Auto-Scaling (Resolution-Aware) ===")
-    print(f"  Current resolution: {w}x{h} ({current_pixels:,} pixels)")
+    print(f"  Current resolution: {scan_w}x{scan_h} ({current_pixels:,} pixels)")
     print(f"  Reference resolution: 7216x5412 ({REFERENCE_PIXELS:,} pixels)")
     print(f"  Scale factor: {scale_factor:.4f} ({linear_scale:.2f}x linear)")
     print(f"  min-area: {min_area} → {min_area_scaled} pixels")
@@ -248,86 +1075,215 @@ def extract_individual_holes(image, mask, min_area=50, max_area=100000, enhance_
     if border_margin > 0:
         print(f"  border-margin: {border_margin} → {border_margin_scaled} pixels")
 
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
     # Morphological cleanup (스케일링된 커널 사용)
-    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
-    mask_clean = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-    mask_clean = cv2.morphologyEx(mask_clean, cv2.MORPH_OPEN, kernel)
-
     # 구멍 강조: 주변 흰색을 확장하고 내부 검은 점 제거
     if enhance_holes:
         print(f"\n=== Hole Enhancement (dilation: {dilation_size}) ===")
-        # Dilation: 흰색 영역을 확장하여 주변 흰색 강조
-        dilate_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (dilation_size, dilation_size))
-        mask_clean = cv2.dilate(mask_clean, dilate_kernel, iterations=1)
 
-        # Closing: 구멍 내부의 작은 검은 점들 제거
-        close_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        mask_clean = cv2.morphologyEx(mask_clean, cv2.MORPH_CLOSE, close_kernel)
-
-    contours, _ = cv2.findContours(mask_clean, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    holes = []
-    excluded = 0
-    excluded_border = 0
-
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
+    if band_rows:
+        halo = morphology_halo(kernel_size, enhance_holes, dilation_size)
+        print(f"  Banded morphology: {band_rows} rows/band, halo {halo} rows, workers: {workers}")
+        mask_clean = clean_hole_mask_banded(mask, kernel_size, enhance_holes, dilation_size, band_rows, workers)
+    else:
+        mask_clean = clean_hole_mask(mask, kernel_size, enhance_holes, dilation_size)
+
+    # 소유 영역 밖 제거 (morphology는 겹침 영역 전체를 보고 계산된 뒤 절단)
+    if keep_region is not None:
+        kx, ky, kw, kh = keep_region
+        mask_clean[:max(0, ky)] = 0
+        mask_clean[max(0, ky + kh):] = 0
+        mask_clean[:, :max(0, kx)] = 0
+        mask_clean[:, max(0, kx + kw):] = 0
+
+    if band_rows:
+        # band 모드: 전체 해상도 int32 label 배열/패딩 외곽 마스크 없이 findContours (uint8 사본 1장)
+        all_contours, _ = cv2.findContours(mask_clean, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        rects = np.array([(0, 0, 0, 0)] + [cv2.boundingRect(c) for c in all_contours], dtype=np.int64).reshape(-1, 4)
+        candidates, excluded, excluded_border = filter_components(rects, (h, w), min_area_scaled, border_margin_scaled)
+
+        kept_rects, areas, centroids, contours = [], [], [], []
+        for index in candidates:
+            cnt = all_contours[index - 1]
+            area = cv2.contourArea(cnt)
+            if area < min_area_scaled or area > max_area_scaled:
+                excluded += 1
+                continue
+            kept_rects.append(rects[index])
+            areas.append(area)
+            centroids.append(component_centroid(mask_clean, cnt, rects[index]))
+            contours.append(cnt)
 
-        # 스케일링된 min/max area 사용
-        if area < min_area_scaled or area > max_area_scaled:
-            excluded += 1
-            continue
+        holes = HoleTable.from_arrays(kept_rects, areas, centroids, contours)
+        print(f"\nTotal contours: {len(all_contours)}")
+    else:
+        # 연결 성분 통계로 전체 성분을 numpy에서 한 번에 필터링
+        n_labels, labels, stats, centroids = cv2.connectedComponentsWithStatsWithAlgorithm(mask_clean, 8, cv2.CV_32S,
+                                                                                          cv2.CCL_GRANA)
+        exterior = exterior_background(mask_clean)
+        mask_clean = None
+        candidates, excluded, excluded_border = filter_components(stats, (h, w), min_area_scaled, border_margin_scaled)
+
+        # 각 성분 최상단 행의 첫 픽셀 (= findContours 시작점), findContours와 같은 역 raster 순서로 정렬
+        firsts = [component_first_pixel(labels, label, stats[label]) for label in candidates]
+        order = sorted(range(len(candidates)), key=lambda i: firsts[i][::-1], reverse=True)
+
+        kept, areas, contours = [], [], []
+        nested = 0
+        for i in order:
+            label = candidates[i]
+            x, y, bw, bh = (int(v) for v in stats[label, :4])
+
+            # 다른 구멍 안쪽 섬은 RETR_EXTERNAL과 같이 제외
+            # (시작점 바로 위 픽셀은 성분을 둘러싼 배경 → 바깥 배경이면 최외곽)
+            x_first, _ = firsts[i]
+            if exterior[y, x_first + 1] != 128:  # 패딩 좌표: (y-1)+1, x_first+1
+                nested += 1
+                continue
 
-        x, y, bw, bh = cv2.boundingRect(cnt)
+            # 살아남은 성분만 contour 추적 (bbox 안에서)
+            cnt = trace_component_contour(labels, label, (x, y, bw, bh))
+            area = cv2.contourArea(cnt)
 
-        # 가장자리 필터링 (이미지 테두리에 닿는 것 제외, 스케일링된 margin 사용)
-        if border_margin_scaled > 0:
-            if (x < border_margin_scaled or y < border_margin_scaled or
-                x + bw > w - border_margin_scaled or y + bh > h - border_margin_scaled):
-                excluded_border += 1
+            # 스케일링된 min/max area 사용 (contour 면적 기준)
+            if area < min_area_scaled or area > max_area_scaled:
+                excluded += 1
                 continue
 
-        hole_region = image[y:y+bh, x:x+bw].copy()
-        hole_mask_small = np.zeros((bh, bw), dtype=np.uint8)
-        cnt_shifted = cnt - [x, y]
-        cv2.drawContours(hole_mask_small, [cnt_shifted], -1, 255, -1)
+            # 구멍 이미지(crop)는 저장 시 hole_image()로 생성 (bbox + contour만 보관)
+            kept.append(label)
+            areas.append(area)
+            contours.append(cnt)  # SVG 벡터화를 위해 contour 저장
 
-        hole_extracted = hole_region.copy()
-        hole_extracted[hole_mask_small == 0] = [255, 255, 255]
+        holes = HoleTable.from_arrays(stats[kept, :4], areas, centroids[kept], contours)
+        print(f"\nTotal components: {n_labels - 1} ({nested} nested inside other holes)")
 
-        holes.append({
-            'id': len(holes),
-            'image': hole_extracted,
-            'bbox': (x, y, bw, bh),
-            'area': area,
-            'contour': cnt  # SVG 벡터화를 위해 contour 저장
-        })
-
-    print(f"\nTotal contours: {len(contours)}")
     print(f"Valid holes: {len(holes)}")
     print(f"Excluded (size): {excluded}")
     if border_margin_scaled > 0:
         print(f"Excluded (border): {excluded_border}")
 
-    # contour는 각 hole 딕셔너리에 저장됨
+    # contour는 HoleTable의 points 버퍼에 저장됨
     return holes
 
 
-def save_holes(holes, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-    for hole in holes:
-        x, y, w, h = hole['bbox']
-        filename = f"hole_{hole['id']:04d}_x{x}_y{y}_w{w}_h{h}_a{int(hole['area'])}.png"
-        cv2.imwrite(os.path.join(output_dir, filename), hole['image'])
+def filter_components(stats, image_shape, min_area, border_margin=0):
+    """connectedComponentsWithStats 결과에서 구멍 후보 성분을 한 번에 선별
+
+    contourArea(외곽 polygon, 픽셀 중심 연결)는 (w-1)*(h-1)을 넘을 수 없으므로
+    bbox로 min_area 미만이 확실한 성분(작은 점들)은 contour 없이 제외.
+    bbox = 외곽 contour의 boundingRect이므로 border 필터는 정확히 동일.
+    stats 대신 [dummy, boundingRect...] (N+1, 4) 배열도 그대로 사용 가능.
+
+    Returns:
+        (labels, excluded_size, excluded_border)
+        labels: 후보 label 배열
+    """
+    h, w = image_shape[:2]
+    x, y, bw, bh = (stats[1:, i].astype(np.int64) for i in range(4))
+
+    size_ok = (bw - 1) * (bh - 1) >= min_area
+
+    if border_margin > 0:
+        border_ok = ((x >= border_margin) & (y >= border_margin) &
+                     (x + bw <= w - border_margin) & (y + bh <= h - border_margin))
+    else:
+        border_ok = np.ones_like(size_ok)
+
+    keep = np.flatnonzero(size_ok & border_ok) + 1
+    excluded_size = int(np.count_nonzero(~size_ok))
+    excluded_border = int(np.count_nonzero(size_ok & ~border_ok))
+
+    return keep, excluded_size, excluded_border
+
+
+def exterior_background(mask):
+    """이미지 바깥과 이어진 배경(4-연결)을 128로 채운 1px 패딩 마스크
+
+    findContours(RETR_EXTERNAL)는 전경 8-연결/배경 4-연결 기준 최외곽 성분만 반환하므로,
+    바깥 배경에 닿는 성분만 외곽 성분.
+    """
+    padded = cv2.copyMakeBorder(mask, 1, 1, 1, 1, cv2.BORDER_CONSTANT, value=0)
+    cv2.floodFill(padded, None, (0, 0), 128, flags=4)
+    return padded
+
+
+def component_centroid(mask, cnt, bbox):
+    """외곽 contour 하나의 성분 픽셀 중심 (connectedComponentsWithStats centroid와 동일)
+
+    bbox crop 안에서만 라벨링하고 contour 시작점(최상단 행 첫 픽셀)의 성분을 선택.
+    """
+    x, y, bw, bh = (int(v) for v in bbox)
+    _, labels = cv2.connectedComponents(mask[y:y+bh, x:x+bw], connectivity=8)
+    sx, sy = cnt[0, 0]
+    ys, xs = np.nonzero(labels == labels[sy - y, sx - x])
+    n = len(xs)
+    return (int(xs.sum()) + x * n) / n, (int(ys.sum()) + y * n) / n
+
+
+def component_first_pixel(labels, label, stat):
+    """성분의 raster 순서 첫 픽셀 (x, y) - 최상단 행에서 가장 왼쪽"""
+    x, y, bw = int(stat[0]), int(stat[1]), int(stat[2])
+    return x + int(np.argmax(labels[y, x:x+bw] == label)), y
+
+
+def trace_component_contour(labels, label, bbox):
+    """label 성분 하나의 외곽 contour (전체 이미지 좌표)"""
+    x, y, bw, bh = bbox
+    component = (labels[y:y+bh, x:x+bw] == label).view(np.uint8)
+    contours, _ = cv2.findContours(component, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x, y))
+    return contours[0]
+
+
+def hole_image(hole, image=None):
+    """구멍 crop 이미지 (구멍 밖은 흰색) - 필요할 때 bbox + contour로 생성
+
+    hole에 미리 만든 'image'가 있으면 그대로 사용 (모자이크 합성 crop 등).
+    """
+    if 'image' in hole:
+        return hole['image']
+
+    x, y, bw, bh = hole['bbox']
+    hole_extracted = image[y:y+bh, x:x+bw].copy()
+    hole_mask_small = np.zeros((bh, bw), dtype=np.uint8)
+    cv2.drawContours(hole_mask_small, [hole['contour'] - np.int32([x, y])], -1, 255, -1)
+    hole_extracted[hole_mask_small == 0] = [255, 255, 255]
+    return hole_extracted
+
+
+def save_holes(holes, output_dir, image=None, crop_format='png', workers=4):
+    """구멍 crop 저장 (crop은 hole마다 저장 직전에 생성, hole_crops.py 참고)
+
+    Args:
+        output_dir: 결과 디렉토리 (png → output_dir/individual_holes/,
+                    atlas/zip → output_dir/individual_holes_atlas.* / individual_holes.zip)
+        crop_format: 'png' (구멍마다 파일), 'atlas' (한 장 + JSON index), 'zip' (무압축 zip)
+        workers: PNG 인코딩/저장 스레드 수
+    """
+    # 이전 실행의 다른 형식 결과 정리 (HoleCrops가 오래된 atlas/zip을 읽지 않도록)
+    for stale, fmt in ((ATLAS_INDEX, 'atlas'), (ATLAS_IMAGE, 'atlas'), (CROPS_ZIP, 'zip')):
+        stale_path = os.path.join(output_dir, stale)
+        if fmt != crop_format and os.path.exists(stale_path):
+            os.remove(stale_path)
+
+    holes = list(holes)
+    if crop_format == 'atlas':
+        atlas_w, atlas_h = save_crops_atlas(holes, lambda hole: hole_image(hole, image), output_dir)
+        print(f"  Crop atlas: {ATLAS_IMAGE} ({atlas_w}x{atlas_h}, {len(holes)} crops)")
+        return
+
+    crops = ((crop_filename(hole['id'], hole['bbox'], hole['area']), hole_image(hole, image)) for hole in holes)
+    if crop_format == 'zip':
+        save_crops_zip(crops, os.path.join(output_dir, CROPS_ZIP), workers)
+        print(f"  Crop archive: {CROPS_ZIP} ({len(holes)} crops)")
+    else:
+        save_crops_png(crops, os.path.join(output_dir, CROPS_DIRNAME), workers)
 
 
 def detect_tiled_edges(image, contour, margin_threshold=50):
     """타일 스캔에서 이어지는 변 vs 실제 가장자리 구분
 
     Args:
-        image: 원본 이미지
+        image: 원본 이미지 또는 ImageContext (shape만 사용)
         contour: 문서 contour
         margin_threshold: 이미지 끝으로부터 이 거리 안에 있으면 "이어지는 부분"
 
@@ -510,7 +1466,7 @@ def find_robust_rectangle_from_contour(contour, image_shape, corner_method='conv
         # 최소 면적 회전 사각형
         rect = cv2.minAreaRect(contour)
         box = cv2.boxPoints(rect)
-        box = np.int0(box)
+        box = np.intp(box)
 
         # Axis-aligned bounding box로 변환
         x_min, y_min = box.min(axis=0)
@@ -524,23 +1480,36 @@ def find_robust_rectangle_from_contour(contour, image_shape, corner_method='conv
         return cv2.boundingRect(contour)
 
 
-def find_grid_lines(image, min_line_length_ratio=0.3):
+GRID_LINE_METHODS = ['hough', 'projection']
+
+
+def find_grid_lines(image, min_line_length_ratio=0.3, method='hough'):
     """이미지에서 문서 격자를 형성하는 가로선/세로선 찾기
 
     Args:
-        image: 원본 이미지
+        image: 원본 이미지 또는 ImageContext
         min_line_length_ratio: 최소 직선 길이 비율
+        method: 'hough' (HoughLinesP) 또는 'projection' (행/열 edge 밀도 프로파일)
 
     Returns:
         (vertical_lines, horizontal_lines): 세로선 x좌표들, 가로선 y좌표들
     """
     h, w = image.shape[:2]
-    print(f"\n=== Grid Line Detection ===")
+    print(f"\n=== Grid Line Detection ({method}) ===")
 
     # Canny edge detection
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = ImageContext.of(image).gray
     edges = cv2.Canny(gray, 30, 100)
 
+    if method == 'projection':
+        v_lines = _profile_line_positions(edges, axis=0, min_length=int(h * min_line_length_ratio))
+        h_lines = _profile_line_positions(edges, axis=1, min_length=int(w * min_line_length_ratio))
+
+        print(f"  Vertical lines: {len(v_lines)} found at x={v_lines}")
+        print(f"  Horizontal lines: {len(h_lines)} found at y={h_lines}")
+
+        return v_lines, h_lines
+
     # Hough Line으로 직선 찾기
     min_length_h = int(w * min_line_length_ratio)  # 가로선 최소 길이
     min_length_v = int(h * min_line_length_ratio)  # 세로선 최소 길이
@@ -612,6 +1581,51 @@ def find_grid_lines(image, min_line_length_ratio=0.3):
     return v_lines, h_lines
 
 
+def _profile_line_positions(edges, axis, min_length, tolerance=3, group_threshold=50,
+                            background_window=201):
+    """Edge 밀도 프로파일에서 축 정렬 직선 위치 찾기 (sub-pixel)
+
+    axis=0이면 열(세로선), axis=1이면 행(가로선) 방향 프로파일.
+    1. 열/행별 edge 픽셀 수 (cv2.reduce)
+    2. ±tolerance 픽셀 box 합 (약간 기울어진 선 허용)
+    3. 넓은 box 평균(글자 등 배경 밀도)을 빼고 min_length 이상인 위치를 후보로
+    4. group_threshold 안의 후보를 하나로 묶고, 묶음 안 초과 밀도의 가중 중심 = 선 위치
+
+    Returns:
+        List[int]: 선 위치 (반올림), 오름차순
+    """
+    profile = cv2.reduce(edges, axis, cv2.REDUCE_SUM, dtype=cv2.CV_32F).reshape(-1) / 255.0
+    n = len(profile)
+    if n == 0:
+        return []
+
+    # 선 두께/기울기 허용 (box 합)
+    k = 2 * tolerance + 1
+    band = np.convolve(profile, np.ones(k, dtype=np.float32), mode='same')
+
+    # 배경(글자, 종이 질감) 밀도 제거
+    win = min(background_window, n | 1)
+    background = cv2.blur(band.reshape(1, -1), (win, 1), borderType=cv2.BORDER_REFLECT).reshape(-1)
+    excess = np.maximum(band - background, 0)
+
+    candidates = np.flatnonzero(excess >= min_length)
+    if len(candidates) == 0:
+        return []
+
+    # group_threshold 이내 후보끼리 묶기 (run 시작 위치)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(candidates) >= group_threshold) + 1])
+    ends = np.concatenate([starts[1:], [len(candidates)]])
+
+    positions = []
+    for s, e in zip(starts, ends):
+        lo, hi = candidates[s], candidates[e - 1] + 1
+        weights = excess[lo:hi]
+        center = float(np.dot(np.arange(lo, hi), weights) / weights.sum())
+        positions.append(int(round(center)))
+
+    return positions
+
+
 def create_grid_tiles(image_shape, v_lines, h_lines, margin=10):
     """격자선으로 타일 영역 생성
 
@@ -645,17 +1659,127 @@ def create_grid_tiles(image_shape, v_lines, h_lines, margin=10):
     return tiles
 
 
+def _close_open_rect(mask, kernel_close, kernel_open):
+    """문서 마스크 정리: 큰 CLOSE(내부 구멍 메우기) → 작은 OPEN(경계 보존)"""
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_close, kernel_close))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=1)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_open, kernel_open))
+    return cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
+
+
+# pyramid 정밀화 블록 크기 (전체 해상도 px)
+REFINE_BLOCK = 256
+
+
+def _refine_mask_block(image, out, x0, y0, x1, y1, b_thresh, kernel_close, kernel_open):
+    """전체 해상도 블록의 문서 마스크를 out[y0:y1, x0:x1]에 기록
+
+    블록 주변을 morphology halo만큼 넓혀 b > threshold → CLOSE/OPEN (전체 이미지에 한 번에
+    적용한 것과 같은 결과)
+    """
+    h, w = image.shape[:2]
+    pad = kernel_close + kernel_open + 2
+    px0, py0 = max(0, x0 - pad), max(0, y0 - pad)
+    px1, py1 = min(w, x1 + pad), min(h, y1 + pad)
+
+    b = cv2.cvtColor(image[py0:py1, px0:px1], cv2.COLOR_BGR2LAB)[..., 2]
+    _, mask = cv2.threshold(np.ascontiguousarray(b), b_thresh, 255, cv2.THRESH_BINARY)
+    mask = _close_open_rect(mask, kernel_close, kernel_open)
+    out[y0:y1, x0:x1] = mask[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+
+
+def detect_document_contour_pyramid(image, scale, kernel_close, kernel_open):
+    """Coarse-to-fine 문서 contour 검출
+
+    1. 1/scale 이미지에서 threshold + morphology + 가장 큰 contour (문서 영역 대략 위치)
+       threshold는 전체 해상도 b 히스토그램(band 단위 변환)의 Otsu
+    2. coarse 경계 주변 band에 걸친 블록만 전체 해상도로 재처리, 나머지는 coarse 문서 영역으로 채움
+       → 전체 해상도 마스크의 가장 큰 contour (전체 해상도 처리와 같은 경계 점)
+
+    Returns:
+        (contour, doc_mask, n_contours, area) 또는 None
+        contour: 전체 해상도 contour (N, 1, 2)
+        doc_mask: 정밀화한 전체 해상도 문서 마스크
+    """
+    h, w = image.shape[:2]
+    sw, sh = max(1, w // scale), max(1, h // scale)
+    sx, sy = w / sw, h / sh
+
+    # threshold는 전체 해상도 b 히스토그램의 Otsu (축소 이미지는 평균으로 히스토그램이 좁아져 값이 달라짐)
+    b_counts = np.zeros(256, dtype=np.int64)
+    for y0, y1 in _row_blocks(h, w, HIST_BLOCK_PIXELS):
+        lab_band = cv2.cvtColor(image[y0:y1], cv2.COLOR_BGR2LAB)
+        b_counts += cv2.calcHist([lab_band], [2], None, [256], [0, 256]).ravel().astype(np.int64)
+    b_thresh = HistogramPercentile.from_counts(b_counts).otsu()
+
+    small = cv2.resize(image, (sw, sh), interpolation=cv2.INTER_AREA)
+    b_small = np.ascontiguousarray(cv2.cvtColor(small, cv2.COLOR_BGR2LAB)[..., 2])
+    _, mask_small = cv2.threshold(b_small, b_thresh, 255, cv2.THRESH_BINARY)
+
+    k_close_small = max(3, int(round(kernel_close / scale)))
+    k_open_small = max(1, int(round(kernel_open / scale)))
+    mask_small = _close_open_rect(mask_small, k_close_small, k_open_small)
+
+    print(f"  Pyramid: 1/{scale} ({sw}x{sh}), b > {b_thresh:.1f} (Otsu, full resolution)")
+    print(f"  Morphology kernel: close={kernel_close}x{kernel_close}, open={kernel_open}x{kernel_open} "
+          f"(coarse: {k_close_small}, {k_open_small})")
+
+    contours, _ = cv2.findContours(mask_small, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        print("  ⚠️ No contours found!")
+        return None
+
+    largest = max(contours, key=cv2.contourArea)
+
+    # coarse 경계 주변 band: coarse 위치 오차(~scale px) + morphology 이동을 덮는 폭
+    doc_small = np.zeros_like(mask_small)
+    cv2.drawContours(doc_small, [largest], -1, 255, thickness=cv2.FILLED)
+    margin = int(2 * max(sx, sy)) + kernel_close
+    radius = int(np.ceil(margin / min(sx, sy)))
+    band = np.zeros_like(mask_small)
+    cv2.drawContours(band, [largest], -1, 255, thickness=1)
+    band = cv2.dilate(band, cv2.getStructuringElement(cv2.MORPH_RECT, (2 * radius + 1, 2 * radius + 1)))
+
+    # band 밖은 coarse 문서 영역으로 채우고, band에 걸친 블록만 전체 해상도로 다시 계산
+    doc_mask = cv2.resize(doc_small, (w, h), interpolation=cv2.INTER_NEAREST)
+    refined = 0
+    for y0 in range(0, h, REFINE_BLOCK):
+        for x0 in range(0, w, REFINE_BLOCK):
+            y1, x1 = min(h, y0 + REFINE_BLOCK), min(w, x0 + REFINE_BLOCK)
+            cy0, cy1 = int(y0 / sy), int(np.ceil(y1 / sy))
+            cx0, cx1 = int(x0 / sx), int(np.ceil(x1 / sx))
+            if band[cy0:cy1, cx0:cx1].any():
+                _refine_mask_block(image, doc_mask, x0, y0, x1, y1, b_thresh, kernel_close, kernel_open)
+                refined += 1
+
+    n_blocks = ((h + REFINE_BLOCK - 1) // REFINE_BLOCK) * ((w + REFINE_BLOCK - 1) // REFINE_BLOCK)
+    print(f"  Refined {refined}/{n_blocks} blocks ({REFINE_BLOCK}px) along the coarse boundary at full resolution")
+
+    contours, _ = cv2.findContours(doc_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        print("  ⚠️ No contours found at full resolution!")
+        return None
+    largest = max(contours, key=cv2.contourArea)
+
+    return largest, doc_mask, len(contours), cv2.contourArea(largest)
+
+
 def detect_document_boundary(image, method='brightness', corner_method='percentile',
-                             detect_tiles=False, debug=False, return_tile_edges=False):
+                             detect_tiles=False, debug=False, return_tile_edges=False, pyramid_scale=1,
+                             grid_method='hough'):
     """문서의 경계를 자동으로 감지하여 사각형 ROI 반환
 
     Args:
-        image: 입력 이미지 (BGR)
+        image: 입력 이미지 (BGR) 또는 ImageContext (변환 공유)
         method: 감지 방법 ('brightness', 'edges')
         corner_method: 코너 찾기 방법 ('convex', 'percentile', 'minarea', 'bbox')
         detect_tiles: 타일 스캔 세로선 감지 여부
         debug: 디버그 이미지 출력 여부
         return_tile_edges: 타일 경계 정보도 반환할지 여부
+        pyramid_scale: brightness 방법에서 1/scale 이미지로 문서 영역을 찾고
+                       경계 주변 블록만 전체 해상도로 재검출 (1이면 전체 해상도)
+        grid_method: 타일 격자선 감지 방법 ('hough' 또는 'projection')
 
     Returns:
         (x, y, w, h): 문서 영역의 bounding rectangle
@@ -665,50 +1789,52 @@ def detect_document_boundary(image, method='brightness', corner_method='percenti
     """
     print(f"\n=== Document Boundary Detection ({method}, corners={corner_method}) ===")
 
-    h, w = image.shape[:2]
+    ctx = ImageContext.of(image)
+    h, w = ctx.shape[:2]
 
     if method == 'brightness':
         # LAB b-channel 사용 (베이지색/노란색 기반) ⭐⭐⭐
         # 문서(종이)는 베이지/노란색, 배경(스캔)은 흰색
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-        L, a, b_channel = cv2.split(lab)
-
-        print(f"  L (brightness): {L.mean():.1f} ± {L.std():.1f}")
-        print(f"  b (yellowness): {b_channel.mean():.1f} ± {b_channel.std():.1f}")
-
-        # b-channel threshold 자동 계산 (Otsu)
-        # 문서 = 베이지색(b > threshold), 배경 = 흰색(b < threshold)
-        b_thresh, doc_mask = cv2.threshold(b_channel, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-
-        print(f"  Auto b-channel threshold: b > {b_thresh:.1f} (Otsu)")
-
         # Morphological operations로 정리 (최소한만 사용)
         # 문서 내부의 작은 구멍들은 채우되, boundary는 최대한 보존
         kernel_close = max(20, int(min(w, h) * 0.005))  # 내부 구멍 메우기용
         kernel_open = max(5, int(min(w, h) * 0.001))    # 외부 노이즈 제거용 (작게)
-        print(f"  Morphology kernel: close={kernel_close}x{kernel_close}, open={kernel_open}x{kernel_open}")
 
-        # Close는 크게 해서 내부 구멍 메우기
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_close, kernel_close))
-        doc_mask = cv2.morphologyEx(doc_mask, cv2.MORPH_CLOSE, kernel, iterations=1)
+        if pyramid_scale and pyramid_scale > 1:
+            # Coarse-to-fine: 축소 이미지에서 문서 영역, 경계 주변 블록은 전체 해상도로 재검출
+            result = detect_document_contour_pyramid(ctx.image, pyramid_scale, kernel_close, kernel_open)
+            if result is None:
+                return None
+            largest_contour, doc_mask, n_contours, largest_area = result
+        else:
+            L, a, b_channel = ctx.lab_channels
 
-        # Open은 작게 해서 경계 보존
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_open, kernel_open))
-        doc_mask = cv2.morphologyEx(doc_mask, cv2.MORPH_OPEN, kernel, iterations=1)
+            print(f"  L (brightness): {L.mean():.1f} ± {L.std():.1f}")
+            print(f"  b (yellowness): {b_channel.mean():.1f} ± {b_channel.std():.1f}")
 
-        # 가장 큰 contour 찾기 (문서 영역)
-        contours, _ = cv2.findContours(doc_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # b-channel threshold 자동 계산 (Otsu)
+            # 문서 = 베이지색(b > threshold), 배경 = 흰색(b < threshold)
+            b_thresh, doc_mask = cv2.threshold(b_channel, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
 
-        if not contours:
-            print("  ⚠️ No contours found!")
-            return None
+            print(f"  Auto b-channel threshold: b > {b_thresh:.1f} (Otsu)")
+            print(f"  Morphology kernel: close={kernel_close}x{kernel_close}, open={kernel_open}x{kernel_open}")
 
-        # 면적 기준 정렬
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)
-        largest_contour = contours[0]
-        largest_area = cv2.contourArea(largest_contour)
+            doc_mask = _close_open_rect(doc_mask, kernel_close, kernel_open)
 
-        print(f"  Found {len(contours)} contours")
+            # 가장 큰 contour 찾기 (문서 영역)
+            contours, _ = cv2.findContours(doc_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+            if not contours:
+                print("  ⚠️ No contours found!")
+                return None
+
+            # 면적 기준 정렬
+            contours = sorted(contours, key=cv2.contourArea, reverse=True)
+            largest_contour = contours[0]
+            largest_area = cv2.contourArea(largest_contour)
+            n_contours = len(contours)
+
+        print(f"  Found {n_contours} contours")
         print(f"  Largest contour area: {largest_area:,.0f} pixels ({largest_area/(w*h)*100:.1f}%)")
 
         # 가장 큰 contour가 이미지 전체의 최소 30% 이상이어야 함
@@ -717,7 +1843,7 @@ def detect_document_boundary(image, method='brightness', corner_method='percenti
             return None
 
         # Robust하게 사각형 찾기 (타일 경계 감지 위해 image 전달)
-        x, y, bw, bh = find_robust_rectangle_from_contour(largest_contour, (h, w), corner_method, image=image)
+        x, y, bw, bh = find_robust_rectangle_from_contour(largest_contour, (h, w), corner_method, image=ctx)
 
         print(f"  Document boundary: x={x}, y={y}, w={bw}, h={bh}")
         print(f"  Document size: {bw}x{bh} ({bw*bh:,} pixels, {bw*bh/(w*h)*100:.1f}%)")
@@ -726,11 +1852,11 @@ def detect_document_boundary(image, method='brightness', corner_method='percenti
         tile_edges_info = None
         if return_tile_edges and corner_method == 'edges':
             # detect_tiled_edges를 다시 호출해서 정보 가져오기
-            tile_edges_info = detect_tiled_edges(image, largest_contour, margin_threshold=50)
+            tile_edges_info = detect_tiled_edges(ctx, largest_contour, margin_threshold=50)
 
         # 타일 스캔 감지 (격자선으로 분할)
         if detect_tiles:
-            v_lines, h_lines = find_grid_lines(image)
+            v_lines, h_lines = find_grid_lines(ctx, method=grid_method)
 
             if v_lines or h_lines:
                 tiles = create_grid_tiles((h, w), v_lines, h_lines, margin=10)
@@ -756,7 +1882,7 @@ def detect_document_boundary(image, method='brightness', corner_method='percenti
 
     elif method == 'edges':
         # Canny edge detection으로 문서 경계 찾기
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = ctx.gray
         edges = cv2.Canny(gray, 50, 150)
 
         # Hough lines로 직선 찾기
@@ -801,13 +1927,14 @@ def detect_document_boundary(image, method='brightness', corner_method='percenti
         raise ValueError(f"Unknown method: {method}")
 
 
-def apply_document_boundary(mask, boundary, margin=0):
+def apply_document_boundary(mask, boundary, margin=0, in_place=False):
     """마스크에 문서 경계를 적용 (경계 밖 영역 제거)
 
     Args:
         mask: 입력 마스크 (이진 이미지)
         boundary: (x, y, w, h) 문서 경계
         margin: 경계에서 추가로 제외할 픽셀 수 (양수=안쪽으로, 음수=바깥쪽으로)
+        in_place: 새 마스크를 만들지 않고 입력 마스크의 경계 밖을 0으로 (streaming 모드)
 
     Returns:
         bounded_mask: 경계가 적용된 마스크
@@ -824,11 +1951,21 @@ def apply_document_boundary(mask, boundary, margin=0):
     x_end = min(w, x + bw - margin)
     y_end = min(h, y + bh - margin)
 
-    # 새로운 마스크 (경계 밖은 모두 0)
-    bounded_mask = np.zeros_like(mask)
-    bounded_mask[y_start:y_end, x_start:x_end] = mask[y_start:y_end, x_start:x_end]
+    before_pixels = np.count_nonzero(mask)
 
-    removed_pixels = (mask > 0).sum() - (bounded_mask > 0).sum()
+    if in_place:
+        # 경계 밖만 0으로 (추가 메모리 없음)
+        bounded_mask = mask
+        bounded_mask[:max(0, y_start)] = 0
+        bounded_mask[max(y_start, y_end):] = 0
+        bounded_mask[:, :max(0, x_start)] = 0
+        bounded_mask[:, max(x_start, x_end):] = 0
+    else:
+        # 새로운 마스크 (경계 밖은 모두 0)
+        bounded_mask = np.zeros_like(mask)
+        bounded_mask[y_start:y_end, x_start:x_end] = mask[y_start:y_end, x_start:x_end]
+
+    removed_pixels = before_pixels - np.count_nonzero(bounded_mask)
     removed_percent = removed_pixels / mask.size * 100
 
     print(f"\n=== Document Boundary Applied ===")
@@ -860,6 +1997,161 @@ def remove_tile_edge_artifacts(image, boundary, tile_edges, edge_width=3):
     return image
 
 
+def simplify_contour(contour, simplify_epsilon=1.0):
+    """윤곽선 단순화 (레이저 커팅에 최적화), 3점 미만이면 None"""
+    if len(contour) < 3:
+        return None
+
+    simplified = cv2.approxPolyDP(contour, simplify_epsilon, True)
+
+    if len(simplified) < 3:
+        return None
+    return simplified
+
+
+# 곡선 맞춤: 꺾이는 각도가 이보다 작은 꼭짓점은 같은 곡선 구간으로 묶음 (도)
+CURVE_CORNER_ANGLE = 50
+# 이보다 짧은 구간(다각형 변 수)은 직선 유지 (Bézier 1개 = 좌표 3개)
+CURVE_MIN_EDGES = 3
+
+
+def mm_to_pixels(tolerance_mm, dpi):
+    """허용 오차 mm → 스캔 픽셀"""
+    return tolerance_mm * dpi / 25.4
+
+
+def _vertex_indices(raw, poly):
+    """단순화 다각형 꼭짓점의 원본 contour index (contour 순서대로, 실패 시 None)"""
+    positions = {}
+    for i, (x, y) in enumerate(raw.tolist()):
+        positions.setdefault((x, y), []).append(i)
+
+    n = len(raw)
+    indices = []
+    travelled = 0
+    previous = None
+    for x, y in poly.tolist():
+        candidates = positions.get((x, y))
+        if not candidates:
+            return None
+        if previous is None:
+            index = candidates[0]
+        else:
+            # 직전 꼭짓점 다음에 처음 나오는 위치 (한 바퀴 순환)
+            index = min(candidates, key=lambda c: (c - previous - 1) % n)
+            travelled += (index - previous) % n
+        indices.append(index)
+        previous = index
+    if travelled + (indices[0] - indices[-1]) % n != n:
+        return None
+    return np.array(indices)
+
+
+def _polyline_distance(points, polyline):
+    """각 점에서 열린 polyline (선분들)까지의 최소 거리 (px)"""
+    a, b = polyline[:-1], polyline[1:]
+    ab = b - a
+    length2 = np.maximum((ab ** 2).sum(axis=1), 1e-12)
+    ap = points[:, None, :] - a[None, :, :]
+    t = np.clip((ap * ab[None]).sum(axis=2) / length2[None], 0, 1)
+    nearest = a[None] + t[..., None] * ab[None]
+    return np.hypot(*(points[:, None, :] - nearest).transpose(2, 0, 1)).min(axis=1)
+
+
+def _fit_cubic(points):
+    """끝점 고정 3차 Bézier 최소제곱 맞춤 (chord-length 매개변수)
+
+    오차는 양방향으로 측정: 펼친 곡선 (bezier_points) → contour 선분,
+    contour 점 → 펼친 곡선 선분. 둘 중 큰 값 (점 사이에서 곡선이 부푸는 경우 포함).
+
+    Returns:
+        (c1, c2, max_error): 정수로 반올림한 제어점과 최대 오차 (px)
+    """
+    points = points.astype(np.float64)
+    p0, p3 = points[0], points[-1]
+    chord = np.concatenate([[0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))])
+    t = (chord / chord[-1])[:, None]
+    mt = 1 - t
+    a = np.hstack([3 * mt ** 2 * t, 3 * mt * t ** 2])
+    rhs = points - mt ** 3 * p0 - t ** 3 * p3
+    (c1, c2), *_ = np.linalg.lstsq(a, rhs, rcond=None)
+    c1, c2 = np.rint(c1), np.rint(c2)
+    curve = np.vstack([p0[None], bezier_points(p0, c1, c2, p3)])
+    error = max(_polyline_distance(curve, points).max(), _polyline_distance(points, curve).max())
+    return c1, c2, float(error)
+
+
+def fit_contour_path(contour, tolerance_px, curves=False):
+    """contour → 허용 오차(px) 안의 직선/3차 Bézier path
+
+    approxPolyDP 다각형(직선, 오차 ≤ tolerance)에서 시작해, curves=True면
+    완만하게 꺾이는 꼭짓점이 CURVE_MIN_EDGES개 이상 이어지는 구간을 Bézier 하나로 대체
+    (곡선과 원본 contour 사이 양방향 최대 거리가 tolerance 이하일 때만, 아니면 반으로 나눠 재시도).
+
+    Returns:
+        (points (k, 2) int32, kinds (k,) uint8: 0=꼭짓점, 1=제어점) 또는 None
+    """
+    simplified = simplify_contour(contour, tolerance_px)
+    if simplified is None:
+        return None
+    poly = simplified.reshape(-1, 2)
+    lines = (poly, np.zeros(len(poly), dtype=np.uint8))
+    if not curves or len(poly) <= CURVE_MIN_EDGES:
+        return lines
+
+    raw = contour.reshape(-1, 2)
+    indices = _vertex_indices(raw, poly)
+    if indices is None:
+        return lines
+
+    # 꼭짓점 꺾임 각도 → corner (곡선 구간 경계)
+    incoming = poly - np.roll(poly, 1, axis=0)
+    outgoing = np.roll(poly, -1, axis=0) - poly
+    cross = incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0]
+    turn = np.degrees(np.abs(np.arctan2(cross, (incoming * outgoing).sum(axis=1))))
+    corners = np.flatnonzero(turn >= CURVE_CORNER_ANGLE)
+
+    # 시작점을 corner로 회전 (M 위치를 corner에)
+    shift = int(corners[0]) if len(corners) else 0
+    poly = np.roll(poly, -shift, axis=0)
+    indices = np.roll(indices, -shift)
+    is_corner = np.roll(turn >= CURVE_CORNER_ANGLE, -shift)
+    n_vertices, n_raw = len(poly), len(raw)
+
+    out_points = [poly[0]]
+    out_kinds = [0]
+
+    def emit(a, b):
+        """다각형 꼭짓점 a → b (b는 n_vertices까지, 순환) 구간 출력"""
+        if b - a < CURVE_MIN_EDGES:
+            for v in range(a + 1, b + 1):
+                out_points.append(poly[v % n_vertices])
+                out_kinds.append(0)
+            return
+        start, end = indices[a % n_vertices], indices[b % n_vertices]
+        span = (end - start) % n_raw or n_raw
+        c1, c2, error = _fit_cubic(raw[(start + np.arange(span + 1)) % n_raw])
+        if error <= tolerance_px:
+            out_points.extend([c1, c2, poly[b % n_vertices]])
+            out_kinds.extend([1, 1, 0])
+        else:
+            mid = (a + b) // 2
+            emit(a, mid)
+            emit(mid, b)
+
+    run_start = 0
+    for v in range(1, n_vertices + 1):
+        if v == n_vertices or is_corner[v]:
+            emit(run_start, v)
+            run_start = v
+
+    # 마지막 점(= 시작점)은 Z가 닫으므로 곡선 끝점이 아니면 제거
+    if out_kinds[-1] == 0 and (len(out_kinds) < 2 or out_kinds[-2] == 0):
+        out_points.pop()
+        out_kinds.pop()
+    return np.array(out_points, dtype=np.int32), np.array(out_kinds, dtype=np.uint8)
+
+
 def contour_to_svg_path(contour, simplify_epsilon=1.0):
     """OpenCV contour를 SVG path로 변환 (벡터화)
 
@@ -870,34 +2162,20 @@ def contour_to_svg_path(contour, simplify_epsilon=1.0):
     Returns:
         SVG path string (예: "M 10,20 L 30,40 L 50,30 Z")
     """
-    if len(contour) < 3:
-        return None
-
-    # 윤곽선 단순화 (레이저 커팅에 최적화)
-    simplified = cv2.approxPolyDP(contour, simplify_epsilon, True)
-
-    if len(simplified) < 3:
+    simplified = simplify_contour(contour, simplify_epsilon)
+    if simplified is None:
         return None
+    return points_to_svg_path(simplified)
 
-    path_data = []
 
-    # 시작점
-    start = simplified[0][0]
-    path_data.append(f'M {start[0]},{start[1]}')
-
-    # 나머지 점들
-    for point in simplified[1:]:
-        x, y = point[0]
-        path_data.append(f'L {x},{y}')
-
-    # 경로 닫기
-    path_data.append('Z')
-
-    return ' '.join(path_data)
+def points_to_svg_path(simplified, compact=False):
+    """단순화된 contour (N, 1, 2) → SVG path 문자열 (compact: 상대 좌표 + h/v)"""
+    return encode_paths(simplified.reshape(-1, 2), [0, len(simplified)], compact)[0]
 
 
 def save_holes_svg(holes, image_width, image_height, output_dir,
-                   simplify_epsilon=1.0, dpi=300, unified=True, individual=True):
+                   simplify_epsilon=1.0, dpi=300, unified=True, individual=True, pretty=True,
+                   compact=False, svgz=False, workers=1, tolerance_mm=None, curves=False):
     """구멍들을 SVG 벡터 형식으로 저장 (레이저 커팅용)
 
     Args:
@@ -908,6 +2186,13 @@ def save_holes_svg(holes, image_width, image_height, output_dir,
         dpi: 이미지 DPI (물리적 크기 계산용, 기본 300)
         unified: 전체 통합 SVG 파일 생성 여부
         individual: 개별 구멍 SVG 파일 생성 여부
+        pretty: 들여쓰기/줄바꿈 포함 여부 (False면 한 줄 XML)
+        compact: path를 상대 좌표 m/l/h/v로 인코딩 (파일 크기 감소)
+        svgz: 통합 SVG를 gzip 압축 (all_holes_vector.svgz)
+        workers: 구멍 묶음별 단순화/인코딩/개별 SVG 저장 스레드 수 (결과 순서는 동일)
+        tolerance_mm: 허용 오차 (mm, dpi 기준) - 지정하면 simplify_epsilon 대신 사용하고
+                      구멍별 단순화 결과를 svg_simplification_report.csv로 저장
+        curves: tolerance_mm 모드에서 완만한 구간을 3차 Bézier로 맞춤
     """
     os.makedirs(output_dir, exist_ok=True)
     svg_dir = os.path.join(output_dir, 'svg_vectors')
@@ -921,66 +2206,140 @@ def save_holes_svg(holes, image_width, image_height, output_dir,
     print(f"\n=== SVG Vector Export ===")
     print(f"  Image size: {image_width}x{image_height} pixels")
     print(f"  Physical size: {width_mm:.1f}x{height_mm:.1f} mm (at {dpi} DPI)")
-    print(f"  Simplification: {simplify_epsilon}")
+    if tolerance_mm is not None:
+        simplify_epsilon = mm_to_pixels(tolerance_mm, dpi)
+        print(f"  Tolerance: {tolerance_mm} mm = {simplify_epsilon:.2f} px{' (lines + Bézier curves)' if curves else ''}")
+    else:
+        print(f"  Simplification: {simplify_epsilon}")
     print(f"  Total holes: {len(holes)}")
 
-    # 각 구멍을 SVG path로 변환
-    hole_paths = []
-    total_points_before = 0
-    total_points_after = 0
+    # 각 hole에 contour가 저장되어 있음
+    holes = [hole for hole in holes if 'contour' in hole]
 
-    for hole in holes:
-        # 각 hole에 contour가 저장되어 있음
-        if 'contour' not in hole:
-            continue
-
-        contour = hole['contour']
-        total_points_before += len(contour)
-
-        path_data = contour_to_svg_path(contour, simplify_epsilon)
-        if path_data:
-            # 단순화 후 포인트 수 계산
-            total_points_after += path_data.count('L') + 1
-
-            hole_info = {
-                'id': hole['id'],
-                'path': path_data,
-                'bbox': hole['bbox'],
-                'area_px': hole['area'],
-                'area_mm2': (hole['area'] / (dpi / mm_per_inch) ** 2)
-            }
-            hole_paths.append(hole_info)
-
-            # 개별 SVG 파일 저장
-            if individual:
-                x, y, w, h = hole['bbox']
-                individual_svg_path = os.path.join(
-                    svg_dir,
-                    f"hole_{hole['id']:04d}_x{x}_y{y}_a{int(hole['area'])}.svg"
-                )
-                create_individual_svg(hole_info, image_width, image_height,
-                                    width_mm, height_mm, individual_svg_path)
+    def export_chunk(chunk):
+        """구멍 묶음: 단순화 → path 인코딩 → 개별 SVG 저장"""
+        chunk_paths = []
+        points_before = 0
+        for hole in chunk:
+            contour = hole['contour']
+            points_before += len(contour)
+
+            if tolerance_mm is not None:
+                fitted = fit_contour_path(contour, simplify_epsilon, curves)
+            else:
+                simplified = simplify_contour(contour, simplify_epsilon)
+                fitted = None if simplified is None else (simplified.reshape(-1, 2), None)
+            if fitted is not None:
+                chunk_paths.append({
+                    'id': hole['id'],
+                    'points': fitted[0],
+                    'kinds': fitted[1],
+                    'contour_points': len(contour),
+                    'bbox': hole['bbox'],
+                    'area_px': hole['area'],
+                    'area_mm2': (hole['area'] / (dpi / mm_per_inch) ** 2)
+                })
+
+        # path 문자열 일괄 생성 (좌표 포맷은 numpy로 한 번에)
+        if chunk_paths:
+            offsets = np.concatenate([[0], np.cumsum([len(hole_info['points']) for hole_info in chunk_paths])])
+            kinds = (np.concatenate([hole_info['kinds'] for hole_info in chunk_paths])
+                     if tolerance_mm is not None else None)
+            paths = encode_paths(np.concatenate([hole_info['points'] for hole_info in chunk_paths]), offsets,
+                                 compact, kinds)
+            for hole_info, path_data in zip(chunk_paths, paths):
+                hole_info['path'] = path_data
+
+        # 개별 SVG 파일 저장
+        if individual:
+            write_individual_svgs(chunk_paths, image_width, image_height, svg_dir, pretty=pretty, dpi=dpi)
+        return chunk_paths, points_before
+
+    # 연속 구간으로 나눠 스레드 풀에서 처리 (cv2/파일 I/O는 GIL 해제), 결과는 구멍 순서대로 합침
+    workers = max(1, workers or 1)
+    n_chunks = min(len(holes), workers * 4) if workers > 1 else 1
+    bounds = np.linspace(0, len(holes), n_chunks + 1).astype(int)
+    results = _map_bands(export_chunk, [holes[a:b] for a, b in zip(bounds[:-1], bounds[1:])], workers)
+
+    hole_paths = [hole_info for chunk_paths, _ in results for hole_info in chunk_paths]
+    total_points_before = sum(points_before for _, points_before in results)
+    total_points_after = sum(path_nodes(hole_info) for hole_info in hole_paths)
 
     if total_points_before > 0:
         reduction = (1 - total_points_after / total_points_before) * 100
         print(f"  Path simplification: {total_points_before:,} → {total_points_after:,} points ({reduction:.1f}% reduction)")
 
+    if tolerance_mm is not None:
+        report_path = os.path.join(output_dir, 'svg_simplification_report.csv')
+        save_simplification_report(hole_paths, report_path)
+        curve_count = sum(int(hole_info['kinds'].sum()) // 2 for hole_info in hole_paths)
+        print(f"  Bézier segments: {curve_count:,}")
+        print(f"  Simplification report: {report_path}")
+
     # 전체 통합 SVG 파일 저장
     if unified and hole_paths:
-        unified_svg_path = os.path.join(output_dir, 'all_holes_vector.svg')
+        unified_svg_path = os.path.join(output_dir, 'all_holes_vector.svgz' if svgz else 'all_holes_vector.svg')
         create_unified_svg(hole_paths, image_width, image_height,
-                          width_mm, height_mm, unified_svg_path)
+                          width_mm, height_mm, unified_svg_path, pretty=pretty)
         print(f"  Unified SVG: {unified_svg_path}")
 
+    # 하위 스크립트용 형상 sidecar (XML 파싱 없이 memory-map으로 로드)
+    geometry_path = os.path.join(svg_dir, GEOMETRY_FILENAME)
+    save_holes_geometry(hole_paths, image_width, image_height, dpi, geometry_path)
+    print(f"  Geometry sidecar: {geometry_path}")
+
     print(f"  Individual SVGs: {svg_dir}/")
     print(f"  Total exported: {len(hole_paths)} holes")
 
 
-def create_individual_svg(hole_info, img_w, img_h, width_mm, height_mm, svg_path):
-    """개별 구멍 SVG 파일 생성 (중앙 배치, 원본 좌표 유지)"""
-
-    # Bounding box 계산 (약간의 여백 추가)
-    x, y, w, h = hole_info['bbox']
+def path_nodes(hole_info):
+    """path 꼭짓점 수 (Bézier 제어점 제외)"""
+    kinds = hole_info.get('kinds')
+    return len(hole_info['points']) if kinds is None else int((kinds == 0).sum())
+
+
+def save_simplification_report(hole_paths, report_path):
+    """구멍별 단순화 결과 CSV (contour 점 → path 꼭짓점/곡선 수)"""
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write('hole_id,contour_points,path_nodes,bezier_segments,path_coordinates,reduction_pct\n')
+        for hole_info in hole_paths:
+            nodes = path_nodes(hole_info)
+            curves = int(hole_info['kinds'].sum()) // 2 if hole_info.get('kinds') is not None else 0
+            reduction = (1 - nodes / hole_info['contour_points']) * 100
+            f.write(f"{hole_info['id']},{hole_info['contour_points']},{nodes},{curves},"
+                    f"{len(hole_info['points'])},{reduction:.1f}\n")
+
+
+def save_holes_geometry(hole_paths, img_w, img_h, dpi, geometry_path):
+    """SVG에 쓴 path 좌표/메타데이터를 바이너리 sidecar로 저장 (hole_geometry.py)"""
+    records = np.zeros(len(hole_paths), dtype=RECORD_DTYPE)
+    for record, hole_info in zip(records, hole_paths):
+        x, y, w, h = hole_info['bbox']
+        vb_x, vb_y, vb_w, vb_h, physical_w, physical_h = individual_svg_viewbox(hole_info['bbox'], img_w, img_h, dpi)
+        record['id'] = hole_info['id']
+        record['x'], record['y'], record['w'], record['h'] = x, y, w, h
+        record['area_px'] = hole_info['area_px']
+        record['area_mm2'] = hole_info['area_mm2']
+        record['vb_x'], record['vb_y'], record['vb_w'], record['vb_h'] = vb_x, vb_y, vb_w, vb_h
+        # 개별 SVG의 width/height 속성과 같은 값 (소수 2자리)
+        record['width_mm'] = float(f'{physical_w:.2f}')
+        record['height_mm'] = float(f'{physical_h:.2f}')
+
+    lengths = [len(hole_info['points']) for hole_info in hole_paths]
+    offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    points = (np.concatenate([hole_info['points'] for hole_info in hole_paths])
+              if hole_paths else np.zeros((0, 2), dtype=np.int32))
+    kinds = None
+    if any(hole_info.get('kinds') is not None for hole_info in hole_paths):
+        kinds = np.concatenate([hole_info['kinds'] if hole_info.get('kinds') is not None
+                                else np.zeros(len(hole_info['points']), dtype=np.uint8)
+                                for hole_info in hole_paths])
+    write_geometry(geometry_path, records, points, offsets, dpi, (img_w, img_h), kinds)
+
+
+def individual_svg_viewbox(bbox, img_w, img_h, dpi=300):
+    """개별 SVG viewBox (구멍 주변 여백 포함)와 물리적 크기(mm, --svg-dpi 기준)"""
+    x, y, w, h = bbox
     margin = max(10, int(max(w, h) * 0.1))  # 10% 여백 또는 최소 10px
 
     vb_x = max(0, x - margin)
@@ -989,12 +2348,22 @@ def create_individual_svg(hole_info, img_w, img_h, width_mm, height_mm, svg_path
     vb_h = min(img_h - vb_y, h + margin * 2)
 
     # 물리적 크기 계산 (DPI 기준)
-    dpi = 300
     inch_to_mm = 25.4
     physical_w = (vb_w / dpi) * inch_to_mm
     physical_h = (vb_h / dpi) * inch_to_mm
+    return vb_x, vb_y, vb_w, vb_h, physical_w, physical_h
+
 
-    svg = ET.Element('svg', {
+def write_individual_svg(f, hole_info, img_w, img_h, pretty=True, dpi=300):
+    """개별 구멍 SVG를 파일 핸들에 스트리밍 출력"""
+
+    # Bounding box 계산 (약간의 여백 추가)
+    x, y, w, h = hole_info['bbox']
+    vb_x, vb_y, vb_w, vb_h, physical_w, physical_h = individual_svg_viewbox(hole_info['bbox'], img_w, img_h, dpi)
+
+    svg = SVGWriter(f, pretty)
+    svg.declaration()
+    svg.start('svg', {
         'xmlns': 'http://www.w3.org/2000/svg',
         'width': f'{physical_w:.2f}mm',
         'height': f'{physical_h:.2f}mm',
@@ -1002,16 +2371,17 @@ def create_individual_svg(hole_info, img_w, img_h, width_mm, height_mm, svg_path
     })
 
     # 메타데이터 (원본 위치 정보 포함)
-    metadata = ET.SubElement(svg, 'metadata')
-    ET.SubElement(metadata, 'hole_id').text = str(hole_info['id'])
-    ET.SubElement(metadata, 'original_position').text = f"x={x}, y={y}"
-    ET.SubElement(metadata, 'original_image_size').text = f"{img_w}x{img_h}"
-    ET.SubElement(metadata, 'bbox').text = f"x={x}, y={y}, w={w}, h={h}"
-    ET.SubElement(metadata, 'area_pixels').text = f"{hole_info['area_px']:.0f}"
-    ET.SubElement(metadata, 'area_mm2').text = f"{hole_info['area_mm2']:.2f}"
+    svg.metadata({
+        'hole_id': str(hole_info['id']),
+        'original_position': f"x={x}, y={y}",
+        'original_image_size': f"{img_w}x{img_h}",
+        'bbox': f"x={x}, y={y}, w={w}, h={h}",
+        'area_pixels': f"{hole_info['area_px']:.0f}",
+        'area_mm2': f"{hole_info['area_mm2']:.2f}",
+    })
 
     # 구멍 path (원본 좌표 그대로 - viewBox가 자동으로 확대)
-    path = ET.SubElement(svg, 'path', {
+    svg.element('path', {
         'id': f"hole_{hole_info['id']}",
         'd': hole_info['path'],
         'fill': 'none',
@@ -1019,70 +2389,198 @@ def create_individual_svg(hole_info, img_w, img_h, width_mm, height_mm, svg_path
         'stroke-width': '1',
         'vector-effect': 'non-scaling-stroke'
     })
+    svg.end('svg')
 
-    # 저장
-    xml_string = ET.tostring(svg, encoding='unicode')
-    dom = minidom.parseString(xml_string)
-    with open(svg_path, 'w', encoding='utf-8') as f:
-        f.write(dom.toprettyxml(indent='  '))
 
+def write_individual_svgs(hole_paths, img_w, img_h, svg_dir, pretty=True, dpi=300):
+    """개별 SVG 일괄 저장 - 문서를 버퍼 하나에 만든 뒤 파일마다 한 번에 write"""
+    buffer = io.StringIO()
+    for hole_info in hole_paths:
+        x, y, w, h = hole_info['bbox']
+        svg_path = os.path.join(svg_dir, f"hole_{hole_info['id']:04d}_x{x}_y{y}_a{int(hole_info['area_px'])}.svg")
+        buffer.seek(0)
+        buffer.truncate()
+        write_individual_svg(buffer, hole_info, img_w, img_h, pretty, dpi)
+        with open(svg_path, 'w', encoding='utf-8') as f:
+            f.write(buffer.getvalue())
 
-def create_unified_svg(hole_paths, img_w, img_h, width_mm, height_mm, svg_path):
-    """전체 구멍 통합 SVG 파일 생성 (레이저 커팅용)"""
-    svg = ET.Element('svg', {
-        'xmlns': 'http://www.w3.org/2000/svg',
-        'width': f'{width_mm}mm',
-        'height': f'{height_mm}mm',
-        'viewBox': f'0 0 {img_w} {img_h}'
-    })
 
-    # 메타데이터
-    metadata = ET.SubElement(svg, 'metadata')
-    ET.SubElement(metadata, 'total_holes').text = str(len(hole_paths))
-    ET.SubElement(metadata, 'document_size_mm').text = f'{width_mm:.1f}x{height_mm:.1f}'
+def create_unified_svg(hole_paths, img_w, img_h, width_mm, height_mm, svg_path, pretty=True):
+    """전체 구멍 통합 SVG 파일 생성 (레이저 커팅용)"""
+    with open_svg(svg_path) as f:
+        svg = SVGWriter(f, pretty)
+        svg.declaration()
+        svg.start('svg', {
+            'xmlns': 'http://www.w3.org/2000/svg',
+            'width': f'{width_mm}mm',
+            'height': f'{height_mm}mm',
+            'viewBox': f'0 0 {img_w} {img_h}'
+        })
 
-    # 모든 구멍을 하나의 그룹으로
-    group = ET.SubElement(svg, 'g', {
-        'id': 'all_holes',
-        'fill': 'none',
-        'stroke': 'black',
-        'stroke-width': '1'
-    })
+        # 메타데이터
+        svg.metadata({
+            'total_holes': str(len(hole_paths)),
+            'document_size_mm': f'{width_mm:.1f}x{height_mm:.1f}',
+        })
 
-    for hole_info in hole_paths:
-        path = ET.SubElement(group, 'path', {
-            'id': f"hole_{hole_info['id']:04d}",
-            'd': hole_info['path'],
-            'data-area-px': f"{hole_info['area_px']:.0f}",
-            'data-area-mm2': f"{hole_info['area_mm2']:.2f}"
+        # 모든 구멍을 하나의 그룹으로
+        svg.start('g', {
+            'id': 'all_holes',
+            'fill': 'none',
+            'stroke': 'black',
+            'stroke-width': '1'
         })
 
-    # 저장
-    xml_string = ET.tostring(svg, encoding='unicode')
-    dom = minidom.parseString(xml_string)
-    with open(svg_path, 'w', encoding='utf-8') as f:
-        f.write(dom.toprettyxml(indent='  '))
+        for hole_info in hole_paths:
+            svg.element('path', {
+                'id': f"hole_{hole_info['id']:04d}",
+                'd': hole_info['path'],
+                'data-area-px': f"{hole_info['area_px']:.0f}",
+                'data-area-mm2': f"{hole_info['area_mm2']:.2f}"
+            })
+
+        svg.end('g')
+        svg.end('svg')
+
 
+def detect_holes_with_params(image, params, boundary=None, reference_shape=None, keep_region=None, workers=1):
+    """params(main()의 검출 옵션 dict)로 흰색 감지 → 경계 적용 → 구멍 추출
 
-def create_comparison(original, holes, output_path, boundary=None):
+    타일/모자이크 작업자에서 공통으로 사용.
+    workers: 작업자 안의 스레드 수 (프로세스 풀에서는 1 - 프로세스 × 스레드로 늘지 않도록)
+
+    Returns:
+        (holes, mask): HoleTable (image 좌표), 경계가 적용된 흰색 마스크
+    """
+    h, w = image.shape[:2]
+
+    use_lut = params['lut'] and lut_supported(params['method'], params['s_threshold'], params['v_threshold'])
+    if use_lut:
+        mask, _ = detect_whiteness_lut(image, params['method'], params['s_threshold'],
+                                       params['v_threshold'], cache_dir=params['lut_cache_dir'],
+                                       workers=workers, lut=params.get('lut_table'))
+    elif params['band_rows']:
+        mask, _ = detect_whiteness_banded(image, params['method'], params['s_percentile'],
+                                          params['v_percentile'], params['s_threshold'],
+                                          params['v_threshold'], band_rows=params['band_rows'], workers=workers)
+    else:
+        mask, _ = detect_whiteness(image, params['method'], params['s_percentile'],
+                                   params['v_percentile'], params['s_threshold'], params['v_threshold'],
+                                   workers=workers)
+
+    # 경계가 없으면 image 전체가 문서 영역 (boundary margin만 적용)
+    if boundary is not None or params['boundary_margin']:
+        mask = apply_document_boundary(mask, boundary or (0, 0, w, h), params['boundary_margin'], in_place=True)
+
+    holes = extract_individual_holes(image, mask, params['min_area'], params['max_area'],
+                                     enhance_holes=params['enhance_holes'],
+                                     dilation_size=params['dilation_size'],
+                                     border_margin=params['border_margin'],
+                                     band_rows=params['band_rows'], workers=workers,
+                                     reference_shape=reference_shape,
+                                     keep_region=keep_region)
+    return holes, mask
+
+
+def detect_tile_holes(task):
+    """타일 하나에서 흰색 감지 + 구멍 추출 (프로세스 풀 작업 단위)
+
+    Args:
+        task: (tile_index, (x, y, w, h), tile_image, image_shape, params)
+              params: main()의 검출 옵션 dict
+
+    Returns:
+        (tile_index, holes, tile_mask, log)
+        holes의 bbox/contour는 전체 이미지 좌표, log는 타일 처리 출력 (순서대로 출력용)
+    """
+    index, (tx, ty, tw, th), tile_image, image_shape, params = task
+
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        print(f"\n{'='*60}")
+        print(f"Tile {index + 1}: x={tx}, y={ty}, w={tw}, h={th}")
+        print(f"{'='*60}")
+
+        # 타일 자체가 문서 영역 (boundary margin은 타일 기준)
+        holes, mask = detect_holes_with_params(tile_image, params, reference_shape=image_shape)
+
+    # 전체 이미지 좌표로 변환
+    return index, holes.offset(tx, ty), mask, log.getvalue()
+
+
+def detect_holes_in_tiles(image, tiles, params, workers=None):
+    """모든 타일을 프로세스 풀에서 병렬 처리하고 하나의 구멍 목록으로 병합
+
+    타일 순서대로 결과를 모으므로 worker 수와 관계없이 결과가 동일.
+
+    Returns:
+        (holes, white_mask): 전체 이미지 좌표의 HoleTable, 타일 마스크를 합친 전체 마스크
+    """
+    h, w = image.shape[:2]
+    workers = workers or min(len(tiles), os.cpu_count() or 1)
+
+    print(f"\n=== Multi-tile Detection ===")
+    print(f"  Tiles: {len(tiles)}, process workers: {workers}")
+
+    tasks = [(i, tile, image[tile[1]:tile[1] + tile[3], tile[0]:tile[0] + tile[2]], (h, w), params)
+             for i, tile in enumerate(tiles)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(detect_tile_holes, tasks))
+    else:
+        results = [detect_tile_holes(task) for task in tasks]
+
+    white_mask = np.zeros((h, w), dtype=np.uint8)
+    for index, tile_holes, tile_mask, log in results:
+        print(log, end='')
+        tx, ty, tw, th = tiles[index]
+        white_mask[ty:ty + th, tx:tx + tw] = tile_mask
+    holes = HoleTable.concatenate([r[1] for r in results])
+
+    print(f"\n  Holes per tile: {[len(r[1]) for r in results]}")
+    print(f"  Total holes (all tiles): {len(holes)}")
+
+    return holes, white_mask
+
+
+# --stream 비교 이미지의 긴 변 (px) - 전체 해상도 h x 2w 캔버스를 만들지 않음
+STREAM_COMPARISON_SIDE = 2048
+
+
+def create_comparison(original, holes, output_path, boundary=None, max_side=None):
+    """원본 | 구멍 표시 비교 이미지
+
+    boundary: 문서 경계 (x, y, w, h) 또는 타일 경계 리스트
+    max_side: 지정하면 원본을 긴 변이 max_side가 되도록 축소해서 그림 (--stream)
+    """
     h, w = original.shape[:2]
-    comparison = np.zeros((h, w*2, 3), dtype=np.uint8)
+    scale = 1.0
+    if max_side and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        original = cv2.resize(original, (max(1, round(w * scale)), max(1, round(h * scale))),
+                              interpolation=cv2.INTER_AREA)
+        h, w = original.shape[:2]
+
+    def rect(x, y, rw, rh):
+        return (round(x * scale), round(y * scale)), (round((x + rw) * scale), round((y + rh) * scale))
+
+    comparison = np.empty((h, w*2, 3), dtype=np.uint8)
 
     comparison[0:h, 0:w] = original
+    comparison[0:h, w:2*w] = original
 
-    mapped = original.copy()
+    # 오른쪽 절반 view에 직접 그리기 (원본 크기 복사본 추가 생성 없음)
+    mapped = comparison[0:h, w:2*w]
 
     # 문서 경계 표시 (파란색 사각형)
     if boundary is not None:
-        bx, by, bw, bh = boundary
-        cv2.rectangle(mapped, (bx, by), (bx+bw, by+bh), (255, 0, 0), 1)
+        for bx, by, bw, bh in (boundary if isinstance(boundary, list) else [boundary]):
+            cv2.rectangle(mapped, *rect(bx, by, bw, bh), (255, 0, 0), 1)
 
     # 구멍 표시 (녹색 사각형)
     for hole in holes:
-        x, y, hw, hh = hole['bbox']
-        cv2.rectangle(mapped, (x, y), (x+hw, y+hh), (0, 255, 0), 1)
-
-    comparison[0:h, w:2*w] = mapped
+        cv2.rectangle(mapped, *rect(*hole['bbox']), (0, 255, 0), 1)
 
     font = cv2.FONT_HERSHEY_SIMPLEX
     cv2.putText(comparison, "Original", (10, 30), font, 1.0, (255, 255, 255), 2)
@@ -1118,6 +2616,25 @@ def main():
                        help='Dilation kernel size for hole enhancement (default: 5)')
     parser.add_argument('--border-margin', type=int, default=0,
                        help='Exclude holes near image border (7216x5412 reference, auto-scaled, default: 0=disabled)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Band-streamed detection and morphology with bounded memory (same mask as in-memory path). '
+                            'Hole extraction then uses findContours instead of connected-component labels '
+                            '(no full-res int32 label array, about 4x the mask size)')
+    parser.add_argument('--band-rows', type=int, default=DEFAULT_BAND_ROWS,
+                       help=f'Rows per band for --stream/--workers (default: {DEFAULT_BAND_ROWS})')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Threads for band-parallel detection and morphology (results identical to serial, default: 1)')
+    parser.add_argument('--lut', action='store_true',
+                       help='Use precomputed BGR->mask lookup table (lab_b/hsv/lab_hsv with absolute thresholds only)')
+    parser.add_argument('--lut-cache-dir', type=str, default=DEFAULT_LUT_CACHE_DIR,
+                       help=f'Lookup table cache directory (default: {DEFAULT_LUT_CACHE_DIR})')
+
+    parser.add_argument('--skip-crops', action='store_true',
+                       help='Do not write individual_holes/*.png crops (e.g. SVG-only runs)')
+    parser.add_argument('--crop-format', type=str, default='png', choices=CROP_FORMATS,
+                       help='Hole crops: png=one file per hole, atlas=one image + JSON index, zip=one uncompressed zip (default: png)')
+    parser.add_argument('--crop-workers', type=int, default=4,
+                       help='Threads for PNG encoding/writing of hole crops (default: 4)')
 
     # 문서 경계 감지 옵션
     parser.add_argument('--crop-document', action='store_true',
@@ -1132,6 +2649,14 @@ def main():
                        help='Additional margin from document boundary in pixels (positive=inward, negative=outward, default: 0)')
     parser.add_argument('--detect-tiles', action='store_true',
                        help='Detect vertical separators in tiled scans (multiple documents side by side)')
+    parser.add_argument('--process-tiles', action='store_true',
+                       help='With --detect-tiles: detect holes in every tile (process pool) and merge into one result')
+    parser.add_argument('--tile-workers', type=int, default=None,
+                       help='Processes for --process-tiles (default: min(tiles, CPU count))')
+    parser.add_argument('--grid-method', type=str, default='hough', choices=GRID_LINE_METHODS,
+                       help='Grid line detector for --detect-tiles: hough=HoughLinesP, projection=edge density profiles (default: hough)')
+    parser.add_argument('--boundary-scale', type=int, default=1,
+                       help='Coarse-to-fine boundary: find document at 1/N scale, refine edges at full resolution (e.g. 8, default: 1=off)')
 
     # SVG 벡터 출력 옵션
     parser.add_argument('--export-svg', action='store_true',
@@ -1144,11 +2669,22 @@ def main():
                        help='Export individual SVG files for each hole')
     parser.add_argument('--svg-unified', action='store_true', default=True,
                        help='Export unified SVG file with all holes (default: True)')
+    parser.add_argument('--svg-no-indent', action='store_true',
+                       help='Write SVG without pretty-print indentation/newlines (smaller files)')
+    parser.add_argument('--svg-compact', action='store_true',
+                       help='Compact path encoding: relative m/l commands, h/v for axis-aligned runs, no indentation')
+    parser.add_argument('--svgz', action='store_true',
+                       help='Write the unified SVG gzip-compressed (all_holes_vector.svgz)')
+    parser.add_argument('--svg-workers', type=int, default=1,
+                       help='Threads for per-hole SVG export (simplify/encode/write, default: 1)')
+    parser.add_argument('--svg-tolerance-mm', type=float, default=None,
+                       help='Simplification tolerance in mm at --svg-dpi (replaces --svg-simplify, writes svg_simplification_report.csv)')
+    parser.add_argument('--svg-curves', action='store_true',
+                       help='With --svg-tolerance-mm: fit cubic Bezier curves to smooth runs within the tolerance')
 
     args = parser.parse_args()
 
     os.makedirs(args.output_dir, exist_ok=True)
-    holes_dir = os.path.join(args.output_dir, 'individual_holes')
 
     # 로드
     print(f"Loading: {args.input}")
@@ -1165,26 +2701,34 @@ def main():
     h, w = image.shape[:2]
     print(f"Size: {w}x{h}")
 
+    # 색공간 변환 공유 (경계 감지 ↔ 흰색 감지)
+    ctx = ImageContext(image)
+
     # 문서 경계 감지
     document_boundary = None
     tile_edges = None
+    tiles = None
     image_cleaned = image  # 경계선 제거 전 원본
 
     if args.crop_document:
-        result = detect_document_boundary(image,
+        result = detect_document_boundary(ctx,
                                          method=args.boundary_method,
                                          corner_method=args.corner_method,
                                          detect_tiles=args.detect_tiles,
-                                         return_tile_edges=True)
+                                         return_tile_edges=True,
+                                         pyramid_scale=args.boundary_scale,
+                                         grid_method=args.grid_method)
 
         # 단일 경계 또는 여러 타일
         if result is not None:
             # 타일인지 단일 경계인지 확인
             if isinstance(result, list):
                 # 여러 타일
-                document_boundary = result[0]  # 첫 번째 타일만 사용 (임시)
-                print(f"\n[WARNING] Multiple tiles detected, but currently using only first tile")
-                print(f"   To process all tiles separately, future implementation needed")
+                tiles = result
+                if not args.process_tiles:
+                    document_boundary = result[0]  # 첫 번째 타일만 사용
+                    print(f"\n[WARNING] Multiple tiles detected, but using only first tile")
+                    print(f"   Use --process-tiles to detect holes in all tiles")
 
                 # 모든 타일 시각화 (격자로 표시)
                 vis_img = image.copy()
@@ -1214,43 +2758,96 @@ def main():
                 cv2.rectangle(vis_img, (bx, by), (bx+bw, by+bh), (255, 0, 0), 1)
                 cv2.imwrite(f"{args.output_dir}/document_boundary.png", vis_img)
 
+    # band 처리 (--stream 또는 --workers > 1)
+    banded = args.stream or args.workers > 1
+    use_lut = args.lut and lut_supported(args.method, args.s_threshold, args.v_threshold)
+    if args.lut and not use_lut:
+        print(f"\n[WARNING] --lut requires absolute thresholds for '{args.method}', falling back to direct detection")
+
+    # band / LUT 감지는 ctx를 쓰지 않음 → 경계 감지에서 캐시한 전체 해상도 변환 바로 해제
+    if banded or use_lut:
+        ctx.clear()
+
     # 타일 경계선 제거 (구멍 검출 전에 원본 이미지 정리)
     if tile_edges is not None and document_boundary is not None:
         image_cleaned = remove_tile_edge_artifacts(image, document_boundary, tile_edges, edge_width=10)
         cv2.imwrite(f"{args.output_dir}/image_cleaned.png", image_cleaned)
 
-    # 흰색 감지 (정리된 이미지 사용)
-    white_mask, info = detect_whiteness(image_cleaned, args.method, args.s_percentile, args.v_percentile,
-                                       args.s_threshold, args.v_threshold)
-    cv2.imwrite(f"{args.output_dir}/white_mask_raw.png", white_mask)
-
-    # 문서 경계 적용
-    if document_boundary is not None:
-        white_mask = apply_document_boundary(white_mask, document_boundary, args.boundary_margin)
-
-    cv2.imwrite(f"{args.output_dir}/white_mask.png", white_mask)
-
-    coverage = (white_mask > 0).sum() / white_mask.size * 100
-    print(f"\nWhite coverage: {coverage:.2f}%")
-
-    # 구멍 추출 (정리된 이미지 사용)
-    holes = extract_individual_holes(image_cleaned, white_mask, args.min_area, args.max_area,
-                                     enhance_holes=args.enhance_holes,
-                                     dilation_size=args.dilation_size,
-                                     border_margin=args.border_margin)
+    if tiles is not None and args.process_tiles:
+        # 모든 타일을 프로세스 풀에서 처리 → 전체 좌표로 병합
+        ctx.clear()
+        params = {
+            'method': args.method,
+            's_percentile': args.s_percentile,
+            'v_percentile': args.v_percentile,
+            's_threshold': args.s_threshold,
+            'v_threshold': args.v_threshold,
+            'lut': args.lut,
+            'lut_cache_dir': args.lut_cache_dir,
+            'band_rows': args.band_rows if args.stream else None,
+            'boundary_margin': args.boundary_margin,
+            'min_area': args.min_area,
+            'max_area': args.max_area,
+            'enhance_holes': args.enhance_holes,
+            'dilation_size': args.dilation_size,
+            'border_margin': args.border_margin,
+        }
+        prepare_whiteness_lut(params)
+        holes, white_mask = detect_holes_in_tiles(image, tiles, params, workers=args.tile_workers)
+        cv2.imwrite(f"{args.output_dir}/white_mask.png", white_mask)
+        white_mask = None
+        document_boundary = tiles  # 비교 이미지에 모든 타일 경계 표시
+    else:
+        # 흰색 감지 (정리된 이미지 사용)
+        if use_lut:
+            white_mask, _ = detect_whiteness_lut(image_cleaned, args.method, args.s_threshold, args.v_threshold,
+                                                 cache_dir=args.lut_cache_dir, workers=args.workers)
+        elif banded:
+            white_mask, _ = detect_whiteness_banded(image_cleaned, args.method, args.s_percentile, args.v_percentile,
+                                                    args.s_threshold, args.v_threshold, band_rows=args.band_rows,
+                                                    workers=args.workers)
+        else:
+            # 경계선 제거로 이미지가 바뀌었으면 캐시된 변환은 재사용 불가
+            if image_cleaned is not image:
+                ctx = ImageContext(image_cleaned)
+            white_mask, _ = detect_whiteness(ctx, args.method, args.s_percentile, args.v_percentile,
+                                            args.s_threshold, args.v_threshold, workers=args.workers)
+        ctx.clear()
+        cv2.imwrite(f"{args.output_dir}/white_mask_raw.png", white_mask)
+
+        # 문서 경계 적용
+        if document_boundary is not None:
+            white_mask = apply_document_boundary(white_mask, document_boundary, args.boundary_margin,
+                                                 in_place=args.stream)
+
+        cv2.imwrite(f"{args.output_dir}/white_mask.png", white_mask)
+
+        coverage = np.count_nonzero(white_mask) / white_mask.size * 100
+        print(f"\nWhite coverage: {coverage:.2f}%")
+
+        # 구멍 추출 (정리된 이미지 사용)
+        holes = extract_individual_holes(image_cleaned, white_mask, args.min_area, args.max_area,
+                                         enhance_holes=args.enhance_holes,
+                                         dilation_size=args.dilation_size,
+                                         border_margin=args.border_margin,
+                                         band_rows=args.band_rows if banded else None,
+                                         workers=args.workers)
 
     if len(holes) == 0:
         print("No holes found!")
         return
 
-    # y좌표 역순 정렬 (아래→위)
-    holes = sorted(holes, key=lambda h: h['bbox'][1], reverse=True)
-    # ID 재할당
-    for i, hole in enumerate(holes):
-        hole['id'] = i
+    # y좌표 역순 정렬 (아래→위) + ID 재할당
+    holes = holes.sorted_by_y(reverse=True).renumber()
+    holes.save(f"{args.output_dir}/holes.npz")
 
-    save_holes(holes, holes_dir)
-    create_comparison(image_cleaned, holes, f"{args.output_dir}/comparison.png", boundary=document_boundary)
+    if not args.skip_crops:
+        save_holes(holes, args.output_dir, image_cleaned, args.crop_format, args.crop_workers)
+    # --stream: 전체 해상도 h x 2w 캔버스 대신 축소 비교 이미지
+    if args.stream:
+        print(f"\n  Comparison image downscaled to {STREAM_COMPARISON_SIDE}px (--stream)")
+    create_comparison(image_cleaned, holes, f"{args.output_dir}/comparison.png", boundary=document_boundary,
+                      max_side=STREAM_COMPARISON_SIDE if args.stream else None)
 
     # SVG 벡터 출력
     if args.export_svg:
@@ -1258,10 +2855,16 @@ def main():
                       simplify_epsilon=args.svg_simplify,
                       dpi=args.svg_dpi,
                       unified=args.svg_unified,
-                      individual=args.svg_individual)
+                      individual=args.svg_individual,
+                      pretty=not (args.svg_no_indent or args.svg_compact),
+                      compact=args.svg_compact,
+                      svgz=args.svgz,
+                      workers=args.svg_workers,
+                      tolerance_mm=args.svg_tolerance_mm,
+                      curves=args.svg_curves)
 
     # 통계
-    areas = [h['area'] for h in holes]
+    areas = holes.areas
     print("\n" + "="*60)
     print("STATISTICS")
     print("="*60)
@@ -1270,7 +2873,7 @@ def main():
     print(f"Area range: {min(areas):.0f} - {max(areas):.0f}")
     print(f"Average: {np.mean(areas):.1f}")
     print(f"Median: {np.median(areas):.1f}")
-    print(f"Total: {sum(areas):.0f} pixels ({sum(areas)/(w*h)*100:.2f}%)")
+    print(f"Total: {areas.sum():.0f} pixels ({areas.sum()/(w*h)*100:.2f}%)")
     print("="*60)
     print(f"\nResults: {args.output_dir}/")
 
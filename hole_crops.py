@@ -0,0 +1,231 @@
+"""
+Hole Crop Storage
+구멍 crop 이미지 저장/로드 (individual_holes)
+
+저장 형식:
+  png   - individual_holes/hole_XXXX_x.._y.._w.._h.._a...png (구멍마다 파일, 비동기 저장)
+  atlas - individual_holes_atlas.png 한 장 + individual_holes_atlas.json (id → atlas 사각형)
+  zip   - individual_holes.zip 한 개 (무압축 PNG, 파일명은 png 형식과 동일)
+
+HoleCrops로 형식과 관계없이 hole id로 crop을 읽음 (디렉토리 스캔 없음).
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+CROP_FORMATS = ['png', 'atlas', 'zip']
+
+CROPS_DIRNAME = 'individual_holes'
+ATLAS_IMAGE = 'individual_holes_atlas.png'
+ATLAS_INDEX = 'individual_holes_atlas.json'
+CROPS_ZIP = 'individual_holes.zip'
+
+# atlas 안 crop 간격 (px)
+ATLAS_PADDING = 2
+
+
+def crop_filename(hole_id, bbox, area):
+    """crop 파일명 (png/zip 형식 공통)"""
+    x, y, w, h = bbox
+    return f"hole_{hole_id:04d}_x{x}_y{y}_w{w}_h{h}_a{int(area)}.png"
+
+
+class AsyncImageWriter:
+    """cv2.imwrite를 스레드 풀에서 실행
+
+    대기 중인 이미지 수를 max_pending으로 제한 (crop 생성이 저장보다 빠를 때 메모리 상한).
+    cv2 인코딩/파일 쓰기는 GIL을 해제하므로 느린 (네트워크) 파일시스템에서 효과가 큼.
+    """
+
+    def __init__(self, workers=4, max_pending=64):
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+        self.futures = []
+
+    def _write(self, path, image):
+        try:
+            if not cv2.imwrite(path, image):
+                raise IOError(f"Failed to write {path}")
+        finally:
+            self.slots.release()
+
+    def write(self, path, image):
+        self.slots.acquire()
+        self.futures.append(self.pool.submit(self._write, path, image))
+
+    def close(self):
+        """모든 저장 완료 대기 (작업 중 에러는 여기서 다시 발생)"""
+        self.pool.shutdown(wait=True)
+        for future in self.futures:
+            future.result()
+        self.futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_crops_png(crops, output_dir, workers=4, max_pending=64):
+    """(filename, image) iterable → output_dir/*.png (비동기)"""
+    os.makedirs(output_dir, exist_ok=True)
+    with AsyncImageWriter(workers, max_pending) as writer:
+        for filename, image in crops:
+            writer.write(os.path.join(output_dir, filename), image)
+
+
+def save_crops_zip(crops, zip_path, workers=4, max_pending=64):
+    """(filename, image) iterable → 무압축 zip (PNG 인코딩은 스레드 풀, zip 쓰기는 순서대로)"""
+    def encode(item):
+        filename, image = item
+        ok, encoded = cv2.imencode('.png', image)
+        if not ok:
+            raise IOError(f"Failed to encode {filename}")
+        return filename, encoded.tobytes()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool, \
+            zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        batch = []
+        for item in crops:
+            batch.append(item)
+            if len(batch) >= max_pending:
+                for filename, data in pool.map(encode, batch):
+                    archive.writestr(filename, data)
+                batch = []
+        for filename, data in pool.map(encode, batch):
+            archive.writestr(filename, data)
+
+
+def pack_atlas(sizes):
+    """shelf packing (높이 내림차순) → (atlas_w, atlas_h, [(ax, ay), ...])
+
+    폭은 전체 면적의 제곱근 기준 (정사각형에 가까운 atlas), 가장 넓은 crop보다 작지 않게.
+    """
+    if not sizes:
+        return 0, 0, []
+    padded = [(w + ATLAS_PADDING, h + ATLAS_PADDING) for w, h in sizes]
+    total_area = sum(w * h for w, h in padded)
+    atlas_w = max(max(w for w, _ in padded), int(math.ceil(math.sqrt(total_area * 1.1))))
+
+    order = sorted(range(len(sizes)), key=lambda i: (-padded[i][1], i))
+    positions = [None] * len(sizes)
+    x = y = shelf_h = 0
+    for i in order:
+        w, h = padded[i]
+        if x + w > atlas_w:
+            x, y = 0, y + shelf_h
+            shelf_h = 0
+        positions[i] = (x, y)
+        x += w
+        shelf_h = max(shelf_h, h)
+    return atlas_w, y + shelf_h, positions
+
+
+def save_crops_atlas(holes, crop_fn, output_dir):
+    """모든 crop을 atlas 한 장에 배치 + JSON index
+
+    Args:
+        holes: hole dict 목록 (id, bbox, area)
+        crop_fn: hole → crop 이미지
+    """
+    sizes = [(hole['bbox'][2], hole['bbox'][3]) for hole in holes]
+    atlas_w, atlas_h, positions = pack_atlas(sizes)
+
+    atlas = np.full((max(1, atlas_h), max(1, atlas_w), 3), 255, dtype=np.uint8)
+    index = {'image': ATLAS_IMAGE, 'size': [atlas_w, atlas_h], 'holes': {}}
+    for hole, (ax, ay) in zip(holes, positions):
+        x, y, w, h = hole['bbox']
+        atlas[ay:ay + h, ax:ax + w] = crop_fn(hole)
+        index['holes'][str(hole['id'])] = {
+            'rect': [ax, ay, w, h],
+            'bbox': [int(x), int(y), int(w), int(h)],
+            'area': float(hole['area']),
+        }
+
+    cv2.imwrite(os.path.join(output_dir, ATLAS_IMAGE), atlas)
+    with open(os.path.join(output_dir, ATLAS_INDEX), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    return atlas_w, atlas_h
+
+
+class HoleCrops:
+    """검출 결과 디렉토리에서 hole id로 crop 읽기
+
+    atlas (index JSON) → zip (이름 목록) → individual_holes/ (holes.npz로 파일명 계산)
+    순서로 형식을 찾음.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.format = None
+        self._atlas = None
+        self._zip = None
+
+        atlas_index = os.path.join(output_dir, ATLAS_INDEX)
+        zip_path = os.path.join(output_dir, CROPS_ZIP)
+        npz_path = os.path.join(output_dir, 'holes.npz')
+
+        if os.path.exists(atlas_index):
+            with open(atlas_index, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.format = 'atlas'
+            self._atlas_path = os.path.join(output_dir, index['image'])
+            self._rects = {int(k): v['rect'] for k, v in index['holes'].items()}
+        elif os.path.exists(zip_path):
+            self.format = 'zip'
+            self._zip = zipfile.ZipFile(zip_path, 'r')
+            self._names = {}
+            for name in self._zip.namelist():
+                match = re.match(r'hole_(\d+)_', name)
+                if match:
+                    self._names[int(match.group(1))] = name
+        elif os.path.exists(npz_path):
+            self.format = 'png'
+            with np.load(npz_path) as data:
+                records = data['records']
+            self._names = {
+                int(r['id']): crop_filename(int(r['id']), (int(r['x']), int(r['y']), int(r['w']), int(r['h'])), r['area'])
+                for r in records
+            }
+        else:
+            raise FileNotFoundError(f"No hole crops (atlas / zip / holes.npz) in {output_dir}")
+
+    def ids(self):
+        return sorted(self._rects if self.format == 'atlas' else self._names)
+
+    def __contains__(self, hole_id):
+        return hole_id in (self._rects if self.format == 'atlas' else self._names)
+
+    def __getitem__(self, hole_id):
+        """hole id → crop 이미지 (BGR)"""
+        if self.format == 'atlas':
+            if self._atlas is None:
+                self._atlas = cv2.imread(self._atlas_path, cv2.IMREAD_COLOR)
+            ax, ay, w, h = self._rects[hole_id]
+            return self._atlas[ay:ay + h, ax:ax + w].copy()
+
+        name = self._names[hole_id]
+        if self.format == 'zip':
+            data = np.frombuffer(self._zip.read(name), np.uint8)
+            return cv2.imdecode(data, cv2.IMREAD_COLOR)
+        return cv2.imread(os.path.join(self.output_dir, CROPS_DIRNAME, name), cv2.IMREAD_COLOR)
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
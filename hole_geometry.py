@@ -0,0 +1,185 @@
+"""
+Hole Geometry Sidecar
+SVG 옆에 저장하는 구멍 형상 바이너리 파일 (holes_geometry.bin)
+
+SVG(XML) 파싱 대신 하위 스크립트(create_cutting_layout, create_restoration_guide,
+verify_svg_alignment)가 memory-map으로 바로 읽는 용도.
+
+파일 구조 (little-endian):
+  header   64 bytes: magic, version, dpi, 이미지 크기, 구멍 수, 점 수
+  records  구멍 수 × RECORD_DTYPE (id, bbox, 면적, 개별 SVG viewBox / mm 크기)
+  offsets  (구멍 수 + 1) int64 - i번째 path = points[offsets[i]:offsets[i+1]]
+  points   (점 수, 2) int32 - SVG path에 쓴 단순화된 좌표 (원본 이미지 픽셀)
+  kinds    (점 수,) uint8 - 0=꼭짓점, 1=Bézier 제어점 (v2, v1 파일은 모두 꼭짓점)
+"""
+
+import os
+import re
+import struct
+
+import numpy as np
+
+from svg_writer import encode_paths, flatten_path
+
+GEOMETRY_FILENAME = 'holes_geometry.bin'
+
+MAGIC = b'HOLEGEO\0'
+VERSION = 2
+HEADER = struct.Struct('<8sIdIIIQ')
+HEADER_SIZE = 64
+
+RECORD_DTYPE = np.dtype([
+    ('id', '<i4'),
+    ('x', '<i4'), ('y', '<i4'), ('w', '<i4'), ('h', '<i4'),
+    ('area_px', '<f8'), ('area_mm2', '<f8'),
+    ('vb_x', '<i4'), ('vb_y', '<i4'), ('vb_w', '<i4'), ('vb_h', '<i4'),
+    ('width_mm', '<f8'), ('height_mm', '<f8'),
+])
+
+
+def write_geometry(path, records, points, offsets, dpi, image_size, kinds=None):
+    """sidecar 파일 저장
+
+    Args:
+        records: RECORD_DTYPE 배열 (N,)
+        points: (P, 2) int32 좌표
+        offsets: (N+1,) int64
+        dpi: 면적(mm²) 계산에 사용한 DPI
+        image_size: (width, height) 픽셀
+        kinds: (P,) uint8 점 종류 (None이면 모두 꼭짓점)
+    """
+    records = np.ascontiguousarray(records, dtype=RECORD_DTYPE)
+    points = np.ascontiguousarray(points, dtype='<i4').reshape(-1, 2)
+    offsets = np.ascontiguousarray(offsets, dtype='<i8')
+    kinds = np.zeros(len(points), dtype=np.uint8) if kinds is None else np.ascontiguousarray(kinds, dtype=np.uint8)
+
+    header = HEADER.pack(MAGIC, VERSION, float(dpi), int(image_size[0]), int(image_size[1]),
+                         len(records), len(points))
+    with open(path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(records.tobytes())
+        f.write(offsets.tobytes())
+        f.write(points.tobytes())
+        f.write(kinds.tobytes())
+
+
+class HoleGeometry:
+    """holes_geometry.bin 읽기 (records / offsets / points 모두 np.memmap)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, dpi, img_w, img_h, n, n_points = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError(f"Not a hole geometry file (v1-v{VERSION}): {path}")
+
+        self.dpi = dpi
+        self.image_size = (img_w, img_h)
+
+        offset = HEADER_SIZE
+        self.records = self._map(RECORD_DTYPE, (n,), offset)
+        offset += n * RECORD_DTYPE.itemsize
+        self.offsets = self._map('<i8', (n + 1,), offset)
+        offset += (n + 1) * 8
+        self.points = self._map('<i4', (n_points, 2), offset)
+        offset += n_points * 8
+        self.kinds = self._map('u1', (n_points,), offset) if version >= 2 else None
+        self.has_curves = self.kinds is not None and bool(np.any(self.kinds))
+
+    def _map(self, dtype, shape, offset):
+        # 길이 0 memmap은 만들 수 없으므로 빈 배열로 대체
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _kinds(self, i):
+        if not self.has_curves:
+            return None
+        return self.kinds[self.offsets[i]:self.offsets[i + 1]]
+
+    def path_points(self, i):
+        """i번째 구멍 path 다각형 (k, 2) - 곡선이 없으면 int32 view, 있으면 펼친 float 좌표"""
+        points = self.points[self.offsets[i]:self.offsets[i + 1]]
+        kinds = self._kinds(i)
+        if kinds is not None and kinds.any():
+            return flatten_path(points, kinds)
+        return points
+
+    def path_data(self, i, compact=False):
+        """i번째 구멍 SVG path 문자열 (svg_writer.encode_paths 형식)"""
+        points = self.points[self.offsets[i]:self.offsets[i + 1]]
+        return encode_paths(points, [0, len(points)], compact, self._kinds(i))[0]
+
+    def bbox(self, i):
+        r = self.records[i]
+        return int(r['x']), int(r['y']), int(r['w']), int(r['h'])
+
+    def svg_filename(self, i):
+        """개별 SVG 파일명 (extract_whiteness_based.save_holes_svg 규칙)"""
+        r = self.records[i]
+        return f"hole_{int(r['id']):04d}_x{int(r['x'])}_y{int(r['y'])}_a{int(r['area_px'])}.svg"
+
+    def path_extents(self):
+        """각 path 좌표의 (x_min, y_min, x_max, y_max) (N, 4)"""
+        if len(self) == 0:
+            return np.zeros((0, 4), dtype=np.int32)
+        if self.has_curves:
+            polygons = [self.path_points(i) for i in range(len(self))]
+            return np.array([[*p.min(axis=0), *p.max(axis=0)] for p in polygons])
+        starts = np.asarray(self.offsets[:-1])
+        mins = np.minimum.reduceat(self.points, starts, axis=0)
+        maxs = np.maximum.reduceat(self.points, starts, axis=0)
+        return np.hstack([mins, maxs])
+
+    def indices_for_svg_dir(self, svg_dir):
+        """svg_dir에 실제로 있는 개별 SVG에 해당하는 구멍 index
+
+        개별 SVG를 지우거나 다른 실행의 SVG가 섞여 있으면 sidecar와 SVG가 어긋나므로
+        None을 반환 (호출 측은 SVG 파싱으로 대체).
+        """
+        names = {name for name in os.listdir(svg_dir) if name.endswith('.svg')}
+        indices = [i for i in range(len(self)) if self.svg_filename(i) in names]
+        if len(indices) != len(names):
+            return None
+        return indices
+
+
+def find_geometry(svg_path):
+    """SVG 파일/디렉토리에 대응하는 sidecar 경로 (없으면 None)
+
+    - svg_vectors 디렉토리 또는 그 안의 개별 SVG → 같은 디렉토리
+    - 통합 SVG (all_holes_vector.svg) → 옆의 svg_vectors/
+    """
+    if os.path.isdir(svg_path):
+        candidates = [os.path.join(svg_path, GEOMETRY_FILENAME)]
+    else:
+        base = os.path.dirname(os.path.abspath(svg_path))
+        candidates = [os.path.join(base, 'svg_vectors', GEOMETRY_FILENAME),
+                      os.path.join(base, GEOMETRY_FILENAME)]
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def load_geometry(svg_path):
+    """find_geometry + 로드 (없거나 읽을 수 없으면 None)"""
+    path = find_geometry(svg_path)
+    if path is None:
+        return None
+    try:
+        geometry = HoleGeometry(path)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Failed to load geometry sidecar {path}: {e}")
+        return None
+    print(f"Using geometry sidecar: {path} ({len(geometry)} holes)")
+    return geometry
+
+
+def svg_hole_id(svg_path):
+    """개별 SVG 파일명에서 hole id 추출 (hole_0012_x.._y.._a...svg → 12)"""
+    match = re.match(r'hole_(\d+)_x-?\d+_y-?\d+_a\d+\.svg$', os.path.basename(svg_path))
+    return int(match.group(1)) if match else None
@@ -0,0 +1,190 @@
+"""
+Rectangle Packing (MaxRects)
+조각 bounding box를 여러 페이지에 배치하는 MaxRects packer
+
+- 빈 공간을 겹칠 수 있는 최대 빈 사각형(free rectangle) 목록으로 관리
+- 위치 선택: Best Short Side Fit (남는 짧은 변이 가장 작은 빈 사각형)
+  또는 bottom-left (아래쪽 끝이 가장 위인 위치 - 롤 용지 길이 최소화)
+- 선택적 90° 회전
+- pack_maxrects: 면적 내림차순 first-fit decreasing, 열린 모든 페이지에 시도
+- pack_strip: 폭이 고정된 롤 용지 한 장에 배치 (사용 길이 최소화)
+
+free rectangle은 (n, 4) numpy 배열 [x, y, w, h]로 두고 적합성 검사/분할/포함 제거를
+한 번에 계산. 페이지마다 가장 큰 빈 사각형 면적을 캐시해서 못 들어가는 페이지는 바로 건너뜀.
+
+조각은 width / height (mm) 속성만 있으면 됨. 배치 결과는 조각의
+placed_x, placed_y, rotation (0 또는 90) 속성에 기록.
+"""
+
+import numpy as np
+
+EPS = 1e-9
+
+
+class MaxRectsBin:
+    """한 페이지의 MaxRects 상태 (BinPacker2D와 같은 add_piece / placed_pieces 인터페이스)"""
+
+    def __init__(self, width: float, height: float, spacing: float = 0.0, allow_rotation: bool = False,
+                 rule: str = 'bssf'):
+        self.width = width
+        self.height = height
+        self.spacing = spacing
+        self.allow_rotation = allow_rotation
+        self.rule = rule
+        self.used_height = 0.0
+        self.free = np.array([[0.0, 0.0, width, height]])
+        self.max_free_area = width * height
+        self.placed_pieces = []
+
+    def footprint(self, piece):
+        """간격 포함 배치 크기 (회전 전)"""
+        return piece.width + self.spacing, piece.height + self.spacing
+
+    def find_position(self, w: float, h: float):
+        """(w, h)를 놓을 위치 → (x, y, rotated) 또는 None (self.rule 기준 최선)"""
+        free_w, free_h = self.free[:, 2], self.free[:, 3]
+        best = None
+        options = [(w, h, False)]
+        if self.allow_rotation and abs(w - h) > EPS:
+            options.append((h, w, True))
+
+        for rw, rh, rotated in options:
+            fits = np.flatnonzero((free_w >= rw - EPS) & (free_h >= rh - EPS))
+            if len(fits) == 0:
+                continue
+            if self.rule == 'bottom_left':
+                first = self.free[fits, 1] + rh
+                second = self.free[fits, 0]
+            else:
+                first = np.minimum(free_w[fits] - rw, free_h[fits] - rh)
+                second = np.maximum(free_w[fits] - rw, free_h[fits] - rh)
+            k = np.lexsort((second, first))[0]
+            score = (first[k], second[k])
+            if best is None or score < best[0]:
+                best = (score, fits[k], rotated)
+
+        if best is None:
+            return None
+        _, index, rotated = best
+        return self.free[index, 0], self.free[index, 1], rotated
+
+    def place(self, x: float, y: float, w: float, h: float):
+        """(x, y, w, h)를 사용 처리 - 겹치는 빈 사각형 분할 + 포함된 사각형 제거"""
+        fx, fy, fw, fh = self.free.T
+        hit = (fx < x + w - EPS) & (fx + fw > x + EPS) & (fy < y + h - EPS) & (fy + fh > y + EPS)
+        keep = self.free[~hit]
+        hx, hy, hw, hh = self.free[hit].T
+        right, bottom = np.full_like(hx, x + w), np.full_like(hy, y + h)
+
+        # 겹친 빈 사각형마다 배치 사각형 바깥의 최대 4개 조각
+        children = np.vstack([
+            np.column_stack([hx, hy, x - hx, hh]),                      # 왼쪽
+            np.column_stack([right, hy, hx + hw - right, hh]),          # 오른쪽
+            np.column_stack([hx, hy, hw, y - hy]),                      # 위
+            np.column_stack([hx, bottom, hw, hy + hh - bottom]),        # 아래
+        ])
+        children = children[(children[:, 2] > EPS) & (children[:, 3] > EPS)]
+
+        # 다른 빈 사각형에 포함된 조각 제거 (기존 사각형은 분할된 사각형에 포함되지 않음)
+        if len(children):
+            inside_keep = _contained(children, keep).any(axis=1) if len(keep) else np.zeros(len(children), bool)
+            inside_child = _contained(children, children)
+            # 동일한 사각형은 먼저 나온 것 하나만 유지
+            order = np.arange(len(children))
+            inside_child &= ~(inside_child & inside_child.T) | (order[None, :] < order[:, None])
+            np.fill_diagonal(inside_child, False)
+            children = children[~(inside_keep | inside_child.any(axis=1))]
+
+        self.free = np.vstack([keep, children]) if len(children) else keep
+        self.max_free_area = float((self.free[:, 2] * self.free[:, 3]).max()) if len(self.free) else 0.0
+
+    def add_piece(self, piece) -> bool:
+        """조각을 이 페이지에 배치 (못 놓으면 False)"""
+        w, h = self.footprint(piece)
+        if w * h > self.max_free_area + EPS:
+            return False
+        position = self.find_position(w, h)
+        if position is None:
+            return False
+        x, y, rotated = position
+        if rotated:
+            w, h = h, w
+        self.place(x, y, w, h)
+        self.used_height = max(self.used_height, float(y + h))
+
+        piece.placed_x = float(x)
+        piece.placed_y = float(y)
+        piece.rotation = 90 if rotated else 0
+        self.placed_pieces.append(piece)
+        return True
+
+
+def _contained(a, b):
+    """(len(a), len(b)) bool - a[i]가 b[j] 안에 있는지"""
+    ax, ay, aw, ah = (a[:, k, None] for k in range(4))
+    bx, by, bw, bh = (b[None, :, k] for k in range(4))
+    return ((ax >= bx - EPS) & (ay >= by - EPS) &
+            (ax + aw <= bx + bw + EPS) & (ay + ah <= by + bh + EPS))
+
+
+def pack_maxrects(pieces, width: float, height: float, spacing: float = 0.0,
+                  allow_rotation: bool = False, progress_every: int = 50):
+    """first-fit decreasing: 큰 조각부터, 열린 페이지 중 처음 들어가는 페이지에 배치
+
+    Returns:
+        (bins, skipped) - MaxRectsBin 리스트, 어떤 빈 페이지에도 안 들어가는 조각 리스트
+    """
+    order = sorted(pieces, key=lambda p: (-(p.width * p.height), -max(p.width, p.height), p.hole_id))
+    bins = []
+    skipped = []
+
+    for i, piece in enumerate(order):
+        for page_number, page in enumerate(bins, 1):
+            if page.add_piece(piece):
+                break
+        else:
+            page = MaxRectsBin(width, height, spacing, allow_rotation)
+            if not page.add_piece(piece):
+                skipped.append(piece)
+                continue
+            bins.append(page)
+            page_number = len(bins)
+        piece.page_number = page_number
+
+        if progress_every and (i + 1) % progress_every == 0:
+            print(f"  Packed {i + 1}/{len(pieces)} pieces...")
+
+    return bins, skipped
+
+
+def pack_strip(pieces, width: float, spacing: float = 0.0, allow_rotation: bool = False,
+               progress_every: int = 50):
+    """롤(strip) 배치: 폭 width 고정, 길이 제한 없음 - 큰 조각부터 bottom-left
+
+    Returns:
+        (strip, skipped) - strip.height는 실제 사용 길이로 줄여 둠
+    """
+    order = sorted(pieces, key=lambda p: (-(p.width * p.height), -max(p.width, p.height), p.hole_id))
+    # 모든 조각을 세로로 쌓아도 남는 길이
+    length = sum(max(p.width, p.height) + spacing for p in pieces) + 1.0
+    strip = MaxRectsBin(width, length, spacing, allow_rotation, rule='bottom_left')
+    skipped = []
+
+    for i, piece in enumerate(order):
+        if not strip.add_piece(piece):
+            skipped.append(piece)
+            continue
+        piece.page_number = 1
+
+        if progress_every and (i + 1) % progress_every == 0:
+            print(f"  Packed {i + 1}/{len(pieces)} pieces...")
+
+    strip.height = strip.used_height
+    return strip, skipped
+
+
+def sheet_utilization(pieces, page_count: int, width: float, height: float) -> float:
+    """조각 bounding box 면적 합 / 사용한 페이지 면적 (0~1)"""
+    if page_count == 0:
+        return 0.0
+    return sum(p.width * p.height for p in pieces) / (page_count * width * height)
@@ -0,0 +1,171 @@
+"""
+Remnant Inventory
+커팅 후 남은 용지(remnant)의 빈 영역을 저장해 다음 레이아웃 작업에서 먼저 사용
+
+SQLite 파일 하나 (기본 remnants.sqlite):
+  sheets       용지 (id, 종이 종류, 배치 가능 크기 mm, 만든 작업 디렉토리, 시각)
+  free_rects   용지별 빈 사각형 (MaxRects free rectangle, 겹칠 수 있음)
+  free_index   빈 사각형 (w, h) R*Tree - "w' >= w 이고 h' >= h"인 사각형 검색
+
+빈 사각형은 MIN_REMNANT_SIZE보다 큰 것만 저장.
+모든 변경은 한 transaction으로 처리하고 commit()에서 반영 (rollback()이면 그대로).
+"""
+
+import sqlite3
+import time
+
+import numpy as np
+
+from rect_packing import MaxRectsBin
+
+INVENTORY_FILENAME = 'remnants.sqlite'
+
+# 저장할 빈 영역의 최소 폭/높이 (mm) - 이보다 작으면 조각을 놓기 어려움
+MIN_REMNANT_SIZE = 5.0
+
+
+class RemnantInventory:
+    """remnant 용지 / 빈 사각형 저장소"""
+
+    def __init__(self, path=INVENTORY_FILENAME):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS sheets (
+                id INTEGER PRIMARY KEY,
+                paper_type TEXT NOT NULL,
+                width REAL NOT NULL,
+                height REAL NOT NULL,
+                source TEXT,
+                created REAL
+            );
+            CREATE TABLE IF NOT EXISTS free_rects (
+                id INTEGER PRIMARY KEY,
+                sheet_id INTEGER NOT NULL REFERENCES sheets(id),
+                x REAL, y REAL, w REAL, h REAL
+            );
+            CREATE INDEX IF NOT EXISTS free_rects_sheet ON free_rects(sheet_id);
+        """)
+        try:
+            self.db.execute('CREATE VIRTUAL TABLE IF NOT EXISTS free_index '
+                            'USING rtree(id, min_w, max_w, min_h, max_h)')
+        except sqlite3.OperationalError:
+            # R*Tree 모듈이 없는 SQLite → 일반 테이블 + B-tree index
+            self.db.executescript("""
+                CREATE TABLE IF NOT EXISTS free_index (
+                    id INTEGER PRIMARY KEY, min_w REAL, max_w REAL, min_h REAL, max_h REAL
+                );
+                CREATE INDEX IF NOT EXISTS free_index_size ON free_index(max_w, max_h);
+            """)
+
+    @staticmethod
+    def label(sheet_id):
+        """용지 표시 이름 (R0003)"""
+        return f"R{sheet_id:04d}"
+
+    def find(self, w, h, paper_type, allow_rotation=False):
+        """(w, h)가 들어가는 빈 사각형이 있는 용지 id (가장 작은 사각형 순, 중복 없음)"""
+        query = """
+            SELECT f.sheet_id, MIN(f.w * f.h) AS area
+            FROM free_index i
+            JOIN free_rects f ON f.id = i.id
+            JOIN sheets s ON s.id = f.sheet_id
+            WHERE i.max_w >= ? AND i.max_h >= ? AND s.paper_type = ?
+            GROUP BY f.sheet_id
+        """
+        params = [w, h, paper_type]
+        if allow_rotation:
+            query = f"SELECT sheet_id, MIN(area) AS area FROM ({query} UNION ALL {query}) GROUP BY sheet_id"
+            params += [h, w, paper_type]
+        rows = self.db.execute(query + " ORDER BY area, sheet_id", params).fetchall()
+        return [row[0] for row in rows]
+
+    def sheet(self, sheet_id):
+        """(paper_type, width, height)"""
+        return self.db.execute('SELECT paper_type, width, height FROM sheets WHERE id = ?',
+                               (sheet_id,)).fetchone()
+
+    def free_rects(self, sheet_id):
+        """(n, 4) [x, y, w, h]"""
+        rows = self.db.execute('SELECT x, y, w, h FROM free_rects WHERE sheet_id = ? ORDER BY id',
+                               (sheet_id,)).fetchall()
+        return np.array(rows, dtype=np.float64).reshape(-1, 4)
+
+    def set_free_rects(self, sheet_id, free):
+        """용지의 빈 사각형 교체 (MIN_REMNANT_SIZE 이상만)"""
+        ids = [row[0] for row in self.db.execute('SELECT id FROM free_rects WHERE sheet_id = ?', (sheet_id,))]
+        self.db.executemany('DELETE FROM free_index WHERE id = ?', [(i,) for i in ids])
+        self.db.execute('DELETE FROM free_rects WHERE sheet_id = ?', (sheet_id,))
+
+        kept = 0
+        for x, y, w, h in np.asarray(free, dtype=np.float64).reshape(-1, 4).tolist():
+            if w < MIN_REMNANT_SIZE or h < MIN_REMNANT_SIZE:
+                continue
+            cursor = self.db.execute('INSERT INTO free_rects (sheet_id, x, y, w, h) VALUES (?, ?, ?, ?, ?)',
+                                     (sheet_id, x, y, w, h))
+            self.db.execute('INSERT INTO free_index (id, min_w, max_w, min_h, max_h) VALUES (?, ?, ?, ?, ?)',
+                            (cursor.lastrowid, w, w, h, h))
+            kept += 1
+        return kept
+
+    def add_sheet(self, width, height, paper_type, free, source=None):
+        """새 용지 등록 → sheet id (저장할 빈 영역이 없으면 None)"""
+        cursor = self.db.execute('INSERT INTO sheets (paper_type, width, height, source, created) '
+                                 'VALUES (?, ?, ?, ?, ?)', (paper_type, width, height, source, time.time()))
+        sheet_id = cursor.lastrowid
+        if self.set_free_rects(sheet_id, free) == 0:
+            self.db.execute('DELETE FROM sheets WHERE id = ?', (sheet_id,))
+            return None
+        return sheet_id
+
+    def summary(self):
+        """(빈 영역이 남은 용지 수, 빈 사각형 수)"""
+        sheets, rects = self.db.execute('SELECT COUNT(DISTINCT sheet_id), COUNT(*) FROM free_rects').fetchone()
+        return sheets, rects
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pack_into_remnants(pieces, inventory, paper_type='default', spacing=0.0, allow_rotation=False):
+    """remnant 용지에 먼저 배치 (큰 조각부터, 가장 작게 맞는 빈 사각형이 있는 용지)
+
+    Returns:
+        (sheets, remaining) - 조각이 놓인 remnant 용지 (MaxRectsBin, sheet_id 속성),
+        remnant에 못 놓은 조각
+    """
+    order = sorted(pieces, key=lambda p: (-(p.width * p.height), -max(p.width, p.height), p.hole_id))
+    bins = {}
+    remaining = []
+
+    for piece in order:
+        placed = False
+        for sheet_id in inventory.find(piece.width + spacing, piece.height + spacing, paper_type, allow_rotation):
+            if sheet_id not in bins:
+                _, width, height = inventory.sheet(sheet_id)
+                sheet = MaxRectsBin(width, height, spacing, allow_rotation)
+                sheet.free = inventory.free_rects(sheet_id)
+                sheet.max_free_area = float((sheet.free[:, 2] * sheet.free[:, 3]).max())
+                sheet.sheet_id = sheet_id
+                bins[sheet_id] = sheet
+            if bins[sheet_id].add_piece(piece):
+                inventory.set_free_rects(sheet_id, bins[sheet_id].free)
+                placed = True
+                break
+        if not placed:
+            remaining.append(piece)
+
+    return [sheet for sheet in bins.values() if sheet.placed_pieces], remaining
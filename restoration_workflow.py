@@ -69,9 +69,17 @@ Examples:
     parser.add_argument('--min-area', type=int, default=50, help='Minimum hole area in pixels (default: 50)')
     parser.add_argument('--max-area', type=int, default=2500000, help='Maximum hole area in pixels (default: 2500000)')
     parser.add_argument('--svg-simplify', type=float, default=0.1, help='SVG simplification level (default: 0.1)')
+    parser.add_argument('--lut', action='store_true', help='Use cached BGR->mask lookup table for detection (fixed threshold)')
+    parser.add_argument('--svg-compact', action='store_true', help='Compact SVG path encoding (relative m/l/h/v) for vectors and layouts')
+    parser.add_argument('--svg-tolerance-mm', type=float, default=None, help='SVG simplification tolerance in mm (replaces --svg-simplify)')
+    parser.add_argument('--svg-curves', action='store_true', help='Fit Bezier curves to smooth hole outlines (with --svg-tolerance-mm)')
 
     # Layout parameters
-    parser.add_argument('--paper-size', default='A4', choices=['A4', 'A3'], help='Paper size for cutting layout (default: A4)')
+    parser.add_argument('--paper-size', default='A4', help='Paper size for cutting layout: A4, A3 or WIDTHxHEIGHT in mm (default: A4)')
+    parser.add_argument('--roll-width', type=float, help='Lay out on a roll of this width in mm instead of sheets')
+    parser.add_argument('--dxf', action='store_true', help='Also write DXF cut files (optimized cut order)')
+    parser.add_argument('--gcode', action='store_true', help='Also write G-code cut files (optimized cut order)')
+    parser.add_argument('--remnants', help='Remnant inventory file (SQLite): use leftover sheet areas first and save new leftovers')
 
     # Workflow control
     parser.add_argument('--skip-detection', action='store_true', help='Skip hole detection (use existing results)')
@@ -112,6 +120,14 @@ Examples:
             '--svg-individual',
             '--output-dir', detection_dir
         ]
+        if args.lut:
+            cmd.append('--lut')
+        if args.svg_compact:
+            cmd.append('--svg-compact')
+        if args.svg_tolerance_mm is not None:
+            cmd.extend(['--svg-tolerance-mm', str(args.svg_tolerance_mm)])
+        if args.svg_curves:
+            cmd.append('--svg-curves')
 
         if not run_command(cmd, "1. Hole Detection"):
             print("\nWorkflow stopped due to error in hole detection")
@@ -136,6 +152,16 @@ Examples:
             '--output-dir', layout_dir,
             '--paper-size', args.paper_size
         ]
+        if args.svg_compact:
+            cmd.append('--svg-compact')
+        if args.roll_width:
+            cmd.extend(['--roll-width', str(args.roll_width)])
+        if args.dxf:
+            cmd.append('--dxf')
+        if args.gcode:
+            cmd.append('--gcode')
+        if args.remnants:
+            cmd.extend(['--remnants', args.remnants])
 
         if not run_command(cmd, "2. Cutting Layout Generation"):
             print("\nWarning: Layout generation failed, but continuing...")
@@ -0,0 +1,215 @@
+"""
+True-Shape Nesting
+조각 bounding box 대신 실제 구멍 윤곽으로 배치 (raster occupancy + FFT 충돌 검사)
+
+- 용지를 resolution (mm) 격자로 나누고 배치된 윤곽이 덮는 칸을 표시
+- 조각 mask (윤곽이 닿는 모든 칸, spacing만큼 팽창)와 occupancy의 상관(correlation)을
+  FFT로 한 번에 계산 → 겹침이 0인 위치 중 가장 위, 그다음 가장 왼쪽 (bottom-left fill)
+- 큰 조각부터 (실제 면적 순) 열린 모든 용지에 first-fit
+- 회전: 0°/180° (종이 결 방향 유지), allow_rotation이면 90°/270°도 시도
+- time_budget (초)을 넘기면 남은 조각은 bounding box 검사(적분 영상)로 빠르게 배치
+
+조각은 hole_id, local_polygon(rotation) (조각 상자 기준 mm 좌표)만 있으면 됨.
+배치 결과는 조각의 placed_x, placed_y (조각 상자 왼쪽 위), rotation, page_number에 기록.
+"""
+
+import math
+import time
+
+import cv2
+import numpy as np
+
+# 기본 격자 크기 (mm/칸)
+NEST_RESOLUTION = 0.5
+
+# 기본 시간 제한 (초)
+NEST_TIME_BUDGET = 60.0
+
+
+class NestingSheet:
+    """한 용지의 occupancy 격자 (BinPacker2D와 같은 placed_pieces 인터페이스)
+
+    격자는 spacing 칸만큼 바깥을 여유로 두어, 팽창한 mask가 용지 가장자리에 걸쳐도
+    윤곽 자체는 용지 안에만 놓이게 함.
+    """
+
+    def __init__(self, width: float, height: float, resolution: float, pad: int):
+        self.width = width
+        self.height = height
+        self.resolution = resolution
+        self.pad = pad
+        self.cells_w = int(math.floor(width / resolution))
+        self.cells_h = int(math.floor(height / resolution))
+        self.grid = np.zeros((self.cells_h + 2 * pad, self.cells_w + 2 * pad), dtype=np.float32)
+        # FFT 크기는 격자 이상인 빠른 크기 (소인수 2/3/5) - 상관 계산 범위는 격자 안이라 순환 없음
+        self.fft_shape = tuple(cv2.getOptimalDFTSize(n) for n in self.grid.shape)
+        self.free_cells = self.cells_w * self.cells_h
+        self.placed_pieces = []
+        self._spectrum = None
+        self._integral = None
+
+    def spectrum(self):
+        """occupancy FFT (배치가 바뀔 때만 다시 계산)"""
+        if self._spectrum is None:
+            self._spectrum = np.fft.rfft2(self.grid, s=self.fft_shape)
+        return self._spectrum
+
+    def integral(self):
+        if self._integral is None:
+            self._integral = cv2.integral(self.grid, sdepth=cv2.CV_64F)
+        return self._integral
+
+    def mark(self, mask, cy, cx):
+        """윤곽 mask (팽창 전)를 (cy, cx) 칸에 표시"""
+        h, w = mask.shape
+        y0, x0 = cy + self.pad, cx + self.pad
+        region = self.grid[y0:y0 + h, x0:x0 + w]
+        np.maximum(region, mask, out=region)
+        self.free_cells -= int(mask.sum())
+        self._spectrum = None
+        self._integral = None
+
+
+class _Shape:
+    """조각 한 회전의 raster mask"""
+
+    def __init__(self, polygon, resolution, pad, rotation):
+        self.rotation = rotation
+        self.origin = polygon.min(axis=0)
+        cells = (polygon - self.origin) / resolution
+        w = int(math.ceil(cells[:, 0].max() + 1e-9)) + 1
+        h = int(math.ceil(cells[:, 1].max() + 1e-9)) + 1
+
+        # 윤곽 내부 + 윤곽이 지나는 칸 모두 표시 (보수적)
+        mask = np.zeros((h, w), dtype=np.uint8)
+        contour = np.round(cells * 16).astype(np.int32).reshape(-1, 1, 2)
+        cv2.fillPoly(mask, [contour], 1, lineType=cv2.LINE_8, shift=4)
+        cv2.polylines(mask, [contour], True, 1, thickness=1, lineType=cv2.LINE_8, shift=4)
+        self.mask = mask.astype(np.float32)
+        self.cells = int(mask.sum())
+
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * pad + 1, 2 * pad + 1))
+        self.dilated = cv2.dilate(np.pad(mask, pad), kernel).astype(np.float32)
+        self._spectrum = {}
+
+    def spectrum(self, shape):
+        if shape not in self._spectrum:
+            self._spectrum[shape] = np.conj(np.fft.rfft2(self.dilated, s=shape))
+        return self._spectrum[shape]
+
+
+def _first_free(free, limit_y, limit_x):
+    """free[:limit_y, :limit_x]에서 첫 True 위치 (행 우선) 또는 None"""
+    free = free[:limit_y, :limit_x]
+    rows = np.flatnonzero(free.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cy = int(rows[0])
+    return cy, int(np.argmax(free[cy]))
+
+
+def _find_position(sheet, shape, exact=True):
+    """shape를 놓을 수 있는 가장 위/왼쪽 칸 (cy, cx) 또는 None
+
+    exact=False면 팽창한 mask의 bounding box로 검사 (적분 영상, FFT 없음)
+    """
+    mh, mw = shape.mask.shape
+    limit_y = sheet.cells_h - mh + 1
+    limit_x = sheet.cells_w - mw + 1
+    if limit_y <= 0 or limit_x <= 0 or shape.cells > sheet.free_cells:
+        return None
+
+    dh, dw = shape.dilated.shape
+    if exact:
+        overlap = np.fft.irfft2(sheet.spectrum() * shape.spectrum(sheet.fft_shape), s=sheet.fft_shape)
+        return _first_free(overlap < 0.5, limit_y, limit_x)
+
+    S = sheet.integral()
+    overlap = S[dh:, dw:] - S[:-dh, dw:] - S[dh:, :-dw] + S[:-dh, :-dw]
+    return _first_free(overlap < 0.5, limit_y, limit_x)
+
+
+def nest_pieces(pieces, width: float, height: float, spacing: float = 0.0,
+                resolution: float = NEST_RESOLUTION, allow_rotation: bool = False,
+                time_budget: float = NEST_TIME_BUDGET, progress_every: int = 50):
+    """실제 윤곽 기준 배치 (first-fit decreasing, bottom-left fill)
+
+    Returns:
+        (sheets, skipped, stats) - NestingSheet 리스트, 빈 용지에도 안 들어가는 조각,
+        {'exact': FFT로 배치한 수, 'fallback': 시간 초과로 bounding box 배치한 수, 'seconds': 소요 시간}
+    """
+    start = time.time()
+    pad = int(math.ceil(spacing / resolution)) + 1 if spacing > 0 else 1
+    rotations = [0, 90, 180, 270] if allow_rotation else [0, 180]
+
+    # 회전별 mask 준비
+    entries = []
+    for piece in pieces:
+        shapes = []
+        for rotation in rotations:
+            polygon = piece.local_polygon(rotation)
+            if len(polygon) < 3:
+                # 윤곽이 없으면 조각 상자 전체
+                w, h = (piece.height, piece.width) if rotation in (90, 270) else (piece.width, piece.height)
+                polygon = np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=np.float64)
+            shapes.append(_Shape(polygon, resolution, pad, rotation))
+        entries.append((piece, shapes))
+    entries.sort(key=lambda e: (-e[1][0].cells, e[0].hole_id))
+
+    sheets = []
+    skipped = []
+    stats = {'exact': 0, 'fallback': 0}
+
+    for i, (piece, shapes) in enumerate(entries):
+        exact = time.time() - start < time_budget
+        if not exact and stats['fallback'] == 0:
+            print(f"  Nesting time budget ({time_budget:g}s) reached, "
+                  f"placing remaining {len(entries) - i} pieces by bounding box")
+
+        placed = None
+        for sheet_index, sheet in enumerate(sheets + [None]):
+            if sheet is None:
+                sheet = NestingSheet(width, height, resolution, pad)
+            best = None
+            for shape in shapes:
+                position = _find_position(sheet, shape, exact)
+                if position is None:
+                    continue
+                cy, cx = position
+                # 아래쪽 끝이 가장 위인 회전, 같으면 왼쪽
+                score = (cy + shape.mask.shape[0], cx)
+                if best is None or score < best[0]:
+                    best = (score, shape, cy, cx)
+            if best is not None:
+                placed = (sheet_index, sheet, best)
+                break
+
+        if placed is None:
+            skipped.append(piece)
+            continue
+
+        sheet_index, sheet, (_, shape, cy, cx) = placed
+        if sheet_index == len(sheets):
+            sheets.append(sheet)
+        sheet.mark(shape.mask, cy, cx)
+        sheet.placed_pieces.append(piece)
+
+        piece.rotation = shape.rotation
+        piece.placed_x = cx * resolution - float(shape.origin[0])
+        piece.placed_y = cy * resolution - float(shape.origin[1])
+        piece.page_number = sheet_index + 1
+        stats['exact' if exact else 'fallback'] += 1
+
+        if progress_every and (i + 1) % progress_every == 0:
+            print(f"  Nested {i + 1}/{len(entries)} pieces ({time.time() - start:.1f}s)...")
+
+    stats['seconds'] = time.time() - start
+    return sheets, skipped, stats
+
+
+def polygon_area(polygon) -> float:
+    """윤곽 면적 (mm², shoelace)"""
+    if len(polygon) < 3:
+        return 0.0
+    x, y = polygon[:, 0], polygon[:, 1]
+    return 0.5 * abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
@@ -0,0 +1,268 @@
+"""
+Streaming SVG Writer
+ElementTree 트리 생성 + minidom 재파싱 없이 파일 핸들에 바로 쓰는 SVG writer
+
+pretty=True 출력은 minidom.toprettyxml(indent='  ')과 바이트 단위로 동일
+(선언 '<?xml version="1.0" ?>', 요소마다 한 줄, 텍스트만 있는 요소는 한 줄에).
+
+path 인코딩(encode_paths)과 디코딩(decode_path)도 여기서 공유.
+"""
+
+import gzip
+import re
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+_ATTR_ENTITIES = {'"': '&quot;'}
+
+
+class SVGWriter:
+    """XML 요소를 순서대로 write하는 writer
+
+    사용법:
+        svg = SVGWriter(f)
+        svg.declaration()
+        svg.start('svg', {...})
+        svg.element('path', {...})
+        svg.end('svg')
+    """
+
+    def __init__(self, f, pretty=True, indent='  '):
+        self.f = f
+        self.pretty = pretty
+        self.indent = indent if pretty else ''
+        self.newline = '\n' if pretty else ''
+        self.depth = 0
+
+    def declaration(self):
+        self.f.write('<?xml version="1.0" ?>' + self.newline)
+
+    def _open_tag(self, tag, attrs):
+        parts = [self.indent * self.depth, '<', tag]
+        if attrs:
+            for key, value in attrs.items():
+                parts.append(f' {key}="{escape(str(value), _ATTR_ENTITIES)}"')
+        return ''.join(parts)
+
+    def start(self, tag, attrs=None):
+        """자식 요소를 가지는 요소 열기"""
+        self.f.write(self._open_tag(tag, attrs) + '>' + self.newline)
+        self.depth += 1
+
+    def end(self, tag):
+        self.depth -= 1
+        self.f.write(f'{self.indent * self.depth}</{tag}>{self.newline}')
+
+    def element(self, tag, attrs=None, text=None):
+        """자식이 없는 요소 (text가 없으면 <tag .../>)"""
+        if text:
+            self.f.write(f'{self._open_tag(tag, attrs)}>{escape(str(text))}</{tag}>{self.newline}')
+        else:
+            self.f.write(self._open_tag(tag, attrs) + '/>' + self.newline)
+
+    def metadata(self, fields):
+        """<metadata> 아래에 필드마다 <key>value</key>"""
+        self.start('metadata')
+        for key, value in fields.items():
+            self.element(key, text=value)
+        self.end('metadata')
+
+
+def open_svg(path, mode='w'):
+    """SVG 파일 열기 (.svgz는 gzip 압축 텍스트)"""
+    if path.endswith('.svgz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8', buffering=1 << 20)
+
+
+def parse_svg(path):
+    """ET.parse (.svgz 지원)"""
+    if str(path).endswith('.svgz'):
+        with gzip.open(path, 'rb') as f:
+            return ET.parse(f)
+    return ET.parse(path)
+
+
+def write_svg_tree(tree, path):
+    """ElementTree를 XML 선언과 함께 저장 (.svgz는 gzip 압축)"""
+    if str(path).endswith('.svgz'):
+        with gzip.open(path, 'wb') as f:
+            tree.write(f, encoding='utf-8', xml_declaration=True)
+    else:
+        tree.write(path, encoding='utf-8', xml_declaration=True)
+
+
+def bezier_points(p0, c1, c2, p3):
+    """3차 Bézier를 선분으로 근사한 점 (t = 1/n .. 1, 시작점 제외)
+
+    분할 수는 제어 다각형 길이 기준 (약 2px 간격, 4~64).
+    """
+    p0, c1, c2, p3 = (np.asarray(p, dtype=np.float64) for p in (p0, c1, c2, p3))
+    length = np.hypot(*(c1 - p0)) + np.hypot(*(c2 - c1)) + np.hypot(*(p3 - c2))
+    n = int(min(64, max(4, np.ceil(length / 2))))
+    t = np.arange(1, n + 1)[:, None] / n
+    mt = 1 - t
+    return mt ** 3 * p0 + 3 * mt ** 2 * t * c1 + 3 * mt * t ** 2 * c2 + t ** 3 * p3
+
+
+def flatten_path(points, kinds):
+    """점 + kinds (0=꼭짓점, 1=Bézier 제어점) → 곡선을 선분으로 펼친 다각형 (float)"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    out = [points[:1]]
+    j = 1
+    while j < len(points):
+        if kinds[j]:
+            out.append(bezier_points(points[j - 1], points[j], points[j + 1], points[j + 2]))
+            j += 3
+        else:
+            out.append(points[j:j + 1])
+            j += 1
+    return np.concatenate(out)
+
+
+def _join_numbers(*columns):
+    """정수 배열들을 ' '로 이어 붙인 문자열 배열"""
+    result = columns[0].astype(str)
+    for column in columns[1:]:
+        result = np.char.add(np.char.add(result, ' '), column.astype(str))
+    return result
+
+
+def encode_paths(points, offsets, compact=False, kinds=None):
+    """여러 path를 SVG path 문자열로 일괄 변환 (좌표 문자열화는 numpy로 한 번에)
+
+    Args:
+        points: (P, 2) 정수 좌표 (모든 path를 이어 붙인 버퍼)
+        offsets: (N+1,) i번째 path = points[offsets[i]:offsets[i+1]]
+        compact: False → "M 10,20 L 30,40 Z" (기존 형식)
+                 True  → "M10 20l20 20h5v-3z" (상대 좌표, 수평/수직은 h/v, 공백 최소화)
+        kinds: (P,) 0=꼭짓점, 1=Bézier 제어점 (제어점 2개 + 끝점 → C/c). None이면 모두 꼭짓점
+
+    Returns:
+        path 문자열 리스트 (N,)
+    """
+    points = np.asarray(points).reshape(-1, 2)
+    offsets = np.asarray(offsets)
+    if len(points) == 0:
+        return [''] * (len(offsets) - 1)
+
+    starts = offsets[:-1]
+    xs = points[:, 0].astype(str)
+    ys = points[:, 1].astype(str)
+
+    if compact:
+        delta = np.zeros_like(points)
+        delta[1:] = points[1:] - points[:-1]
+        dx, dy = delta[:, 0], delta[:, 1]
+        dxs, dys = dx.astype(str), dy.astype(str)
+        segments = np.where(dx == 0, np.char.add('v', dys),
+                            np.where(dy == 0, np.char.add('h', dxs),
+                                     np.char.add(np.char.add(np.char.add('l', dxs), ' '), dys)))
+        segments = segments.astype(object)
+        segments[starts] = np.char.add(np.char.add(np.char.add('M', xs[starts]), ' '), ys[starts])
+        sep, close = '', 'z'
+    else:
+        coords = np.char.add(np.char.add(xs, ','), ys)
+        segments = np.char.add('L ', coords).astype(object)
+        segments[starts] = np.char.add('M ', coords[starts])
+        sep, close = ' ', ' Z'
+
+    if kinds is not None and np.any(kinds):
+        kinds = np.asarray(kinds)
+        # 곡선 끝점: 앞의 두 점이 제어점
+        ends = np.flatnonzero((kinds == 0) & (np.roll(kinds, 1) == 1))
+        if compact:
+            base = points[ends - 3]
+            d1, d2, d3 = points[ends - 2] - base, points[ends - 1] - base, points[ends] - base
+            segments[ends] = np.char.add('c', _join_numbers(d1[:, 0], d1[:, 1], d2[:, 0], d2[:, 1],
+                                                            d3[:, 0], d3[:, 1]))
+        else:
+            segments[ends] = np.char.add(np.char.add(np.char.add(np.char.add(np.char.add(
+                'C ', coords[ends - 2]), ' '), coords[ends - 1]), ' '), coords[ends])
+        # 제어점은 끝점 segment에 포함되므로 제외
+        keep = kinds == 0
+        segments = segments[keep]
+        offsets = np.concatenate([[0], np.cumsum(keep)])[offsets]
+
+    segments = segments.tolist()
+    return [sep.join(segments[s:e]) + close for s, e in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+_PATH_TOKEN = re.compile(r'[MLHVCZmlhvcz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+def decode_path(path_data):
+    """SVG path 문자열 → 절대 좌표 [(x, y), ...]
+
+    M/L/H/V/C/Z와 상대 명령(m/l/h/v/c/z)을 지원 (encode_paths의 두 형식 모두).
+    C(3차 Bézier)는 선분으로 펼쳐서 반환.
+    """
+    tokens = _PATH_TOKEN.findall(path_data)
+    coords = []
+    x = y = 0.0
+    start = (0.0, 0.0)
+    cmd = None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.isalpha():
+            cmd = token
+            i += 1
+            if cmd in 'Zz':
+                x, y = start
+            continue
+        if cmd is None:
+            i += 1
+            continue
+
+        relative = cmd.islower()
+        try:
+            if cmd in 'MmLl':
+                px, py = float(tokens[i]), float(tokens[i + 1])
+                i += 2
+                x, y = (x + px, y + py) if relative else (px, py)
+                if cmd in 'Mm':
+                    start = (x, y)
+                    # M 뒤의 좌표 쌍은 L로 취급 (SVG 규칙)
+                    cmd = 'l' if relative else 'L'
+            elif cmd in 'Hh':
+                v = float(tokens[i])
+                i += 1
+                x = x + v if relative else v
+            elif cmd in 'Vv':
+                v = float(tokens[i])
+                i += 1
+                y = y + v if relative else v
+            elif cmd in 'Cc':
+                values = [float(v) for v in tokens[i:i + 6]]
+                if len(values) < 6:
+                    break
+                i += 6
+                if relative:
+                    values = [v + (x if k % 2 == 0 else y) for k, v in enumerate(values)]
+                c1, c2, p3 = values[0:2], values[2:4], values[4:6]
+                coords.extend(map(tuple, bezier_points((x, y), c1, c2, p3)[:-1].tolist()))
+                x, y = p3
+            else:
+                i += 1
+                continue
+        except (ValueError, IndexError):
+            break
+        coords.append((x, y))
+
+    return coords
+
+
+def compact_path(path_data):
+    """기존 path 문자열을 compact 인코딩으로 변환 (정수 좌표가 아니거나 곡선이 있으면 그대로)"""
+    if re.search(r'[Cc]', path_data):
+        return path_data
+    coords = decode_path(path_data)
+    if not coords:
+        return path_data
+    points = np.array(coords)
+    if not np.all(points == np.round(points)):
+        return path_data
+    return encode_paths(points.astype(np.int64), [0, len(points)], compact=True)[0]
@@ -10,28 +10,48 @@ SVG 벡터가 원본 이미지와 정확히 매칭되는지 시각적으로 검
 
 import cv2
 import numpy as np
-import xml.etree.ElementTree as ET
 import argparse
-import re
+
+from hole_geometry import load_geometry, svg_hole_id
+from svg_writer import decode_path, parse_svg
 
 
 def parse_svg_path(path_d):
-    """SVG path 문자열을 좌표 리스트로 파싱"""
-    points = []
+    """SVG path 문자열을 좌표 리스트로 파싱
+
+    "M 271,1080 L 277,1080 L 275,1077 Z" 및 compact 형식 ("M271 1080h6l-2 -3z")
+    """
+    points = [[int(x), int(y)] for x, y in decode_path(path_d)]
+    return np.array(points, dtype=np.int32).reshape(-1, 2)
 
-    # "M 271,1080 L 277,1080 L 275,1077 Z" 형식 파싱
-    commands = re.findall(r'[ML]\s*([\d.]+),([\d.]+)', path_d)
 
-    for cmd in commands:
-        x, y = float(cmd[0]), float(cmd[1])
-        points.append([int(x), int(y)])
+def load_geometry_paths(svg_path):
+    """형상 sidecar에서 path 좌표 읽기 (없으면 None)
 
-    return np.array(points, dtype=np.int32)
+    통합 SVG → 전체 구멍, 개별 SVG (hole_XXXX_...svg) → 해당 구멍만
+    """
+    geometry = load_geometry(svg_path)
+    if geometry is None:
+        return None
+
+    hole_id = svg_hole_id(svg_path)
+    if hole_id is None:
+        indices = range(len(geometry))
+    else:
+        indices = [i for i in range(len(geometry)) if geometry.records[i]['id'] == hole_id]
+        if not indices:
+            return None
+    return [np.asarray(geometry.path_points(i)).astype(np.int32) for i in indices]
 
 
 def load_svg_paths(svg_path):
     """SVG 파일에서 모든 path 읽기"""
-    tree = ET.parse(svg_path)
+    paths = load_geometry_paths(svg_path)
+    if paths is not None:
+        print(f"Loaded {len(paths)} paths from geometry sidecar")
+        return paths
+
+    tree = parse_svg(svg_path)
     root = tree.getroot()
 
     # SVG namespace 처리